@@ -7,27 +7,101 @@
 #pragma once
 
 #include "tile.h"
+#include "cell_set.h"
+#include "direction.h"
+#include "zobrist.h"
+#include "rng_stream.h"
 #include <vector>
-#include <set>
+#include <string>
 #include <tuple>
 #include <utility>
 #include <random>
+#include <memory>
+#include <cstdint>
+
+// Cell classes Board keeps a live registry for. Numbered tiles fall into no
+// code class; PASSIVE tracks any cell whose passive bits are set.
+enum class CellClass { EMPTY, BOMB, SNAIL, WALL, PASSIVE };
+constexpr int kCellClassCount = 5;
+
+// Current contents of a cell reported by Board::take_changes().
+struct CellChange {
+    int row, col;
+    int value;
+    int passive;
+};
 
 class Board {
 public:
     Board(int rows, int cols);
     Board(int rows, int cols, unsigned int seed);
+    // Copies get their own planes; views of the source stay with the source.
+    // Assigning a board with the same layout writes into the existing planes.
+    Board(const Board& other);
+    Board& operator=(const Board& other);
+    Board(Board&&) = default;
+    Board& operator=(Board&&) = default;
+
+    // Restart the spawn RNG.
+    void reseed(unsigned int seed) { rng_.seed(seed); }
+    // Position of the spawn RNG, for snapshots.
+    RngStream::Mark rng_mark() const { return rng_.mark(); }
+    void restore_rng(const RngStream::Mark& mark) { rng_.restore(mark); }
 
     int rows() const { return rows_; }
     int cols() const { return cols_; }
 
-    Tile& at(int r, int c);
-    const Tile& at(int r, int c) const;
+    // Decoded copy of a cell. All writes go through set()/clear()/swap_cells().
+    Tile at(int r, int c) const {
+        int i = index(r, c);
+        return {tile_code::decode(codes_[i]), static_cast<PassiveType>(passives_[i])};
+    }
+    TileCode code(int r, int c) const { return codes_[index(r, c)]; }
+    PassiveType passive(int r, int c) const { return static_cast<PassiveType>(passives_[index(r, c)]); }
+
+    void set(int r, int c, const Tile& tile) { set_code(r, c, tile_code::encode(tile.value), tile.passive); }
+    void set(int r, int c, int value, PassiveType passive = PassiveType::NONE) {
+        set_code(r, c, tile_code::encode(value), passive);
+    }
+    void set_code(int r, int c, TileCode code, PassiveType passive = PassiveType::NONE) {
+        int i = index(r, c);
+        auto bits = static_cast<std::uint8_t>(passive);
+        track(r, c, codes_[i], passives_[i], code, bits);
+        codes_[i] = code;
+        passives_[i] = bits;
+        values_[i] = tile_code::decode(code);
+    }
+    // Overwrite the tile value only; the cell keeps its passive bits.
+    void set_value(int r, int c, int value) {
+        int i = index(r, c);
+        TileCode code = tile_code::encode(value);
+        track(r, c, codes_[i], passives_[i], code, passives_[i]);
+        codes_[i] = code;
+        values_[i] = value;
+    }
+    void set_passive(int r, int c, PassiveType passive) {
+        int i = index(r, c);
+        auto bits = static_cast<std::uint8_t>(passive);
+        track(r, c, codes_[i], passives_[i], codes_[i], bits);
+        passives_[i] = bits;
+    }
+    void clear(int r, int c) { set_code(r, c, tile_code::EMPTY); }
+    void swap_cells(int r1, int c1, int r2, int c2);
 
-    void expand(const std::string& direction);
+    // Grow by one row/column. Uses the spare margin on that side when there is
+    // one; otherwise the buffer is regrown with fresh margins on all four sides.
+    // Down/right index only the new cells; up/left also shift the registries
+    // word by word and refold the hash. Direction::NONE (or an unknown string)
+    // adds nothing.
+    void expand(Direction direction);
+    void expand(const std::string& direction) { expand(parse_direction(direction)); }
+    // Resize to rows x cols with every cell empty, on a fresh buffer (views
+    // stay with the old planes, as after a regrow). Every cell is marked
+    // changed; the RNG is kept.
+    void reset(int rows, int cols);
 
     // Spawn a 2 in a random empty cell, excluding given positions. Returns (-1,-1) if no space.
-    std::pair<int,int> spawn_number(const std::set<std::pair<int,int>>& excluded = {});
+    std::pair<int,int> spawn_number(const CellSet& excluded = {});
 
     // Place a bomb (-1) in a random empty cell. Returns (-1,-1) if no space.
     std::pair<int,int> spawn_bomb();
@@ -38,17 +112,130 @@ public:
     // Place a wall/brick (-3) in a random empty cell. Returns (-1,-1) if no space.
     std::pair<int,int> spawn_wall();
 
-    std::vector<std::pair<int,int>> empty_cells(const std::set<std::pair<int,int>>& excluded = {}) const;
-    std::vector<std::pair<int,int>> occupied_numbered_cells(const std::set<std::pair<int,int>>& excluded = {}) const;
+    // Live registries of empty, bomb, snail, wall and passive cells, updated
+    // as tiles are written, so callers never need a full-board scan.
+    const CellSet& cells(CellClass k) const { return classes_[static_cast<int>(k)]; }
+    int count(CellClass k) const { return counts_[static_cast<int>(k)]; }
+
+    // Cells whose code or passive bits changed since the last clear_changed(),
+    // and a counter bumped by every such change (and by expansion).
+    const CellSet& changed() const { return changed_; }
+    void clear_changed() { changed_.clear(); }
+    std::uint64_t version() const { return version_; }
+    // XOR of zobrist::cell_key over every cell, kept up to date by each write
+    // (and refolded on expansion up or left, which shifts coordinates).
+    std::uint64_t hash() const { return hash_; }
+    // Changes whenever a wall or snail is added or removed, and on expansion.
+    // Stamps come from one process-wide counter, so two boards share a stamp
+    // only when one is a copy of the other with the same walls and snails;
+    // a cache keyed on it never confuses boards.
+    std::uint64_t obstacle_stamp() const { return obstacle_stamp_; }
+
+    // Change journal for consumers outside the turn pipeline (the frontend).
+    // It marks the same writes as changed() but is only emptied by
+    // take_changes(), which appends each marked cell's current contents
+    // (row-major). Expanding down or right marks the new cells; up or left
+    // marks every cell, since every coordinate shifts.
+    void take_changes(std::vector<CellChange>& out);
+
+    std::vector<std::pair<int,int>> empty_cells(const CellSet& excluded = {}) const;
+    std::vector<std::pair<int,int>> occupied_numbered_cells(const CellSet& excluded = {}) const;
+    // Fills `out` (cleared first) instead of returning a new vector.
+    void occupied_numbered_cells(const CellSet& excluded, std::vector<std::pair<int,int>>& out) const;
 
     // Row-major flat array of tile values for Python rendering
     std::vector<int> to_flat_values() const;
 
+    // Zero-copy access to the decoded value plane (int32, one per cell) and
+    // the passive bit-plane. The live area starts at element offset() and rows
+    // are stride() elements apart. Holding a plane keeps its buffer alive. A
+    // plane taken before expand() is stale: until the board regrows into a
+    // fresh buffer it keeps following the same cells, at their old offsets,
+    // and after that it keeps the board as it was.
+    int stride() const { return stride_; }
+    size_t offset() const { return static_cast<size_t>(index(0, 0)); }
+    std::shared_ptr<const std::vector<std::int32_t>> value_plane() const { return value_plane_; }
+    std::shared_ptr<const std::vector<std::uint8_t>> passive_plane() const { return passive_plane_; }
+
     // (row, col, passive_type_int) for each tile with a passive
     std::vector<std::tuple<int,int,int>> get_passive_map() const;
 
 private:
     int rows_, cols_;
-    std::vector<std::vector<Tile>> grid_;
-    std::mt19937 rng_;
+    // Row-major planes of stride_ x cap_rows_ cells: tile codes plus the
+    // passive bit-plane. The live rows_ x cols_ area starts at (row0_, col0_);
+    // everything outside it is kept empty so expansion only has to move the
+    // origin or the extent.
+    int stride_, cap_rows_;
+    int row0_, col0_;
+    std::vector<TileCode> codes_;
+    // The passive plane and a decoded int32 value mirror are shared so that
+    // Python views can outlive a regrow; the raw pointers cache their data().
+    std::shared_ptr<std::vector<std::uint8_t>> passive_plane_;
+    std::shared_ptr<std::vector<std::int32_t>> value_plane_;
+    std::uint8_t* passives_ = nullptr;
+    std::int32_t* values_ = nullptr;
+    RngStream rng_;
+
+    // Cell-class registries in live (row, col) coordinates.
+    CellSet classes_[kCellClassCount];
+    int counts_[kCellClassCount] = {};
+    CellSet changed_;
+    CellSet journal_;
+    std::uint64_t version_ = 0;
+    std::uint64_t hash_ = 0;
+    std::uint64_t obstacle_stamp_ = 0;
+
+    static std::uint64_t next_obstacle_stamp();
+    int index(int r, int c) const { return (row0_ + r) * stride_ + col0_ + c; }
+    void regrow();
+    void rebuild_index();
+    void index_expansion(Direction direction);
+    void adopt_planes(std::vector<std::uint8_t> passives, std::vector<std::int32_t> values);
+
+    // Registry slot for a tile code; -1 for numbered tiles.
+    static int code_class(TileCode code) {
+        switch (code) {
+            case tile_code::EMPTY: return static_cast<int>(CellClass::EMPTY);
+            case tile_code::BOMB:  return static_cast<int>(CellClass::BOMB);
+            case tile_code::SNAIL: return static_cast<int>(CellClass::SNAIL);
+            case tile_code::WALL:  return static_cast<int>(CellClass::WALL);
+            default:               return -1;
+        }
+    }
+    static bool is_obstacle_class(int k) {
+        return k == static_cast<int>(CellClass::SNAIL) || k == static_cast<int>(CellClass::WALL);
+    }
+    void add_to(int k, int r, int c) {
+        classes_[k].insert(r, c);
+        counts_[k]++;
+        if (is_obstacle_class(k)) obstacle_stamp_ = next_obstacle_stamp();
+    }
+    void remove_from(int k, int r, int c) {
+        classes_[k].erase(r, c);
+        counts_[k]--;
+        if (is_obstacle_class(k)) obstacle_stamp_ = next_obstacle_stamp();
+    }
+    void track(int r, int c, TileCode old_code, std::uint8_t old_passive,
+               TileCode new_code, std::uint8_t new_passive) {
+        if (old_code == new_code && old_passive == new_passive) return;
+        changed_.insert(r, c);
+        journal_.insert(r, c);
+        version_++;
+        hash_ ^= zobrist::cell_key(r, c, old_code, old_passive) ^
+                 zobrist::cell_key(r, c, new_code, new_passive);
+        if (old_code != new_code) {
+            int from = code_class(old_code), to = code_class(new_code);
+            if (from != to) {
+                if (from >= 0) remove_from(from, r, c);
+                if (to >= 0) add_to(to, r, c);
+            }
+        }
+        if ((old_passive != 0) != (new_passive != 0)) {
+            constexpr int k = static_cast<int>(CellClass::PASSIVE);
+            if (new_passive) add_to(k, r, c);
+            else             remove_from(k, r, c);
+        }
+    }
+    std::pair<int,int> spawn_code(TileCode code, const CellSet& excluded);
 };
@@ -0,0 +1,239 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include <algorithm>
+#include <cstdint>
+#include <utility>
+#include <vector>
+
+// Dense set of board cells: one bit per cell, row-major, sized to the board's
+// rows x cols. Membership tests and inserts never allocate; iteration visits
+// cells in row-major order (the order std::set<std::pair<int,int>> gave).
+// Out-of-range cells are never members. Sets of up to 128 bits keep them
+// inline, so creating or copying one for a small board never allocates.
+//
+// Rows are a power-of-two pitch of bits apart (cols rounded up), fixed by
+// cols alone, so sets of the same size share a layout and combine word by
+// word. The spare bits at the end of each row stay zero; they let a board
+// grow by a column without moving its members (see add_col()).
+class CellSet {
+public:
+    CellSet() = default;
+    CellSet(int rows, int cols) { reset(rows, cols); }
+
+    int rows() const { return rows_; }
+    int cols() const { return cols_; }
+
+    // Resize to rows x cols and clear. Keeps the word buffer's capacity.
+    void reset(int rows, int cols) {
+        rows_ = rows;
+        cols_ = cols;
+        shift_ = shift_for(cols);
+        words_.assign_zero(words_for(rows, shift_));
+    }
+
+    // Resize, keeping every member at the same (row, col). Rows and columns
+    // added at the end only move the members when the row pitch grows.
+    void resize(int rows, int cols) {
+        if (rows >= rows_ && cols >= cols_ && shift_for(cols) == shift_) {
+            rows_ = rows;
+            cols_ = cols;
+            words_.grow(words_for(rows, shift_));
+            return;
+        }
+        CellSet grown(rows, cols);
+        for_each([&](int r, int c) { if (r < rows && c < cols) grown.insert(r, c); });
+        *this = std::move(grown);
+    }
+
+    // Grow by one row, at the top (every member moves down a row) or at the
+    // bottom. At most one pass over the words.
+    void add_row(bool at_front) {
+        rows_++;
+        words_.grow(words_for(rows_, shift_));
+        if (at_front) shift_bits(size_t(1) << shift_);
+    }
+    // Grow by one column, at the left (every member moves right a column) or
+    // at the right. Within the row pitch this is a one-bit shift of the words,
+    // or nothing at all; otherwise the members move to a wider pitch.
+    void add_col(bool at_front) {
+        if (shift_for(cols_ + 1) != shift_) {
+            CellSet grown(rows_, cols_ + 1);
+            for_each([&](int r, int c) { grown.insert(r, c + at_front); });
+            *this = std::move(grown);
+            return;
+        }
+        cols_++;
+        if (at_front) shift_bits(1);
+    }
+
+    // Insert every cell.
+    void fill() {
+        for (int r = 0; r < rows_; r++) {
+            size_t i = static_cast<size_t>(r) << shift_, end = i + cols_;
+            while (i < end) {
+                size_t n = std::min<size_t>(end - i, 64 - (i & 63));
+                words_[i >> 6] |= (n == 64 ? ~std::uint64_t(0) : ((std::uint64_t(1) << n) - 1)) << (i & 63);
+                i += n;
+            }
+        }
+    }
+
+    void clear() { std::fill(words_.begin(), words_.end(), 0); }
+
+    bool test(int r, int c) const {
+        if (r < 0 || r >= rows_ || c < 0 || c >= cols_) return false;
+        size_t i = bit(r, c);
+        return (words_[i >> 6] >> (i & 63)) & 1;
+    }
+    void insert(int r, int c) {
+        size_t i = bit(r, c);
+        words_[i >> 6] |= std::uint64_t(1) << (i & 63);
+    }
+    void insert(std::pair<int,int> p) { insert(p.first, p.second); }
+    void erase(int r, int c) {
+        if (r < 0 || r >= rows_ || c < 0 || c >= cols_) return;
+        size_t i = bit(r, c);
+        words_[i >> 6] &= ~(std::uint64_t(1) << (i & 63));
+    }
+
+    // Union with a set of the same dimensions.
+    void insert(const CellSet& other) {
+        for (size_t w = 0; w < words_.size(); w++) words_[w] |= other.words_[w];
+    }
+
+    bool empty() const {
+        for (auto w : words_) if (w) return false;
+        return true;
+    }
+    int size() const {
+        int n = 0;
+        for (auto w : words_) n += __builtin_popcountll(w);
+        return n;
+    }
+
+    // Number of members that are not in `excluded`. An unsized `excluded`
+    // (default-constructed) excludes nothing.
+    int count_excluding(const CellSet& excluded) const {
+        if (excluded.words_.size() != words_.size()) return size();
+        int n = 0;
+        for (size_t w = 0; w < words_.size(); w++)
+            n += __builtin_popcountll(words_[w] & ~excluded.words_[w]);
+        return n;
+    }
+
+    // The k-th (0-based, row-major) member not in `excluded`, or (-1, -1).
+    std::pair<int,int> nth_excluding(int k, const CellSet& excluded) const {
+        bool masked = excluded.words_.size() == words_.size();
+        for (size_t w = 0; w < words_.size(); w++) {
+            std::uint64_t bits = masked ? words_[w] & ~excluded.words_[w] : words_[w];
+            int n = __builtin_popcountll(bits);
+            if (k >= n) { k -= n; continue; }
+            while (k--) bits &= bits - 1;
+            return cell(w * 64 + __builtin_ctzll(bits));
+        }
+        return {-1, -1};
+    }
+
+    // Calls f(row, col) for each member in row-major order.
+    template <typename F>
+    void for_each(F&& f) const {
+        for (size_t w = 0; w < words_.size(); w++) {
+            std::uint64_t bits = words_[w];
+            while (bits) {
+                auto [r, c] = cell(w * 64 + __builtin_ctzll(bits));
+                f(r, c);
+                bits &= bits - 1;
+            }
+        }
+    }
+
+    // Members in row-major order (reverse row-major if reverse is set),
+    // written into a caller-owned buffer so it can be reused across turns.
+    void collect(std::vector<std::pair<int,int>>& out, bool reverse = false) const {
+        out.clear();
+        out.reserve(static_cast<size_t>(rows_) * cols_);  // no-op once a buffer has grown
+        for_each([&](int r, int c) { out.push_back({r, c}); });
+        if (reverse) std::reverse(out.begin(), out.end());
+    }
+
+    bool operator==(const CellSet& o) const {
+        return rows_ == o.rows_ && cols_ == o.cols_ && words_ == o.words_;
+    }
+    bool operator!=(const CellSet& o) const { return !(*this == o); }
+
+private:
+    // Word storage: kInlineWords words in the object itself, a heap buffer
+    // beyond that. The heap buffer is emptied (keeping its capacity) while
+    // the inline words are in use, so copying a small set copies no heap data.
+    class Words {
+    public:
+        size_t size() const { return size_; }
+        std::uint64_t* begin() { return size_ <= kInlineWords ? inline_ : heap_.data(); }
+        std::uint64_t* end() { return begin() + size_; }
+        const std::uint64_t* begin() const { return size_ <= kInlineWords ? inline_ : heap_.data(); }
+        const std::uint64_t* end() const { return begin() + size_; }
+        std::uint64_t& operator[](size_t i) { return begin()[i]; }
+        std::uint64_t operator[](size_t i) const { return begin()[i]; }
+
+        // Resize to n >= size() words, the new ones zero.
+        void grow(size_t n) {
+            if (n <= kInlineWords) {
+                size_ = n;
+                return;
+            }
+            if (size_ <= kInlineWords) heap_.assign(inline_, inline_ + size_);
+            heap_.resize(n, 0);
+            size_ = n;
+        }
+        void assign_zero(size_t n) {
+            size_ = n;
+            if (n <= kInlineWords) {
+                heap_.clear();
+                std::fill(inline_, inline_ + kInlineWords, 0);
+            } else {
+                heap_.assign(n, 0);
+            }
+        }
+        bool operator==(const Words& o) const {
+            return size_ == o.size_ && std::equal(begin(), end(), o.begin());
+        }
+
+    private:
+        static constexpr size_t kInlineWords = 2;
+        std::uint64_t inline_[kInlineWords] = {};
+        std::vector<std::uint64_t> heap_;
+        size_t size_ = 0;
+    };
+
+    int rows_ = 0, cols_ = 0;
+    int shift_ = 0;  // log2 of the row pitch
+    Words words_;
+
+    static int shift_for(int cols) {
+        int shift = 0;
+        while ((1 << shift) < cols) shift++;
+        return shift;
+    }
+    static size_t words_for(int rows, int shift) {
+        return ((static_cast<size_t>(rows) << shift) + 63) / 64;
+    }
+    size_t bit(int r, int c) const { return (static_cast<size_t>(r) << shift_) + c; }
+    std::pair<int,int> cell(size_t i) const {
+        return {static_cast<int>(i >> shift_), static_cast<int>(i & ((size_t(1) << shift_) - 1))};
+    }
+    // Move every bit n places up (towards the end), dropping those that pass it.
+    void shift_bits(size_t n) {
+        const size_t words = n / 64, bits = n % 64;
+        for (size_t w = words_.size(); w-- > 0;) {
+            std::uint64_t v = w >= words ? words_[w - words] << bits : 0;
+            if (bits && w > words) v |= words_[w - words - 1] >> (64 - bits);
+            words_[w] = v;
+        }
+    }
+};
@@ -7,17 +7,23 @@
 #pragma once
 
 #include "tile_behavior.h"
-#include <set>
+#include "cell_set.h"
+#include <vector>
 #include <utility>
 
 // Handles the CONTRARIAN passive (pure and combined with A_LITTLE_SLOW).
 // Tiles move in the opposite direction of player input.
 // Combined with A_LITTLE_SLOW: moves 1 step per turn in the opposite direction.
 class ContrarianBehavior : public TileBehavior {
-    std::set<std::pair<int,int>> positions_;
-    std::set<std::pair<int,int>> pre_blocked_;
+    CellSet positions_;
+    std::vector<std::pair<int,int>> order_;  // reused advance-order buffer
+    CellSet pre_blocked_;
 
 public:
+    std::unique_ptr<TileBehavior> clone() const override {
+        return std::make_unique<ContrarianBehavior>(*this);
+    }
+
     // Matches any tile with CONTRARIAN bit set (including slow+contrarian combos).
     bool matches(PassiveType p) const override {
         return has_passive(p, PassiveType::CONTRARIAN);
@@ -33,4 +39,5 @@ public:
 
     void pre_snapshot(const Board& board, int dr, int dc) override;
     bool advance(MoveContext& ctx, TurnResult& result) override;
+    bool can_advance(const AdvanceQuery& q) const override;
 };
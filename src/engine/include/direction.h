@@ -0,0 +1,51 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include <cstdint>
+#include <stdexcept>
+#include <string>
+
+// Player input / expansion direction. NONE is "no direction": a move that
+// moves nothing, an expansion that adds nothing, an unset TurnResult field.
+enum class Direction : std::uint8_t {
+    UP = 0,
+    DOWN = 1,
+    LEFT = 2,
+    RIGHT = 3,
+    NONE = 4,
+};
+
+inline int row_step(Direction d) { return d == Direction::UP ? -1 : d == Direction::DOWN ? 1 : 0; }
+inline int col_step(Direction d) { return d == Direction::LEFT ? -1 : d == Direction::RIGHT ? 1 : 0; }
+
+// "up", "down", "left", "right"; any other string is NONE, which is how the
+// string API has always treated unknown directions.
+inline Direction parse_direction(const std::string& name) {
+    if (name == "up")    return Direction::UP;
+    if (name == "down")  return Direction::DOWN;
+    if (name == "left")  return Direction::LEFT;
+    if (name == "right") return Direction::RIGHT;
+    return Direction::NONE;
+}
+
+// Throws std::invalid_argument for integers outside 0..4.
+inline Direction direction_from_int(int d) {
+    if (d < 0 || d > static_cast<int>(Direction::NONE))
+        throw std::invalid_argument("invalid direction: " + std::to_string(d));
+    return static_cast<Direction>(d);
+}
+
+inline const char* direction_name(Direction d) {
+    switch (d) {
+        case Direction::UP:    return "up";
+        case Direction::DOWN:  return "down";
+        case Direction::LEFT:  return "left";
+        case Direction::RIGHT: return "right";
+        default:               return "";
+    }
+}
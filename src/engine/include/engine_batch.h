@@ -0,0 +1,82 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "game_engine.h"
+#include <cstdint>
+#include <limits>
+#include <random>
+#include <vector>
+
+// What a batch does with a turn's passive candidates, which the game asks the
+// player about: leave them unassigned, give each the same passive, or pick
+// one of the two per candidate.
+enum class PassivePolicy : std::uint8_t {
+    DECLINE = 0,
+    A_LITTLE_SLOW = 1,
+    CONTRARIAN = 2,
+    RANDOM = 3,
+};
+
+struct BatchOptions {
+    // Direction every expansion grows in; NONE picks one at random per
+    // expansion, as the game does.
+    Direction expansion = Direction::NONE;
+    PassivePolicy passives = PassivePolicy::DECLINE;
+};
+
+// Play one turn into `result` and then do what the frontend would do next:
+// resolve the passive candidates by options.passives, then complete a
+// pending expansion in options.expansion. Random choices come from `rng`.
+// Returns whether the turn was valid.
+bool play_turn(GameEngine& engine, Direction direction, const BatchOptions& options,
+               std::mt19937& rng, TurnResult& result);
+
+// N independent seeded engines stepped together, so a simulation loop makes
+// one call per batch of turns instead of one per turn. Turns are played by
+// play_turn(), after which an engine with no moves left is marked done.
+// Done engines ignore further turns.
+class EngineBatch {
+public:
+    // Cells outside an engine's board in copy_boards() output.
+    static constexpr std::int32_t kPadding = std::numeric_limits<std::int32_t>::min();
+
+    // Engine i is GameEngine(rows, cols, seed + 4 * i); its policy RNG is
+    // seeded with seed + 4 * i + 3, so no two RNGs in a batch share a seed.
+    EngineBatch(int count, int rows, int cols, unsigned int seed, BatchOptions options = {});
+
+    int size() const { return static_cast<int>(engines_.size()); }
+    const BatchOptions& options() const { return options_; }
+    GameEngine& engine(int i) { return engines_[i]; }
+    const GameEngine& engine(int i) const { return engines_[i]; }
+    bool done(int i) const { return done_[i] != 0; }
+
+    // Play directions[i * turns + t] on engine i, for t = 0 .. turns-1.
+    // valid and changed (either may be null) are indexed the same way:
+    // valid is the turn's board_changed flag, changed is whether the board
+    // was written at all (including expansions). Turns of a done engine
+    // are skipped and report 0 for both.
+    void run(const Direction* directions, int turns,
+             std::uint8_t* valid, std::uint8_t* changed);
+
+    // Largest board dimensions in the batch.
+    int max_rows() const;
+    int max_cols() const;
+    // Every board's values into out[size()][rows][cols], top-left aligned,
+    // with kPadding past each board's edges. rows and cols must be at least
+    // max_rows() and max_cols().
+    void copy_boards(std::int32_t* out, int rows, int cols) const;
+
+private:
+    BatchOptions options_;
+    std::vector<GameEngine> engines_;
+    std::vector<std::mt19937> policy_rngs_;
+    std::vector<std::uint8_t> done_;
+    TurnResult result_;  // reused by every turn
+
+    void play(int i, Direction direction, std::uint8_t& valid, std::uint8_t& changed);
+};
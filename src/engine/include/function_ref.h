@@ -0,0 +1,33 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include <type_traits>
+#include <utility>
+
+// Non-owning reference to a callable: one object pointer plus one function
+// pointer, so binding a lambda never allocates. The callable must outlive
+// every FunctionRef bound to it.
+template <typename Sig> class FunctionRef;
+
+template <typename R, typename... Args>
+class FunctionRef<R(Args...)> {
+public:
+    template <typename F, typename = std::enable_if_t<
+        !std::is_same_v<std::decay_t<F>, FunctionRef>>>
+    FunctionRef(F& f)
+        : obj_(static_cast<void*>(&f)),
+          call_([](void* obj, Args... args) -> R {
+              return (*static_cast<F*>(obj))(std::forward<Args>(args)...);
+          }) {}
+
+    R operator()(Args... args) const { return call_(obj_, std::forward<Args>(args)...); }
+
+private:
+    void* obj_;
+    R (*call_)(void*, Args...);
+};
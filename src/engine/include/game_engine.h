@@ -10,8 +10,11 @@
 #include "tile_behavior.h"
 #include "passive_roller.h"
 #include "random_mover.h"
+#include "snapshot.h"
+#include "replay.h"
+#include <array>
 #include <vector>
-#include <set>
+#include "cell_set.h"
 #include <string>
 #include <memory>
 
@@ -21,8 +24,65 @@ public:
     // Deterministic variant: seeds all RNGs (engine, board spawns, passive rolls).
     // Same seed + same call sequence = identical runs. Used by the test harness.
     GameEngine(int rows, int cols, unsigned int seed);
+    // Independent copy of the whole game state: board, movers, frozen tiles,
+    // behaviors and all three RNGs. Per-turn scratch, the undo history and
+    // any recording are not copied; the copy's first turn sizes its own.
+    GameEngine(const GameEngine& other);
+    GameEngine& operator=(const GameEngine&) = delete;
 
-    TurnResult process_move(const std::string& direction);
+    // Restart every RNG exactly as the seeded constructor seeds them, so
+    // clones of one position can sample different spawns.
+    void reseed(unsigned int seed);
+
+    TurnResult process_move(Direction direction);
+    TurnResult process_move(const std::string& direction) { return process_move(parse_direction(direction)); }
+    // Same turn, written into `result` (cleared first). Together with the
+    // engine's own scratch buffers, reusing one TurnResult makes a turn
+    // allocation-free once capacities have grown to fit the board.
+    void process_move_into(Direction direction, TurnResult& result);
+    // The turn each direction would produce, indexed by int(Direction) (UP,
+    // DOWN, LEFT, RIGHT), leaving the engine untouched: the state is saved
+    // once, and it and every RNG are restored after each trial turn.
+    std::vector<TurnResult> preview_moves();
+
+    // Save the whole game state (see snapshot.h). Rows unchanged since this
+    // engine's previous snapshot are shared with it rather than copied.
+    Snapshot snapshot() const;
+    // Put the engine in a snapshot's state; it may come from another engine,
+    // with another board size. The change journal marks every cell that
+    // differs (every cell when the size differs).
+    void restore(const Snapshot& snapshot);
+
+    // Undo history: with a limit of n > 0, each valid turn first records a
+    // snapshot of the state before it, keeping the n most recent (a ring).
+    // The default 0 records nothing. Changing the limit clears the history.
+    void set_history_limit(int limit);
+    int history_limit() const { return static_cast<int>(history_.size()); }
+    int history_size() const { return history_count_; }
+    // The state before the back-th most recent recorded turn (0 = the last).
+    Snapshot history(int back) const;
+    // Restore the state before the last recorded turn and drop that entry.
+    // Returns false when there is nothing to undo.
+    bool undo();
+
+    // Record a replay (see replay.h): the current state, then every move,
+    // ability, passive choice, expansion, set_tile, reseed and restore (undo
+    // included), with a checkpoint before every checkpoint_interval-th move
+    // (0 = none but the opening state). Restarting discards the old one.
+    // Copies do not record.
+    void start_recording(int checkpoint_interval = Replay::kDefaultInterval);
+    bool recording() const { return recorder_ != nullptr; }
+    // The replay so far (empty when not recording).
+    std::string replay_data() const;
+    // Stop, returning the finished replay.
+    std::string stop_recording();
+
+    // Compact the lines of boards with at least min_cells cells on a pool of
+    // `threads` threads (0 = one per hardware thread, 1 = off). Turns come
+    // out exactly as single-threaded. Copies start single-threaded.
+    static constexpr int kDefaultParallelCells = 400;  // 20x20
+    void set_move_threads(int threads, int min_cells = kDefaultParallelCells);
+    int move_threads() const;
 
     void set_tile(int row, int col, int value, int passive_type = 0);
     void assign_passive(int row, int col, int passive_type);
@@ -34,38 +94,136 @@ public:
 
     std::vector<int> get_grid_values() const;
     std::vector<std::tuple<int,int,int>> get_passive_map() const;
-    std::vector<SlowMoverState> get_slow_movers() const;
-    std::vector<RandomMoverState> get_random_movers() const;
+    const std::vector<SlowMoverState>& get_slow_movers() const { return slow_movers_.movers(); }
+    const std::vector<RandomMoverState>& get_random_movers() const;
 
     int rows() const { return board_.rows(); }
     int cols() const { return board_.cols(); }
     int score() const { return score_; }
     int tar_expand() const { return tar_expand_; }
     bool has_moves() const;
+    // Bit d (1 << int(Direction)) is set when a move in direction d would be a
+    // valid turn. Read-only, and cached until the board, the frozen tiles or
+    // the slow movers change. A detonating bomb or a moving slow mover makes
+    // every direction count as legal, so a clear bit is always a dead move.
+    int legal_moves() const;
 
-    void complete_expansion(const std::string& direction);
+    // 64-bit hash of the game state: tile values and passives, the board
+    // size, user-frozen tiles, active slow movers (position, destination and
+    // step) and the expansion / snail counters. Score and RNG state are not
+    // part of it. The tile part is maintained by the board on every write.
+    std::uint64_t state_hash() const;
+    // Smallest state_hash over the board's symmetries (mirrors and 180°
+    // rotation; on square boards also the four transposing ones), so
+    // mirrored or rotated positions share one value. Computed on demand.
+    std::uint64_t canonical_hash() const;
+    const Board& board() const { return board_; }
+    // Cells changed since the previous call (every cell after an expansion).
+    std::vector<CellChange> take_changes();
+
+    void complete_expansion(Direction direction);
+    void complete_expansion(const std::string& direction) { complete_expansion(parse_direction(direction)); }
 
 private:
     Board board_;
     int score_;
     int tar_expand_;
-    std::set<std::pair<int,int>> frozen_tiles_;
-    std::vector<SlowMoverState> slow_movers_;
-    std::vector<RandomMoverState> random_movers_;
+    CellSet frozen_tiles_;
+    SlowMoverRegistry slow_movers_;
+    // Follows the board's snails; synced on read, hence mutable.
+    mutable RandomMoverRegistry random_movers_;
     PassiveRoller passive_roller_;
-    std::mt19937 rng_;
+    RngStream rng_;
     int snail_respawn_timer_ = 0;
     int expand_count_ = 0;
 
+    // Per-turn scratch, reused so steady-state turns never allocate.
+    CellSet effective_frozen_;
+    CellSet active_sm_positions_;
+    CellSet snail_vacated_;
+    CellSet spawn_excluded_;
+    MoveResult move_scratch_;
+    // Per-line frozen index shared by turns and legal_moves(); keeps its
+    // wall/snail layer between calls.
+    mutable movement::FrozenLines frozen_lines_;
+    // Set by set_move_threads(); null moves on the calling thread.
+    std::unique_ptr<movement::LineWorkers> line_workers_;
+    // Latest snapshot(), whose rows the next one shares where unchanged.
+    mutable Snapshot last_snapshot_;
+    // Ring of pre-turn snapshots: history_count_ entries, the oldest at
+    // history_start_.
+    std::vector<Snapshot> history_;
+    int history_start_ = 0;
+    int history_count_ = 0;
+    // Set by start_recording(); null records nothing.
+    std::unique_ptr<ReplayWriter> recorder_;
+    struct Detonation {
+        int br, bc, tr, tc;
+        bool target_is_snail;
+        bool target_is_wall;
+        bool needs_slow_mover_cleanup;
+        PassiveType target_passive;  // NONE means regular user-frozen tile
+    };
+    std::vector<Detonation> detonations_;
+    // Bombs a changed_only detonation pass has to examine (scratch).
+    CellSet detonation_scope_;
+    // has_moves() answer, valid while the board version is unchanged.
+    static constexpr std::uint64_t kNoVersion = ~std::uint64_t(0);
+    mutable std::uint64_t has_moves_version_ = kNoVersion;
+    mutable bool has_moves_cached_ = false;
+    // legal_moves() answer and its scratch; place_freeze, clear_freeze and
+    // switch_tiles reset the version since they change state the board doesn't track.
+    mutable std::uint64_t legal_moves_version_ = kNoVersion;
+    mutable int legal_moves_cached_ = 0;
+    mutable CellSet legal_frozen_;
+
     // Registered passive behaviors, in advance-phase order.
-    // To add a new passive: implement TileBehavior and push_back in the constructor.
+    // To add a new passive: implement TileBehavior and register it in the constructor.
     std::vector<std::unique_ptr<TileBehavior>> behaviors_;
 
-    std::vector<SlowMoverUpdate> advance_slow_movers();
-    std::vector<RandomMoverUpdate> advance_random_movers(std::set<std::pair<int,int>>& bomb_destroyed);
-    std::set<std::pair<int,int>> get_effective_frozen() const;
-    void detonate_adjacent_bombs(TurnResult& result, std::set<std::pair<int,int>>& effective_frozen, bool check_frozen_tiles = false);
+    // Owner table indexed by passive bitmask (the passive plane is one byte),
+    // rebuilt by register_behavior.
+    static constexpr int kPassiveMasks = 256;
+    std::array<PassiveOwner, kPassiveMasks> owners_ {};
+
+    // Everything a turn can change, for preview_moves() to restore.
+    struct TurnState {
+        Board board;
+        int score;
+        int tar_expand;
+        CellSet frozen_tiles;
+        SlowMoverRegistry slow_movers;
+        RandomMoverRegistry random_movers;
+        PassiveRoller passive_roller;
+        RngStream rng;
+        int snail_respawn_timer;
+    };
+    void restore_state(const TurnState& state);
+    // process_move_into without recording history.
+    void run_turn(Direction direction, TurnResult& result);
+
+    void register_behavior(std::unique_ptr<TileBehavior> behavior);
+    void reserve_scratch();
+    const PassiveOwner& owner_of(PassiveType p) const {
+        return owners_[static_cast<std::uint8_t>(p)];
+    }
+
+    void advance_slow_movers(std::vector<SlowMoverUpdate>& updates);
+    void advance_random_movers(std::vector<RandomMoverUpdate>& updates, CellSet& bomb_destroyed);
+    // Cells regular movement must not touch for a move along (dr, dc):
+    // user-frozen tiles, active slow movers, behavior-frozen tiles, snails, walls.
+    void build_effective_frozen(CellSet& frozen, int move_dr, int move_dc) const;
+    bool find_merge_pair() const;
+    // state_hash() with the board transformed by symmetry `sym`: bit 2
+    // transposes, bit 1 mirrors rows, bit 0 mirrors columns (applied first).
+    std::uint64_t hash_under(int sym) const;
+    int find_legal_moves() const;
+    // changed_only limits the pass to bombs on or next to cells written since
+    // the previous pass (plus, with check_frozen_tiles, bombs next to
+    // user-frozen tiles); every other bomb already found no target.
+    void detonate_adjacent_bombs(TurnResult& result, CellSet& effective_frozen,
+                                 bool changed_only, bool check_frozen_tiles = false);
     void cascade_fill_behind(int empty_r, int empty_c, int dr, int dc,
-                             const std::set<std::pair<int,int>>& skip,
+                             const CellSet& skip,
                              std::vector<MoveInfo>& out_moves);
 };
@@ -0,0 +1,83 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <stdexcept>
+#include <vector>
+
+// MT19937 with a state layout of our own. The standard fixes the algorithm,
+// so the draws are exactly std::mt19937's for the same seed, but it leaves
+// the layout of std::mt19937's text form (operator<<) to each standard
+// library: libstdc++ writes the position after the state words, MSVC does
+// not. Replays store state() instead, so they load wherever they were made.
+class MersenneTwister {
+public:
+    using result_type = std::uint32_t;
+    static constexpr size_t kStateWords = 624;
+    static constexpr result_type default_seed = 5489u;
+
+    explicit MersenneTwister(result_type value = default_seed) { seed(value); }
+
+    static constexpr result_type min() { return 0; }
+    static constexpr result_type max() { return 0xFFFFFFFFu; }
+
+    void seed(result_type value) {
+        x_[0] = value;
+        for (size_t i = 1; i < kStateWords; i++)
+            x_[i] = 1812433253u * (x_[i - 1] ^ (x_[i - 1] >> 30)) + static_cast<result_type>(i);
+        next_ = kStateWords;
+    }
+
+    result_type operator()() {
+        if (next_ == kStateWords) twist();
+        result_type y = x_[next_++];
+        y ^= y >> 11;
+        y ^= (y << 7) & 0x9D2C5680u;
+        y ^= (y << 15) & 0xEFC60000u;
+        return y ^ (y >> 18);
+    }
+
+    // Skip n draws. Whole blocks are regenerated without tempering.
+    void discard(std::uint64_t n) {
+        while (n > kStateWords - next_) {
+            n -= kStateWords - next_;
+            twist();
+        }
+        next_ += static_cast<size_t>(n);
+    }
+
+    // kStateWords + 1 words: the state words, then the index of the next one
+    // to draw (kStateWords when the next draw regenerates the block). This is
+    // also the layout of Python's random.getstate().
+    std::vector<std::uint32_t> state() const {
+        std::vector<std::uint32_t> words(x_, x_ + kStateWords);
+        words.push_back(static_cast<std::uint32_t>(next_));
+        return words;
+    }
+    // Inverse of state(). Throws std::invalid_argument for any other layout.
+    void set_state(const std::vector<std::uint32_t>& words) {
+        if (words.size() != kStateWords + 1 || words.back() > kStateWords)
+            throw std::invalid_argument("invalid generator state");
+        std::copy(words.begin(), words.end() - 1, x_);
+        next_ = words.back();
+    }
+
+private:
+    result_type x_[kStateWords];
+    size_t next_ = kStateWords;
+
+    void twist() {
+        for (size_t i = 0; i < kStateWords; i++) {
+            result_type y = (x_[i] & 0x80000000u) | (x_[(i + 1) % kStateWords] & 0x7FFFFFFFu);
+            x_[i] = x_[(i + 397) % kStateWords] ^ (y >> 1) ^ ((y & 1) ? 0x9908B0DFu : 0u);
+        }
+        next_ = 0;
+    }
+};
@@ -7,9 +7,11 @@
 #pragma once
 
 #include "board.h"
+#include "direction.h"
 #include "slow_mover.h"
+#include <cstdint>
+#include <memory>
 #include <vector>
-#include <set>
 #include <utility>
 
 struct MoveInfo {
@@ -23,29 +25,121 @@ struct MergeInfo {
     int new_value;
 };
 
+class ThreadPool;
+
 struct MoveResult {
     std::vector<MoveInfo> moves;
     std::vector<MergeInfo> merges;
-    std::set<std::pair<int,int>> bomb_destroyed;
+    CellSet bomb_destroyed;
     bool board_changed = false;
 };
 
 namespace movement {
 
+// Frozen cells bucketed by line: for the lines a direction compacts (rows for
+// LEFT/RIGHT, columns for UP/DOWN), a bitmask per line with bit k set when
+// line cell k (counted from the top/left) is frozen. Walls and snails never
+// move, so they form a static layer cached per orientation and rebuilt only
+// when the board's obstacle_stamp() changes; each build copies it and lays
+// the dynamic frozen cells over it. Buffers are reused, so rebuilding for a
+// board that did not grow never allocates.
+class FrozenLines {
+public:
+    // Index the board's walls and snails, `frozen` and the active slow
+    // mover positions for lines along `horizontal`.
+    void build(const Board& board, bool horizontal,
+               const CellSet& frozen,
+               const std::vector<SlowMoverState>& slow_movers);
+
+    int words() const { return words_; }  // 64-bit words per line
+    const std::uint64_t* line(int i) const { return bits_.data() + static_cast<size_t>(i) * words_; }
+
+private:
+    struct Layer {
+        std::uint64_t stamp = 0;  // Board::obstacle_stamp() it was built for; 0 = never
+        std::vector<std::uint64_t> bits;
+    };
+    Layer statics_[2];  // [horizontal]
+    std::vector<std::uint64_t> bits_;
+    int words_ = 0;
+};
+
+// Worker pool for compacting the lines of large boards in parallel. Lines
+// are independent once their segments are known, so blocks of lines are
+// compacted on the pool into copies of the lines, then written back and
+// their records appended in line order on the calling thread. The board and
+// MoveResult come out exactly as on the single-threaded path. One move at a
+// time: it is not safe to share a LineWorkers between threads.
+class LineWorkers {
+public:
+    // threads as for ThreadPool; boards of fewer than min_cells cells are
+    // compacted on the calling thread.
+    LineWorkers(int threads, int min_cells);
+    ~LineWorkers();
+
+    int threads() const;
+    int min_cells() const { return min_cells_; }
+
+private:
+    struct Block {
+        MoveResult out;
+        std::vector<TileCode> codes;        // the block's lines, wall-first
+        std::vector<PassiveType> passives;
+    };
+    std::unique_ptr<ThreadPool> pool_;
+    int min_cells_;
+    std::vector<Block> blocks_;
+
+    void compact(Board& board, Direction direction, const FrozenLines& index, MoveResult& out);
+    friend void move_into(Board&, Direction, const CellSet&, const std::vector<SlowMoverState>&,
+                          FrozenLines&, MoveResult&, LineWorkers*);
+};
+
 MoveResult move_left(Board& board,
-                     const std::set<std::pair<int,int>>& frozen,
+                     const CellSet& frozen,
                      const std::vector<SlowMoverState>& slow_movers);
 
 MoveResult move_right(Board& board,
-                      const std::set<std::pair<int,int>>& frozen,
+                      const CellSet& frozen,
                       const std::vector<SlowMoverState>& slow_movers);
 
 MoveResult move_up(Board& board,
-                   const std::set<std::pair<int,int>>& frozen,
+                   const CellSet& frozen,
                    const std::vector<SlowMoverState>& slow_movers);
 
 MoveResult move_down(Board& board,
-                     const std::set<std::pair<int,int>>& frozen,
+                     const CellSet& frozen,
                      const std::vector<SlowMoverState>& slow_movers);
 
+// Move every non-frozen tile toward the given wall. Frozen cells are
+// `frozen`, active slow mover positions and the board's walls and snails.
+// Direction::NONE moves nothing.
+MoveResult move(Board& board, Direction direction,
+                const CellSet& frozen,
+                const std::vector<SlowMoverState>& slow_movers);
+
+// Same, writing into `out`: its vectors are cleared and refilled, keeping
+// their capacity, so a caller that reuses one MoveResult never allocates.
+void move_into(Board& board, Direction direction,
+               const CellSet& frozen,
+               const std::vector<SlowMoverState>& slow_movers,
+               MoveResult& out);
+// Same, indexing the frozen cells into a caller-owned FrozenLines, which
+// keeps its wall/snail layer cached between calls. With `workers`, boards
+// of at least workers->min_cells() cells are compacted in parallel.
+void move_into(Board& board, Direction direction,
+               const CellSet& frozen,
+               const std::vector<SlowMoverState>& slow_movers,
+               FrozenLines& lines, MoveResult& out,
+               LineWorkers* workers = nullptr);
+
+// Read-only: would move() with these arguments change the board?
+bool can_move(const Board& board, Direction direction,
+              const CellSet& frozen,
+              const std::vector<SlowMoverState>& slow_movers);
+bool can_move(const Board& board, Direction direction,
+              const CellSet& frozen,
+              const std::vector<SlowMoverState>& slow_movers,
+              FrozenLines& lines);
+
 } // namespace movement
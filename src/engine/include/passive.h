@@ -20,6 +20,11 @@ inline bool has_passive(PassiveType stored, PassiveType flag) {
     return (static_cast<int>(stored) & static_cast<int>(flag)) != 0;
 }
 
+// Every passive bit; other bits are not passives.
+constexpr int kAllPassives = static_cast<int>(PassiveType::A_LITTLE_SLOW) | static_cast<int>(PassiveType::CONTRARIAN);
+
+inline bool is_valid_passive(int bits) { return (bits & ~kAllPassives) == 0; }
+
 // Merge rule: a merged tile carries the OR of both source tiles' passives.
 inline PassiveType combine_passives(PassiveType a, PassiveType b) {
     return static_cast<PassiveType>(static_cast<int>(a) | static_cast<int>(b));
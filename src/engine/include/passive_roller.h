@@ -8,8 +8,8 @@
 
 #include "board.h"
 #include "movement.h"
+#include "rng_stream.h"
 #include <vector>
-#include <set>
 #include <random>
 
 struct PassiveCandidate {
@@ -22,14 +22,37 @@ public:
     PassiveRoller();
     explicit PassiveRoller(unsigned int seed);
 
+    void reseed(unsigned int seed) { rng_.seed(seed); }
+    // Position of the roll RNG, for snapshots.
+    RngStream::Mark rng_mark() const { return rng_.mark(); }
+    void restore_rng(const RngStream::Mark& mark) { rng_.restore(mark); }
+
     // Roll for passive triggers based on merge results.
     // excluded_positions = merge destinations + spawned tile + slow mover positions
     std::vector<PassiveCandidate> roll(
         const Board& board,
         const std::vector<MergeInfo>& merges,
-        const std::set<std::pair<int,int>>& excluded_positions
+        const CellSet& excluded_positions
     );
 
+    // Same roll, appending into `out` and reusing an internal buffer.
+    void roll(const Board& board,
+              const std::vector<MergeInfo>& merges,
+              const CellSet& excluded_positions,
+              std::vector<PassiveCandidate>& out);
+
+    // Tiles a roll may pick: numbered, passive-free and not excluded, row-major.
+    static void eligible_tiles(const Board& board, const CellSet& excluded,
+                               std::vector<std::pair<int,int>>& out);
+    // Chance that roll() offers a candidate for these merges, given at least
+    // one eligible tile. The candidate is then uniform over eligible_tiles().
+    static double candidate_chance(const std::vector<MergeInfo>& merges);
+
 private:
-    std::mt19937 rng_;
+    // Percent chance one merge offers a candidate (e.g. 2+2=4 -> 0.4%);
+    // 100 or more always does.
+    static double merge_chance(int new_value) { return new_value * 0.1; }
+
+    RngStream rng_;
+    std::vector<std::pair<int,int>> eligible_;  // reused candidate buffer
 };
@@ -6,6 +6,11 @@
 
 #pragma once
 
+#include "board.h"
+#include "cell_set.h"
+#include <cstdint>
+#include <vector>
+
 struct RandomMoverState {
     int row, col;
 };
@@ -14,3 +19,63 @@ struct RandomMoverUpdate {
     int old_row, old_col;
     int new_row, new_col;
 };
+
+// Snails (random movers) in row-major order, the order they step in, plus a
+// grid index from each cell to the snail on it and the set of snail
+// positions. Snails are placed and destroyed by plain board writes (spawns,
+// detonations, set_tile, swaps), so the registry follows the board's SNAIL
+// registry: sync() compares Board::obstacle_stamp() with the stamp it last
+// saw and, only when they differ, rebuilds the list from the board. Steps
+// made through move_to() keep the list and index current, so a turn that
+// only moves snails needs no rebuild, just a re-sort of the few snails.
+class RandomMoverRegistry {
+public:
+    RandomMoverRegistry() = default;
+
+    // Remove every snail and size the index to rows x cols.
+    void reset(int rows, int cols);
+    // Room for one snail per cell of a board of `cells` cells.
+    void reserve(size_t cells) { movers_.reserve(cells); slot_.reserve(cells); }
+    // Resize to rows x cols, moving every snail by (dr, dc) for an
+    // expansion up or left.
+    void resize(int rows, int cols, int dr, int dc);
+
+    // Bring the list in line with the board's snails, in row-major order.
+    void sync(const Board& board);
+    // Record that the list matches `board` (after moving its snails).
+    void mark_synced(const Board& board) { stamp_ = board.obstacle_stamp(); }
+    // Replace the list (a decoded snapshot, already reset to its board
+    // size); the next sync() checks it.
+    void assign(const std::vector<RandomMoverState>& movers);
+
+    int size() const { return static_cast<int>(movers_.size()); }
+    const RandomMoverState& operator[](int i) const { return movers_[i]; }
+    const std::vector<RandomMoverState>& movers() const { return movers_; }
+
+    // Index of the snail on (r, c), or -1.
+    int find(int r, int c) const;
+    // Positions of the snails.
+    const CellSet& positions() const { return positions_; }
+
+    // Step snail i to (r, c). The list is re-sorted at the next sync().
+    void move_to(int i, int r, int c);
+    // Drop snail i (it met a bomb), keeping the others in order.
+    void erase(int i);
+
+private:
+    std::vector<RandomMoverState> movers_;
+    // Slot of the snail per cell (row-major, -1 for none). Left empty until
+    // the first snail arrives, as in SlowMoverRegistry.
+    std::vector<std::int32_t> slot_;
+    CellSet positions_;
+    int rows_ = 0, cols_ = 0;
+    std::uint64_t stamp_ = 0;  // obstacle_stamp() the list matches; 0 = never synced
+    bool sorted_ = true;       // false after a step, until the next sync()
+
+    int cell(int r, int c) const { return r * cols_ + c; }
+    bool in_bounds(int r, int c) const { return r >= 0 && r < rows_ && c >= 0 && c < cols_; }
+    void index(int i);
+    void unindex(int i);
+    void unindex_all();
+    void index_all();
+};
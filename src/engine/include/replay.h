@@ -0,0 +1,116 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "snapshot.h"
+#include "direction.h"
+#include <cstdint>
+#include <initializer_list>
+#include <memory>
+#include <string>
+#include <vector>
+
+class GameEngine;
+
+// Binary replays. The engine is deterministic, so the state it starts from
+// plus every input it receives reproduces a game exactly. A replay is:
+//
+//   "2SQR", then varints (varint.h): format version, checkpoint interval,
+//   and events, each a tag followed by its arguments.
+//
+//   tag 0-4  a move, the tag being int(Direction)
+//   5  place_bomb       row, col
+//   6  place_freeze     row, col
+//   7  clear_freeze     row, col
+//   8  switch_tiles     r1, c1, r2, c2
+//   9  assign_passive   row, col, passive_type
+//   10 expansion        int(Direction)
+//   11 set_tile         row, col, value, passive_type
+//   12 reseed           seed
+//   13 checkpoint       byte length, EngineSnapshot::write() data
+//   14 state            the same; a restore() (the replay opens with one)
+//
+// Arguments are zigzag varints, the seed and lengths plain varints, so a
+// move takes one byte. A checkpoint repeats the state the inputs before it
+// produced and is skipped in playback; a state event is restored. Each RNG
+// in them is a seed and a draw count, plus the generator state once it is
+// more than RngStream::kMaxSkip draws past the seed, so reading one never
+// replays more draws than that.
+class ReplayWriter {
+public:
+    // Opens the replay with `start`. interval > 0 adds a checkpoint before
+    // every interval-th move.
+    ReplayWriter(int checkpoint_interval, const EngineSnapshot& start);
+
+    const std::string& data() const { return data_; }
+    int turns() const { return turns_; }
+    // A checkpoint belongs before the next move.
+    bool checkpoint_due() const {
+        return interval_ > 0 && turns_ % interval_ == 0 && last_state_turn_ != turns_;
+    }
+
+    void move(Direction direction);
+    void place_bomb(int row, int col);
+    void place_freeze(int row, int col);
+    void clear_freeze(int row, int col);
+    void switch_tiles(int r1, int c1, int r2, int c2);
+    void assign_passive(int row, int col, int passive_type);
+    void expansion(Direction direction);
+    void set_tile(int row, int col, int value, int passive_type);
+    void reseed(unsigned int seed);
+    void checkpoint(const EngineSnapshot& state);
+    void state(const EngineSnapshot& state);
+
+private:
+    std::string data_;
+    int interval_;
+    int turns_ = 0;
+    int last_state_turn_ = 0;  // turn of the latest checkpoint or state event
+
+    void event(std::uint8_t tag, std::initializer_list<int> args);
+    void put_state(std::uint8_t tag, const EngineSnapshot& state);
+};
+
+// A loaded replay: the events are indexed once, at load, and decoded again
+// as they are played. Seeking restores the last checkpoint (or state event)
+// at or before the turn and plays the inputs from there on.
+class Replay {
+public:
+    static constexpr int kDefaultInterval = 1000;
+
+    // Throws std::invalid_argument if `data` is not a well-formed replay.
+    explicit Replay(std::string data);
+
+    const std::string& data() const { return data_; }
+    int turns() const { return turns_; }                   // moves recorded
+    int checkpoints() const { return static_cast<int>(checkpoints_.size()); }  // opening state included
+    int checkpoint_interval() const { return interval_; }
+
+    // Put `engine` in the state after `turn` moves and the inputs that
+    // followed the last of them (passive choices, expansion, abilities), up
+    // to the next move. turn = turns() plays the whole replay.
+    void seek(GameEngine& engine, int turn) const;
+    // A new engine, as seek() leaves one.
+    std::unique_ptr<GameEngine> engine_at(int turn) const;
+
+private:
+    struct Checkpoint {
+        int turn;
+        size_t state;  // offset of the EngineSnapshot data
+        size_t next;   // offset of the following event
+    };
+    std::string data_;
+    int interval_ = 0;
+    int turns_ = 0;
+    std::vector<Checkpoint> checkpoints_;
+
+    // Last checkpoint at or before `turn`; throws std::out_of_range past the ends.
+    const Checkpoint& start_for(int turn) const;
+    Snapshot state_at(const Checkpoint& c) const;
+    // Apply the events from offset `from` (at turn `at`) up to `turn`.
+    void play(GameEngine& engine, size_t from, int at, int turn) const;
+};
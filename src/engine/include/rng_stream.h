@@ -0,0 +1,97 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "mersenne_twister.h"
+#include <cstdint>
+#include <memory>
+#include <vector>
+
+// MT19937 (MersenneTwister, the same draws as std::mt19937) that counts its
+// draws, so its position can be saved without copying its 2.5 KB of state
+// every time: a Mark is a shared copy of an earlier state plus the number of
+// draws since. Marks taken up to kMaxSkip draws apart share one copy;
+// restoring replays at most that many draws.
+//
+// A mark also carries the seed and the draws made since seeding, which
+// identify the position on their own: at() rebuilds it from just those two
+// numbers by replaying the draws. Replay checkpoints store that for streams
+// close to their seed and the generator state (words()) for the rest.
+class RngStream {
+public:
+    using result_type = MersenneTwister::result_type;
+    static constexpr std::uint64_t kMaxSkip = 1024;
+
+    struct Mark {
+        std::shared_ptr<const MersenneTwister> base;
+        std::uint64_t skip = 0;   // draws made since `base`
+        result_type seed = 0;
+        std::uint64_t drawn = 0;  // draws made since seeding
+    };
+
+    explicit RngStream(result_type seed = MersenneTwister::default_seed) : rng_(seed), seed_(seed) {}
+
+    static constexpr result_type min() { return MersenneTwister::min(); }
+    static constexpr result_type max() { return MersenneTwister::max(); }
+    result_type operator()() {
+        drawn_++;
+        return rng_();
+    }
+
+    void seed(result_type seed) {
+        rng_.seed(seed);
+        seed_ = seed;
+        drawn_ = 0;
+        base_.reset();
+    }
+
+    // The current position. Only refreshes the shared copy when the last
+    // one is more than kMaxSkip draws behind (or the stream was reseeded).
+    Mark mark() const {
+        if (!base_ || drawn_ - base_drawn_ > kMaxSkip) {
+            base_ = std::make_shared<const MersenneTwister>(rng_);
+            base_drawn_ = drawn_;
+        }
+        return {base_, drawn_ - base_drawn_, seed_, drawn_};
+    }
+    void restore(const Mark& mark) {
+        rng_ = *mark.base;
+        rng_.discard(mark.skip);
+        seed_ = mark.seed;
+        drawn_ = mark.drawn;
+        base_ = mark.base;
+        base_drawn_ = mark.drawn - mark.skip;
+    }
+    // The mark `drawn` draws after seeding with `seed`. Replays every draw.
+    static Mark at(result_type seed, std::uint64_t drawn) {
+        auto rng = std::make_shared<MersenneTwister>(seed);
+        rng->discard(drawn);
+        return {std::move(rng), 0, seed, drawn};
+    }
+
+    // The generator state at `mark` (MersenneTwister::state()).
+    static std::vector<std::uint32_t> words(const Mark& mark) {
+        MersenneTwister rng = *mark.base;
+        rng.discard(mark.skip);
+        return rng.state();
+    }
+    // The mark words() was taken from, without replaying any draws. Throws
+    // std::invalid_argument if `state` is not a generator state.
+    static Mark from_words(const std::vector<std::uint32_t>& state, result_type seed, std::uint64_t drawn) {
+        auto rng = std::make_shared<MersenneTwister>();
+        rng->set_state(state);
+        return {std::move(rng), 0, seed, drawn};
+    }
+
+private:
+    MersenneTwister rng_;
+    result_type seed_;
+    std::uint64_t drawn_ = 0;
+    // Latest mark base and the draw count it was taken at.
+    mutable std::shared_ptr<const MersenneTwister> base_;
+    mutable std::uint64_t base_drawn_ = 0;
+};
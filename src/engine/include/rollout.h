@@ -0,0 +1,71 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "engine_batch.h"
+#include "thread_pool.h"
+#include <array>
+#include <cstdint>
+#include <mutex>
+#include <vector>
+
+// How a rollout picks moves after its first one. All three only choose among
+// the engine's legal_moves().
+enum class RolloutPolicy : std::uint8_t {
+    RANDOM = 0,        // uniform over the legal directions
+    GREEDY_MERGE = 1,  // the axis whose merges score the most, else random
+    CORNER = 2,        // first legal of DOWN, LEFT, RIGHT, UP
+};
+
+struct RolloutOptions {
+    RolloutPolicy policy = RolloutPolicy::RANDOM;
+    int rollouts = 100;      // per first move
+    int max_turns = 500;     // valid turns per rollout, first move included; 0 = no cap
+    unsigned int seed = 0;
+    BatchOptions game;       // passive candidates and expansions, as in EngineBatch
+};
+
+// Outcome of the rollouts that started with one direction.
+struct RolloutStats {
+    bool valid = false;      // the direction is a valid turn from the root
+    int rollouts = 0;
+    double mean_score = 0;
+    double mean_turns = 0;   // valid turns played, first move included
+    double mean_max_tile = 0;
+    int max_tile = 0;        // largest tile any rollout reached
+};
+
+// Monte Carlo move evaluation: plays `rollouts` games from the root for each
+// first direction, spread over a thread pool. Rollout k of direction d plays
+// on a copy of the root reseeded from (seed, d, k), so the statistics depend
+// only on the root and the options, never on the thread count or schedule.
+class RolloutExecutor {
+public:
+    // threads as for ThreadPool: 0 means one per hardware thread.
+    explicit RolloutExecutor(int threads = 0);
+
+    int threads() const { return pool_.threads(); }
+
+    // Statistics indexed by int(Direction). The root is only read (copied),
+    // and must not be used by another thread during the call. Concurrent
+    // calls are serialized.
+    std::array<RolloutStats, 4> run(const GameEngine& root, const RolloutOptions& options);
+
+private:
+    struct Outcome {
+        bool valid;
+        int score, turns, max_tile;
+    };
+
+    ThreadPool pool_;
+    std::mutex run_mutex_;             // one run at a time
+    std::vector<TurnResult> scratch_;  // one per pool thread
+    std::vector<Outcome> outcomes_;    // [direction * rollouts + k]
+
+    Outcome rollout(const GameEngine& root, Direction first, int k,
+                    const RolloutOptions& options, TurnResult& result) const;
+};
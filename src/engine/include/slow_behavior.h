@@ -7,15 +7,21 @@
 #pragma once
 
 #include "tile_behavior.h"
-#include <set>
+#include "cell_set.h"
+#include <vector>
 #include <utility>
 
 // Handles the A_LITTLE_SLOW passive (pure only — not combined with CONTRARIAN).
 // Tiles move 1 step per turn in the player's direction, with behind-merge support.
 class SlowBehavior : public TileBehavior {
-    std::set<std::pair<int,int>> positions_;
+    CellSet positions_;
+    std::vector<std::pair<int,int>> order_;  // reused advance-order buffer
 
 public:
+    std::unique_ptr<TileBehavior> clone() const override {
+        return std::make_unique<SlowBehavior>(*this);
+    }
+
     // Pure A_LITTLE_SLOW only — combined with CONTRARIAN is owned by ContrarianBehavior.
     bool matches(PassiveType p) const override {
         return has_passive(p, PassiveType::A_LITTLE_SLOW)
@@ -28,4 +34,5 @@ public:
 
     void pre_snapshot(const Board& board, int dr, int dc) override;
     bool advance(MoveContext& ctx, TurnResult& result) override;
+    bool can_advance(const AdvanceQuery& q) const override;
 };
@@ -7,6 +7,9 @@
 #pragma once
 
 #include "passive.h"
+#include "cell_set.h"
+#include <cstdint>
+#include <vector>
 
 struct SlowMoverState {
     int current_row, current_col;
@@ -24,3 +27,64 @@ struct SlowMoverUpdate {
     bool finished;
     bool is_merge = false;
 };
+
+// Slow movers in the order they were created, plus a grid index from each
+// cell to the active mover on it and the set of active positions. Every
+// change of position or activity goes through the registry, so lookups by
+// cell are O(1) and the active set never has to be rebuilt. A cell holds one
+// tile, so it holds at most one active mover: adding a mover on a cell that
+// still has one replaces the old (stale) mover.
+class SlowMoverRegistry {
+public:
+    SlowMoverRegistry() = default;
+    SlowMoverRegistry(int rows, int cols) { reset(rows, cols); }
+
+    // Remove every mover and size the index to rows x cols.
+    void reset(int rows, int cols);
+    // Room for one mover per cell of a board of `cells` cells, so neither
+    // the list nor the index grows during a turn.
+    void reserve(size_t cells) { movers_.reserve(cells); slot_.reserve(cells); }
+    // Resize to rows x cols, moving every mover (and its destination) by
+    // (dr, dc): an expansion up or left shifts coordinates by one.
+    void resize(int rows, int cols, int dr, int dc);
+
+    int size() const { return static_cast<int>(movers_.size()); }
+    bool empty() const { return movers_.empty(); }
+    const SlowMoverState& operator[](int i) const { return movers_[i]; }
+    std::vector<SlowMoverState>::const_iterator begin() const { return movers_.begin(); }
+    std::vector<SlowMoverState>::const_iterator end() const { return movers_.end(); }
+    const std::vector<SlowMoverState>& movers() const { return movers_; }
+
+    // Index of the active mover on (r, c), or -1.
+    int find(int r, int c) const;
+    // Positions of the active movers.
+    const CellSet& active() const { return active_; }
+
+    void add(const SlowMoverState& sm);
+    // Step mover i to (r, c).
+    void move_to(int i, int r, int c);
+    // Carry a new tile (after a merge into the mover).
+    void set_tile(int i, int value, PassiveType passive);
+    // Deactivate mover i; it stays listed until remove_finished().
+    void finish(int i);
+    // Drop the mover on (r, c), if any (its tile was swapped or destroyed).
+    void erase_at(int r, int c);
+    // Drop every inactive mover, keeping the others in order.
+    void remove_finished();
+
+private:
+    std::vector<SlowMoverState> movers_;
+    // Slot of the active mover per cell (row-major, -1 for none). Left empty
+    // until the first mover arrives, so copying a registry that never had a
+    // mover allocates nothing (reserved capacity is not copied).
+    std::vector<std::int32_t> slot_;
+    CellSet active_;
+    int rows_ = 0, cols_ = 0;
+
+    int cell(int r, int c) const { return r * cols_ + c; }
+    bool in_bounds(int r, int c) const { return r >= 0 && r < rows_ && c >= 0 && c < cols_; }
+    void index(int i);
+    void unindex(int i);
+    void relink(int i);   // point mover i's cell at slot i after a shift
+    void reindex();
+};
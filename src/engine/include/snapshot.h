@@ -0,0 +1,63 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "cell_set.h"
+#include "rng_stream.h"
+#include "slow_mover.h"
+#include "random_mover.h"
+#include "tile.h"
+#include "varint.h"
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <utility>
+#include <vector>
+
+// The whole state of a GameEngine at one moment, as taken by
+// GameEngine::snapshot(): board tiles and passives, user-frozen tiles, slow
+// and random movers, score, expansion target and count, the snail respawn
+// timer and the positions of all three RNGs. Immutable once taken, so one
+// snapshot can be restored any number of times, into any engine; Snapshot,
+// the handle GameEngine::snapshot() returns, shares it.
+//
+// Snapshots are cheap to keep in numbers: each board row is stored once and
+// shared with the engine's previous snapshot while its contents are
+// unchanged, and the RNGs are kept as RngStream marks, which share one copy
+// of the generator state across many turns.
+class EngineSnapshot;
+using Snapshot = std::shared_ptr<const EngineSnapshot>;
+
+class EngineSnapshot {
+public:
+    int rows() const { return rows_; }
+    int cols() const { return cols_; }
+    int score() const { return score_; }
+
+    // Varint encoding (varint.h), as embedded in replays. Each RNG is
+    // written as its seed and draw count, plus its generator state once it
+    // is more than RngStream::kMaxSkip draws past the seed.
+    void write(std::string& out) const;
+    // Throws std::invalid_argument on malformed data.
+    static Snapshot read(varint::Reader& in);
+
+private:
+    friend class GameEngine;
+    // One board row: (code, passive bits) per column.
+    using Row = std::vector<std::pair<TileCode, std::uint8_t>>;
+
+    int rows_ = 0, cols_ = 0;
+    std::vector<std::shared_ptr<const Row>> board_rows_;
+    CellSet frozen_tiles_;
+    SlowMoverRegistry slow_movers_;
+    RandomMoverRegistry random_movers_;
+    int score_ = 0;
+    int tar_expand_ = 0;
+    int expand_count_ = 0;
+    int snail_respawn_timer_ = 0;
+    RngStream::Mark board_rng_, roller_rng_, engine_rng_;
+};
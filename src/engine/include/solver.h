@@ -0,0 +1,124 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "engine_batch.h"
+#include "thread_pool.h"
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <memory>
+#include <mutex>
+#include <vector>
+
+struct SolveOptions {
+    int depth = 3;                  // player moves to look ahead; the limit when deepening
+    double time_budget = 0;         // seconds; > 0 deepens from 1 until the budget runs out
+    double min_probability = 1e-4;  // positions less likely than this are not searched further
+    BatchOptions game;              // passive candidates and expansions, as in EngineBatch
+};
+
+struct SolveResult {
+    Direction best = Direction::NONE;
+    // Expected points gained within the searched depth, per first move
+    // (indexed by int(Direction)); -infinity for an invalid move.
+    std::array<double, 4> values {};
+    int depth = 0;                  // deepest search that completed
+    std::uint64_t nodes = 0;        // turns simulated
+};
+
+// Expectimax search over the real engine: every node is a GameEngine copy
+// and every move is played by process_move_into, so specials (bombs, walls,
+// snails, frozen tiles, slow and contrarian tiles) follow the game's rules.
+//
+// After a valid move, a chance node branches on the turn's random events:
+// the spawn cell (uniform over the empty cells, as Board::spawn_number
+// draws), the passive candidate when the passive policy would assign one
+// (PassiveRoller::candidate_chance, uniform over its eligible tiles), and a
+// random expansion direction. Other randomness — snail steps, snail
+// respawns, wall placement — is taken from the copied engine's RNGs.
+//
+// Values are cached in a fixed-size transposition table keyed by
+// state_hash(). The children of the four root moves are searched in
+// parallel on a thread pool.
+class Solver {
+public:
+    // threads as for ThreadPool. The table has 2^table_bits entries of 16 bytes.
+    explicit Solver(int threads = 0, int table_bits = 20);
+
+    int threads() const { return pool_.threads(); }
+
+    // The root is only read (copied), and must not be used by another thread
+    // during the call. Concurrent calls are serialized. With a time budget, the result is that of the deepest
+    // search finished in time (depth 1 always finishes).
+    SolveResult solve(const GameEngine& root, const SolveOptions& options);
+
+private:
+    // One combination of a turn's random events.
+    struct Outcome {
+        double probability;
+        int spawn_row, spawn_col;      // -1 when the board was full
+        int passive_row, passive_col;  // -1 when no candidate is assigned
+        PassiveType passive;
+        Direction expansion;           // NONE when the board does not expand
+    };
+    // Scratch for one level of the search.
+    struct Ply {
+        TurnResult result;
+        std::vector<Outcome> outcomes;
+        std::vector<std::pair<int,int>> spawns;  // possible spawn cells
+        std::vector<std::pair<int,int>> tiles;   // possible passive candidates
+        CellSet excluded;
+    };
+    struct Worker {
+        std::vector<Ply> plies;
+        std::uint64_t nodes = 0;
+    };
+    // A move from the root, played once per solve.
+    struct RootMove {
+        Direction direction;
+        std::unique_ptr<GameEngine> after;
+        int points;
+        Ply ply;
+    };
+    // Lockless entry: `check` is key ^ data, so a torn read fails the check.
+    struct Entry {
+        std::atomic<std::uint64_t> check {0};
+        std::atomic<std::uint64_t> data {0};
+    };
+
+    ThreadPool pool_;
+    std::mutex solve_mutex_;  // one solve at a time
+    std::vector<Worker> workers_;
+    std::unique_ptr<Entry[]> table_;
+    std::uint64_t table_mask_;
+    std::uint32_t generation_ = 0;  // entries from earlier solves never match
+
+    // Per-solve settings read by every worker.
+    const SolveOptions* options_ = nullptr;
+    std::chrono::steady_clock::time_point deadline_;
+    bool timed_ = false;
+    std::atomic<bool> stop_ {false};
+
+    bool out_of_time();
+    bool probe(std::uint64_t key, int depth, double& value) const;
+    void store(std::uint64_t key, int depth, double value);
+
+    // Play `direction` on `after` (a copy of the position) and, with
+    // list_outcomes, list the outcomes of its random events into ply.
+    // Returns false for an invalid turn.
+    bool play_chance(GameEngine& after, Direction direction, bool list_outcomes,
+                     Ply& ply, Worker& w) const;
+    // Turn `after` into the position of one outcome.
+    void apply(GameEngine& after, const TurnResult& result, const Outcome& o) const;
+    // Best expected gain over `depth` moves from `engine`, reached with
+    // probability `reach`. Uses plies [ply, ply + depth).
+    double max_node(const GameEngine& engine, int depth, double reach, int ply, Worker& w);
+    // Expected gain of the outcomes listed in plies[ply], after the move.
+    double chance_node(const GameEngine& after, int depth, double reach, int ply, Worker& w);
+};
@@ -0,0 +1,53 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "function_ref.h"
+#include <atomic>
+#include <condition_variable>
+#include <cstdint>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+// Fixed set of worker threads for splitting independent work items across
+// cores. parallel_for() hands items out one at a time from a shared counter,
+// so uneven items (games of different lengths) balance themselves. The
+// calling thread works too and the call returns when every item is done.
+class ThreadPool {
+public:
+    // threads = total threads working a parallel_for, including the caller;
+    // 0 means one per hardware thread.
+    explicit ThreadPool(int threads = 0);
+    ~ThreadPool();
+    ThreadPool(const ThreadPool&) = delete;
+    ThreadPool& operator=(const ThreadPool&) = delete;
+
+    int threads() const { return static_cast<int>(workers_.size()) + 1; }
+
+    // Call f(worker, item) for item = 0 .. items-1. worker is in
+    // [0, threads()) and no two concurrent calls share one, so it can index
+    // per-thread scratch. Calls from several threads are serialized.
+    void parallel_for(int items, FunctionRef<void(int, int)> f);
+
+private:
+    std::vector<std::thread> workers_;
+    std::mutex run_mutex_;            // one parallel_for at a time
+
+    std::mutex mutex_;
+    std::condition_variable wake_;    // workers wait here for a job
+    std::condition_variable idle_;    // the caller waits here for workers
+    FunctionRef<void(int, int)>* job_ = nullptr;
+    int items_ = 0;
+    std::atomic<int> next_ {0};
+    int busy_ = 0;                    // workers still inside the current job
+    std::uint64_t epoch_ = 0;         // bumped per job so workers run each once
+    bool stop_ = false;
+
+    void work(int worker, FunctionRef<void(int, int)>& f);
+    void worker_loop(int worker);
+};
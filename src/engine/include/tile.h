@@ -7,7 +7,40 @@
 #pragma once
 
 #include "passive.h"
+#include <cstdint>
 
+// Packed cell encoding used by Board storage: one byte per cell.
+//   0                 empty
+//   1..MAX_EXPONENT   numbered tile with value 2^code
+//   WALL/SNAIL/BOMB   special tiles (sentinels at the top of the byte range)
+// Passives live in a separate per-cell bit-plane, not in the code.
+using TileCode = std::uint8_t;
+
+namespace tile_code {
+
+constexpr TileCode EMPTY = 0;
+constexpr TileCode MAX_EXPONENT = 30;  // 2^30 is the largest value an int tile can hold
+constexpr TileCode WALL  = 0xFD;
+constexpr TileCode SNAIL = 0xFE;
+constexpr TileCode BOMB  = 0xFF;
+
+inline bool is_numbered(TileCode code) { return code != EMPTY && code <= MAX_EXPONENT; }
+// Empty, numbered or one of the sentinels (decoded data is checked with this).
+inline bool is_valid(TileCode code) { return code <= MAX_EXPONENT || code >= WALL; }
+
+inline int decode(TileCode code) {
+    if (code <= MAX_EXPONENT) return code == EMPTY ? 0 : 1 << code;
+    if (code == BOMB)  return -1;
+    if (code == SNAIL) return -2;
+    return -3;
+}
+
+// Throws std::invalid_argument for values that are not 0, -1, -2, -3 or a power of two.
+TileCode encode(int value);
+
+} // namespace tile_code
+
+// Decoded view of one cell, as handed out by Board::at().
 struct Tile {
     int value = 0;
     PassiveType passive = PassiveType::NONE;
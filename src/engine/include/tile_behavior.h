@@ -10,31 +10,48 @@
 #include "slow_mover.h"
 #include "passive.h"
 #include "turn_result.h"
-#include <set>
+#include "cell_set.h"
+#include "function_ref.h"
 #include <vector>
-#include <functional>
+#include <memory>
 
 // Context passed to TileBehavior::advance() — bundles all mutable engine state
 // that behaviors need to read or write during their advance phase.
 struct MoveContext {
     Board& board;
-    std::vector<SlowMoverState>& slow_movers;
-    std::set<std::pair<int,int>>& frozen_tiles;
-    std::set<std::pair<int,int>>& effective_frozen;
-    const std::set<std::pair<int,int>>& active_sm_positions;
+    SlowMoverRegistry& slow_movers;
+    CellSet& frozen_tiles;
+    CellSet& effective_frozen;
+    const CellSet& active_sm_positions;
     int dr, dc;  // player movement direction
 
     // Slide regular tiles into a cell vacated by a special tile.
-    std::function<void(int, int, std::vector<MoveInfo>&)> cascade_fill;
+    FunctionRef<void(int, int, std::vector<MoveInfo>&)> cascade_fill;
+};
+
+// Read-only engine state passed to TileBehavior::can_advance().
+struct AdvanceQuery {
+    const Board& board;
+    const std::vector<SlowMoverState>& slow_movers;
+    const CellSet& frozen_tiles;
+    const CellSet& active_sm_positions;
+    int dr, dc;  // player movement direction
 };
 
 // Abstract interface for a tile passive behavior.
 // To add a new passive: implement this, register in GameEngine's constructor.
 // That's the only place that needs to change.
+//
+// The engine never calls matches() or the flag queries per tile: on
+// registration it resolves them once for every passive bitmask into a
+// PassiveOwner table (see GameEngine::register_behavior).
 class TileBehavior {
 public:
     virtual ~TileBehavior() = default;
 
+    // Independent copy of this behavior, for GameEngine's copy constructor.
+    virtual std::unique_ptr<TileBehavior> clone() const = 0;
+
     // Returns true if a tile with this passive is owned by this behavior.
     // Used for freeze-building, cascade blocking, and bomb detection.
     virtual bool matches(PassiveType p) const = 0;
@@ -53,6 +70,11 @@ public:
     // Returns true if any board change occurred.
     virtual bool advance(MoveContext& ctx, TurnResult& result) = 0;
 
+    // Read-only: would advance() change the board if regular movement left it
+    // exactly as it is now? Used by GameEngine::legal_moves(). The default
+    // answer, true, is always safe; it only makes the legal mask less precise.
+    virtual bool can_advance(const AdvanceQuery& q) const { return true; }
+
     // Should cascade_fill_behind() stop at tiles owned by this behavior?
     virtual bool blocks_cascade() const { return true; }
 
@@ -60,3 +82,21 @@ public:
     // p is the full passive bitmask of the destroyed tile (may be combined).
     virtual bool requires_slow_mover_cleanup(PassiveType p) const { return false; }
 };
+
+// Per-bitmask answers the engine needs, precomputed from the registered
+// behaviors in registration order.
+struct PassiveOwner {
+    // Index in registration order of the first behavior whose matches()
+    // accepts the mask (bomb targeting), or -1. An index rather than a
+    // pointer, so a copied engine can take the table as it is.
+    int owner = -1;
+    bool owned() const { return owner >= 0; }
+    // Some matching behavior freezes the tile during regular movement; the
+    // first such behavior decides freeze_tile_behind.
+    bool freeze_during_move = false;
+    bool freeze_tile_behind = false;
+    // Some matching behavior stops cascade_fill_behind at the tile.
+    bool blocks_cascade = false;
+    // The owner's requires_slow_mover_cleanup(mask).
+    bool requires_slow_mover_cleanup = false;
+};
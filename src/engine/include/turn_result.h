@@ -10,24 +10,60 @@
 #include "passive_roller.h"
 #include "slow_mover.h"
 #include "random_mover.h"
+#include "direction.h"
 #include <vector>
-#include <set>
+#include "cell_set.h"
 #include <string>
+#include <cstdint>
 
 struct TurnResult {
     std::vector<MoveInfo> moves;
     std::vector<MergeInfo> merges;
-    std::set<std::pair<int,int>> bomb_destroyed;
-    std::set<std::pair<int,int>> snail_bomb_kills;
+    CellSet bomb_destroyed;    // sized to the board by process_move
+    CellSet snail_bomb_kills;
+    CellSet spawn_excluded;    // empty cells the spawn could not pick (bombs cleared in movement)
     int points_gained = 0;
     std::pair<int,int> spawned_tile = {-1, -1};
     std::pair<int,int> spawned_snail = {-1, -1};
     bool board_changed = false;
     bool should_expand = false;
-    std::string expand_direction;
+    Direction expand_direction = Direction::NONE;
     std::vector<PassiveCandidate> passive_candidates;
     std::vector<SlowMoverUpdate> slow_mover_updates;
     std::vector<RandomMoverUpdate> random_mover_updates;
     std::vector<MoveInfo> slow_tile_moves;
     std::vector<MergeInfo> slow_tile_merges;
+    // Bumped by every clear(), so converted copies of the fields (the Python
+    // bindings cache them) can tell a refilled result from the one they saw.
+    std::uint64_t generation = 0;
+
+    // Reset every field for a new turn on a rows x cols board. Vectors and
+    // sets keep their capacity (and are reserved to a board's worth of
+    // entries), so a reused TurnResult stops allocating.
+    void clear(int rows, int cols) {
+        const size_t cells = static_cast<size_t>(rows) * cols;
+        generation++;
+        moves.reserve(cells);
+        merges.reserve(cells);
+        slow_mover_updates.reserve(cells);
+        random_mover_updates.reserve(cells);
+        slow_tile_moves.reserve(cells);
+        slow_tile_merges.reserve(cells);
+        moves.clear();
+        merges.clear();
+        bomb_destroyed.reset(rows, cols);
+        snail_bomb_kills.reset(rows, cols);
+        spawn_excluded.reset(rows, cols);
+        points_gained = 0;
+        spawned_tile = {-1, -1};
+        spawned_snail = {-1, -1};
+        board_changed = false;
+        should_expand = false;
+        expand_direction = Direction::NONE;
+        passive_candidates.clear();
+        slow_mover_updates.clear();
+        random_mover_updates.clear();
+        slow_tile_moves.clear();
+        slow_tile_merges.clear();
+    }
 };
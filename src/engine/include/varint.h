@@ -0,0 +1,70 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include <cstdint>
+#include <stdexcept>
+#include <string>
+
+// LEB128 varints: 7 bits per byte, low bits first, the high bit set on every
+// byte but the last. Signed values are zigzag-encoded first, so small
+// negative numbers stay one byte too. Byte buffers are std::string.
+namespace varint {
+
+inline void put(std::string& out, std::uint64_t v) {
+    while (v >= 0x80) {
+        out.push_back(static_cast<char>(v | 0x80));
+        v >>= 7;
+    }
+    out.push_back(static_cast<char>(v));
+}
+
+inline void put_signed(std::string& out, std::int64_t v) {
+    put(out, (static_cast<std::uint64_t>(v) << 1) ^ static_cast<std::uint64_t>(v >> 63));
+}
+
+// Reads a buffer front to back. Running past the end or a varint longer
+// than 64 bits throws std::invalid_argument.
+class Reader {
+public:
+    Reader(const std::string& data, size_t offset = 0) : data_(data), pos_(offset) {}
+
+    bool done() const { return pos_ >= data_.size(); }
+    size_t offset() const { return pos_; }
+
+    std::uint8_t byte() {
+        if (done()) throw std::invalid_argument("data ends early");
+        return static_cast<std::uint8_t>(data_[pos_++]);
+    }
+    std::uint8_t peek() const {
+        if (done()) throw std::invalid_argument("data ends early");
+        return static_cast<std::uint8_t>(data_[pos_]);
+    }
+    std::uint64_t get() {
+        std::uint64_t v = 0;
+        for (int shift = 0; shift < 64; shift += 7) {
+            std::uint8_t b = byte();
+            v |= static_cast<std::uint64_t>(b & 0x7F) << shift;
+            if (!(b & 0x80)) return v;
+        }
+        throw std::invalid_argument("malformed varint");
+    }
+    std::int64_t get_signed() {
+        std::uint64_t v = get();
+        return static_cast<std::int64_t>(v >> 1) ^ -static_cast<std::int64_t>(v & 1);
+    }
+    void skip(size_t n) {
+        if (n > data_.size() - pos_) throw std::invalid_argument("data ends early");
+        pos_ += n;
+    }
+
+private:
+    const std::string& data_;
+    size_t pos_;
+};
+
+} // namespace varint
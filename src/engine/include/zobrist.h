@@ -0,0 +1,48 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#pragma once
+
+#include "tile.h"
+#include <cstdint>
+
+// Zobrist-style hashing of engine state. Keys are derived on the fly from a
+// 64-bit mixer instead of random tables, so they exist for any board size and
+// are identical across runs and platforms. A state hash is the XOR of the keys
+// of its parts, which lets Board update its hash with two keys per tile write.
+namespace zobrist {
+
+// splitmix64 finalizer.
+inline std::uint64_t mix(std::uint64_t x) {
+    x += 0x9E3779B97F4A7C15ull;
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9ull;
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EBull;
+    return x ^ (x >> 31);
+}
+
+// Small signed ints packed into 16-bit fields of a key.
+inline std::uint64_t field(int v, int shift) {
+    return static_cast<std::uint64_t>(static_cast<std::uint16_t>(v)) << shift;
+}
+
+// Key of one cell's contents. An empty cell with no passive bits is 0, so
+// only occupied cells contribute to a board hash.
+inline std::uint64_t cell_key(int r, int c, TileCode code, std::uint8_t passive) {
+    if (code == tile_code::EMPTY && passive == 0) return 0;
+    return mix(field(r, 48) | field(c, 32) | (std::uint64_t(code) << 8) | passive);
+}
+
+// Keys for the parts of engine state that are not tile contents. Each kind
+// has its own tag in the top bits so they never collide with cell keys.
+enum class Part : std::uint64_t {
+    DIMENSIONS = 1, FROZEN = 2, SLOW_MOVER = 3, COUNTERS = 4,
+};
+
+inline std::uint64_t part_key(Part part, std::uint64_t payload) {
+    return mix(mix(payload) ^ (static_cast<std::uint64_t>(part) << 60));
+}
+
+} // namespace zobrist
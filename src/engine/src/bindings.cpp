@@ -6,8 +6,13 @@
 
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
+#include <optional>
 
 #include "game_engine.h"
+#include "engine_batch.h"
+#include "rollout.h"
+#include "solver.h"
 #include "passive.h"
 #include "slow_mover.h"
 #include "random_mover.h"
@@ -16,6 +21,96 @@
 
 namespace py = pybind11;
 
+namespace {
+
+// Cell sets cross into Python as sets of (row, col) tuples, as before.
+py::set to_py_set(const CellSet& cells) {
+    py::set out;
+    cells.for_each([&](int r, int c) { out.add(py::make_tuple(r, c)); });
+    return out;
+}
+
+// Read-only (rows, cols) array straight onto a board plane. The capsule holds
+// a reference to the plane, so the array stays safe to read after expansion;
+// it is stale, though (see Board::value_plane()).
+template <typename T>
+py::array_t<T> plane_view(const Board& board, std::shared_ptr<const std::vector<T>> plane) {
+    auto* holder = new std::shared_ptr<const std::vector<T>>(std::move(plane));
+    py::capsule owner(holder, [](void* p) {
+        delete static_cast<std::shared_ptr<const std::vector<T>>*>(p);
+    });
+    const T* origin = (*holder)->data() + board.offset();
+    py::array_t<T> view({board.rows(), board.cols()},
+                        {static_cast<py::ssize_t>(board.stride() * sizeof(T)),
+                         static_cast<py::ssize_t>(sizeof(T))},
+                        origin, owner);
+    view.attr("setflags")(py::arg("write") = false);
+    return view;
+}
+
+// TurnResult field conversions are cached in the instance __dict__, tagged
+// with the result's generation: reading a field twice returns the same
+// object, and a result refilled by process_move_into converts afresh.
+template <typename F>
+py::object cached(py::object self, const char* key, F convert) {
+    const TurnResult& r = self.cast<const TurnResult&>();
+    py::dict cache = self.attr("__dict__");
+    if (cache.contains(key)) {
+        py::tuple entry = cache[key];
+        if (entry[0].cast<std::uint64_t>() == r.generation) return entry[1];
+    }
+    py::object value = convert(r);
+    cache[key] = py::make_tuple(r.generation, value);
+    return value;
+}
+
+// Read-only (n, K) int32 array. for_each_row(emit) calls emit({...}) once per
+// row, with exactly K fields.
+template <size_t K, typename F>
+py::array_t<std::int32_t> rows_array(size_t n, F for_each_row) {
+    py::array_t<std::int32_t> out({static_cast<py::ssize_t>(n), static_cast<py::ssize_t>(K)});
+    std::int32_t* row = out.mutable_data();
+    for_each_row([&](std::initializer_list<std::int32_t> fields) {
+        std::copy(fields.begin(), fields.end(), row);
+        row += K;
+    });
+    out.attr("setflags")(py::arg("write") = false);
+    return out;
+}
+
+py::array_t<std::int32_t> moves_array(const std::vector<MoveInfo>& moves) {
+    return rows_array<5>(moves.size(), [&](auto emit) {
+        for (const auto& m : moves) emit({m.start_row, m.start_col, m.end_row, m.end_col, m.value});
+    });
+}
+
+py::array_t<std::int32_t> merges_array(const std::vector<MergeInfo>& merges) {
+    return rows_array<3>(merges.size(), [&](auto emit) {
+        for (const auto& m : merges) emit({m.row, m.col, m.new_value});
+    });
+}
+
+py::array_t<std::int32_t> cells_array(const CellSet& cells) {
+    return rows_array<2>(cells.size(), [&](auto emit) {
+        cells.for_each([&](int r, int c) { emit({r, c}); });
+    });
+}
+
+// (n, rows, cols) int32 copy of every board in a batch, padded to the
+// largest one. The copy runs with the GIL released.
+py::array_t<std::int32_t> boards_array(const EngineBatch& batch) {
+    const int rows = batch.max_rows(), cols = batch.max_cols();
+    py::array_t<std::int32_t> out({batch.size(), rows, cols});
+    std::int32_t* data = out.mutable_data();
+    {
+        py::gil_scoped_release unlocked;
+        batch.copy_boards(data, rows, cols);
+    }
+    return out;
+}
+
+} // anonymous namespace
+
 PYBIND11_MODULE(game2048_engine, m) {
     m.doc() = "2048 game engine with passive ability system";
 
@@ -25,6 +120,14 @@ PYBIND11_MODULE(game2048_engine, m) {
         .value("A_LITTLE_SLOW", PassiveType::A_LITTLE_SLOW)
         .value("CONTRARIAN", PassiveType::CONTRARIAN);
 
+    // Direction enum; every direction argument also accepts an int (0-4) or a string.
+    py::enum_<Direction>(m, "Direction")
+        .value("UP", Direction::UP)
+        .value("DOWN", Direction::DOWN)
+        .value("LEFT", Direction::LEFT)
+        .value("RIGHT", Direction::RIGHT)
+        .value("NONE", Direction::NONE);
+
     m.def("passive_name", &passive_name);
     m.def("passive_name", [](int t) { return passive_name(static_cast<PassiveType>(t)); });
     m.def("passive_description", &passive_description);
@@ -82,42 +185,301 @@ PYBIND11_MODULE(game2048_engine, m) {
         .def_readonly("col", &RandomMoverState::col);
 
     // TurnResult
-    py::class_<TurnResult>(m, "TurnResult")
-        .def_readonly("moves", &TurnResult::moves)
-        .def_readonly("merges", &TurnResult::merges)
-        .def_readonly("bomb_destroyed", &TurnResult::bomb_destroyed)
+    // List fields convert on first read and are cached (see cached()); each
+    // channel also comes as a read-only int32 array, one row per entry:
+    //   moves_array / slow_tile_moves_array    start_row, start_col, end_row, end_col, value
+    //   merges_array / slow_tile_merges_array  row, col, new_value
+    //   passive_candidates_array               row, col, tile_value
+    //   slow_mover_updates_array               old_row, old_col, new_row, new_col, value, finished, is_merge
+    //   random_mover_updates_array             old_row, old_col, new_row, new_col
+    //   bomb_destroyed_array / snail_bomb_kills_array / spawn_excluded_array  row, col (row-major)
+    py::class_<TurnResult>(m, "TurnResult", py::dynamic_attr())
+        .def(py::init<>())
+        .def_property_readonly("moves", [](py::object self) {
+            return cached(self, "moves", [](const TurnResult& r) { return py::cast(r.moves); }); })
+        .def_property_readonly("merges", [](py::object self) {
+            return cached(self, "merges", [](const TurnResult& r) { return py::cast(r.merges); }); })
+        .def_property_readonly("bomb_destroyed", [](py::object self) {
+            return cached(self, "bomb_destroyed", [](const TurnResult& r) { return to_py_set(r.bomb_destroyed); }); })
+        .def_property_readonly("spawn_excluded", [](py::object self) {
+            return cached(self, "spawn_excluded", [](const TurnResult& r) { return to_py_set(r.spawn_excluded); }); })
         .def_readonly("points_gained", &TurnResult::points_gained)
         .def_readonly("spawned_tile", &TurnResult::spawned_tile)
         .def_readonly("board_changed", &TurnResult::board_changed)
         .def_readonly("should_expand", &TurnResult::should_expand)
         .def_readonly("expand_direction", &TurnResult::expand_direction)
-        .def_readonly("passive_candidates", &TurnResult::passive_candidates)
-        .def_readonly("slow_mover_updates", &TurnResult::slow_mover_updates)
-        .def_readonly("random_mover_updates", &TurnResult::random_mover_updates)
+        .def_property_readonly("passive_candidates", [](py::object self) {
+            return cached(self, "passive_candidates", [](const TurnResult& r) { return py::cast(r.passive_candidates); }); })
+        .def_property_readonly("slow_mover_updates", [](py::object self) {
+            return cached(self, "slow_mover_updates", [](const TurnResult& r) { return py::cast(r.slow_mover_updates); }); })
+        .def_property_readonly("random_mover_updates", [](py::object self) {
+            return cached(self, "random_mover_updates", [](const TurnResult& r) { return py::cast(r.random_mover_updates); }); })
         .def_readonly("spawned_snail", &TurnResult::spawned_snail)
-        .def_readonly("snail_bomb_kills", &TurnResult::snail_bomb_kills)
-        .def_readonly("slow_tile_moves", &TurnResult::slow_tile_moves)
-        .def_readonly("slow_tile_merges", &TurnResult::slow_tile_merges);
+        .def_property_readonly("snail_bomb_kills", [](py::object self) {
+            return cached(self, "snail_bomb_kills", [](const TurnResult& r) { return to_py_set(r.snail_bomb_kills); }); })
+        .def_property_readonly("slow_tile_moves", [](py::object self) {
+            return cached(self, "slow_tile_moves", [](const TurnResult& r) { return py::cast(r.slow_tile_moves); }); })
+        .def_property_readonly("slow_tile_merges", [](py::object self) {
+            return cached(self, "slow_tile_merges", [](const TurnResult& r) { return py::cast(r.slow_tile_merges); }); })
+        .def_property_readonly("moves_array", [](py::object self) {
+            return cached(self, "moves_array", [](const TurnResult& r) { return moves_array(r.moves); }); })
+        .def_property_readonly("merges_array", [](py::object self) {
+            return cached(self, "merges_array", [](const TurnResult& r) { return merges_array(r.merges); }); })
+        .def_property_readonly("slow_tile_moves_array", [](py::object self) {
+            return cached(self, "slow_tile_moves_array", [](const TurnResult& r) { return moves_array(r.slow_tile_moves); }); })
+        .def_property_readonly("slow_tile_merges_array", [](py::object self) {
+            return cached(self, "slow_tile_merges_array", [](const TurnResult& r) { return merges_array(r.slow_tile_merges); }); })
+        .def_property_readonly("passive_candidates_array", [](py::object self) {
+            return cached(self, "passive_candidates_array", [](const TurnResult& r) {
+                return rows_array<3>(r.passive_candidates.size(), [&](auto emit) {
+                    for (const auto& p : r.passive_candidates) emit({p.row, p.col, p.tile_value});
+                });
+            }); })
+        .def_property_readonly("slow_mover_updates_array", [](py::object self) {
+            return cached(self, "slow_mover_updates_array", [](const TurnResult& r) {
+                return rows_array<7>(r.slow_mover_updates.size(), [&](auto emit) {
+                    for (const auto& u : r.slow_mover_updates)
+                        emit({u.old_row, u.old_col, u.new_row, u.new_col, u.value, u.finished, u.is_merge});
+                });
+            }); })
+        .def_property_readonly("random_mover_updates_array", [](py::object self) {
+            return cached(self, "random_mover_updates_array", [](const TurnResult& r) {
+                return rows_array<4>(r.random_mover_updates.size(), [&](auto emit) {
+                    for (const auto& u : r.random_mover_updates) emit({u.old_row, u.old_col, u.new_row, u.new_col});
+                });
+            }); })
+        .def_property_readonly("bomb_destroyed_array", [](py::object self) {
+            return cached(self, "bomb_destroyed_array", [](const TurnResult& r) { return cells_array(r.bomb_destroyed); }); })
+        .def_property_readonly("snail_bomb_kills_array", [](py::object self) {
+            return cached(self, "snail_bomb_kills_array", [](const TurnResult& r) { return cells_array(r.snail_bomb_kills); }); })
+        .def_property_readonly("spawn_excluded_array", [](py::object self) {
+            return cached(self, "spawn_excluded_array", [](const TurnResult& r) { return cells_array(r.spawn_excluded); }); });
+
+    // Snapshot: opaque saved state from GameEngine.snapshot(), for restore().
+    // pybind11 holders can't be shared_ptr<const T>, hence the casts.
+    py::class_<EngineSnapshot, std::shared_ptr<EngineSnapshot>>(m, "Snapshot")
+        .def("rows", &EngineSnapshot::rows)
+        .def("cols", &EngineSnapshot::cols)
+        .def("score", &EngineSnapshot::score);
+    auto mutable_snapshot = [](Snapshot s) { return std::const_pointer_cast<EngineSnapshot>(s); };
 
     // GameEngine
+    // Every method is pure C++ and runs with the GIL released, so separate
+    // engines can be driven from worker threads in parallel. A single engine
+    // must still be used by one thread at a time.
+    const auto release = py::call_guard<py::gil_scoped_release>();
     py::class_<GameEngine>(m, "GameEngine")
-        .def(py::init<int, int>())
-        .def(py::init<int, int, unsigned int>(), py::arg("rows"), py::arg("cols"), py::arg("seed"))
-        .def("process_move", &GameEngine::process_move)
-        .def("set_tile", &GameEngine::set_tile, py::arg("row"), py::arg("col"), py::arg("value"), py::arg("passive_type") = 0)
-        .def("assign_passive", &GameEngine::assign_passive)
-        .def("place_bomb", &GameEngine::place_bomb)
-        .def("place_freeze", &GameEngine::place_freeze)
-        .def("clear_freeze", &GameEngine::clear_freeze)
-        .def("switch_tiles", &GameEngine::switch_tiles)
-        .def("get_grid_values", &GameEngine::get_grid_values)
-        .def("get_passive_map", &GameEngine::get_passive_map)
-        .def("get_slow_movers", &GameEngine::get_slow_movers)
-        .def("get_random_movers", &GameEngine::get_random_movers)
-        .def("rows", &GameEngine::rows)
-        .def("cols", &GameEngine::cols)
-        .def("score", &GameEngine::score)
-        .def("tar_expand", &GameEngine::tar_expand)
-        .def("complete_expansion", &GameEngine::complete_expansion)
-        .def("has_moves", &GameEngine::has_moves);
+        .def(py::init<int, int>(), release)
+        .def(py::init<int, int, unsigned int>(), py::arg("rows"), py::arg("cols"), py::arg("seed"), release)
+        .def("process_move", py::overload_cast<Direction>(&GameEngine::process_move), release)
+        .def("process_move", [](GameEngine& e, int d) { return e.process_move(direction_from_int(d)); }, release)
+        .def("process_move", py::overload_cast<const std::string&>(&GameEngine::process_move), release)
+        .def("process_move_into", &GameEngine::process_move_into, release)
+        .def("process_move_into", [](GameEngine& e, int d, TurnResult& r) { e.process_move_into(direction_from_int(d), r); }, release)
+        .def("process_move_into", [](GameEngine& e, const std::string& d, TurnResult& r) { e.process_move_into(parse_direction(d), r); }, release)
+        .def("preview_moves", &GameEngine::preview_moves, release)
+        .def("set_move_threads", &GameEngine::set_move_threads,
+             py::arg("threads"), py::arg("min_cells") = GameEngine::kDefaultParallelCells, release)
+        .def("move_threads", &GameEngine::move_threads, release)
+        .def("snapshot", [=](const GameEngine& e) { return mutable_snapshot(e.snapshot()); }, release)
+        .def("restore", [](GameEngine& e, std::shared_ptr<EngineSnapshot> s) { e.restore(s); }, release)
+        .def("set_history_limit", &GameEngine::set_history_limit, release)
+        .def("history_limit", &GameEngine::history_limit, release)
+        .def("history_size", &GameEngine::history_size, release)
+        .def("history", [=](const GameEngine& e, int back) { return mutable_snapshot(e.history(back)); },
+             py::arg("back") = 0, release)
+        .def("undo", &GameEngine::undo, release)
+        // Replays cross as bytes, built with the GIL held.
+        .def("start_recording", &GameEngine::start_recording,
+             py::arg("checkpoint_interval") = Replay::kDefaultInterval, release)
+        .def("recording", &GameEngine::recording, release)
+        .def("replay_data", [](const GameEngine& e) { return py::bytes(e.replay_data()); })
+        .def("stop_recording", [](GameEngine& e) { return py::bytes(e.stop_recording()); })
+        // clone(seed=None): independent copy; a seed reseeds the copy's RNGs.
+        .def("clone", [](const GameEngine& e, std::optional<unsigned int> seed) {
+            auto copy = std::make_unique<GameEngine>(e);
+            if (seed) copy->reseed(*seed);
+            return copy;
+        }, py::arg("seed") = py::none(), release)
+        .def("__copy__", [](const GameEngine& e) { return std::make_unique<GameEngine>(e); }, release)
+        // The memo dict is a Python object, so only the copy itself drops the GIL.
+        .def("__deepcopy__", [](const GameEngine& e, const py::dict&) {
+            py::gil_scoped_release unlocked;
+            return std::make_unique<GameEngine>(e);
+        })
+        .def("set_tile", &GameEngine::set_tile, py::arg("row"), py::arg("col"), py::arg("value"), py::arg("passive_type") = 0, release)
+        .def("assign_passive", &GameEngine::assign_passive, release)
+        .def("place_bomb", &GameEngine::place_bomb, release)
+        .def("place_freeze", &GameEngine::place_freeze, release)
+        .def("clear_freeze", &GameEngine::clear_freeze, release)
+        .def("switch_tiles", &GameEngine::switch_tiles, release)
+        .def("get_grid_values", &GameEngine::get_grid_values, release)
+        .def("get_passive_map", &GameEngine::get_passive_map, release)
+        // The next three build NumPy arrays, so they run with the GIL held.
+        .def("values_view", [](const GameEngine& e) { return plane_view(e.board(), e.board().value_plane()); })
+        .def("passives_view", [](const GameEngine& e) { return plane_view(e.board(), e.board().passive_plane()); })
+        // (n, 4) int32 array of row, col, value, passive.
+        .def("take_changes", [](GameEngine& e) {
+            auto changes = e.take_changes();
+            return rows_array<4>(changes.size(), [&](auto emit) {
+                for (const auto& ch : changes) emit({ch.row, ch.col, ch.value, ch.passive});
+            });
+        })
+        .def("get_slow_movers", &GameEngine::get_slow_movers, release)
+        .def("get_random_movers", &GameEngine::get_random_movers, release)
+        .def("rows", &GameEngine::rows, release)
+        .def("cols", &GameEngine::cols, release)
+        .def("score", &GameEngine::score, release)
+        .def("tar_expand", &GameEngine::tar_expand, release)
+        .def("complete_expansion", py::overload_cast<Direction>(&GameEngine::complete_expansion), release)
+        .def("complete_expansion", [](GameEngine& e, int d) { e.complete_expansion(direction_from_int(d)); }, release)
+        .def("complete_expansion", py::overload_cast<const std::string&>(&GameEngine::complete_expansion), release)
+        .def("has_moves", &GameEngine::has_moves, release)
+        .def("legal_moves", &GameEngine::legal_moves, release)
+        .def("state_hash", &GameEngine::state_hash, release)
+        .def("canonical_hash", &GameEngine::canonical_hash, release);
+
+    // Replay: a recording from GameEngine.stop_recording(), loaded for seeking.
+    // Malformed data raises ValueError, a turn outside it IndexError.
+    py::class_<Replay>(m, "Replay")
+        .def(py::init([](py::bytes data) { return std::make_unique<Replay>(std::string(data)); }))
+        .def("data", [](const Replay& r) { return py::bytes(r.data()); })
+        .def("turns", &Replay::turns)
+        .def("checkpoints", &Replay::checkpoints)
+        .def("checkpoint_interval", &Replay::checkpoint_interval)
+        .def("seek", &Replay::seek, py::arg("engine"), py::arg("turn"), release)
+        .def("engine_at", &Replay::engine_at, py::arg("turn"), release);
+
+    py::enum_<PassivePolicy>(m, "PassivePolicy")
+        .value("DECLINE", PassivePolicy::DECLINE)
+        .value("A_LITTLE_SLOW", PassivePolicy::A_LITTLE_SLOW)
+        .value("CONTRARIAN", PassivePolicy::CONTRARIAN)
+        .value("RANDOM", PassivePolicy::RANDOM);
+
+    // EngineBatch
+    // step() takes an int array of directions, shape (n,) for one turn per
+    // engine or (n, turns) for a sequence each, and returns a dict of arrays:
+    //   valid, changed   uint8, shaped like the directions
+    //   score            int32 (n,), after the last turn
+    //   done             uint8 (n,), engines with no moves left
+    //   boards           int32 (n, rows, cols) with boards=True; rows and cols
+    //                    are the largest in the batch, padded with EngineBatch.PADDING
+    // The turns themselves run with the GIL released.
+    py::class_<EngineBatch>(m, "EngineBatch")
+        .def(py::init([](int count, int rows, int cols, unsigned int seed,
+                         std::optional<Direction> expansion, PassivePolicy passives) {
+            if (count < 0) throw std::invalid_argument("count must not be negative");
+            return std::make_unique<EngineBatch>(count, rows, cols, seed,
+                                                 BatchOptions{expansion.value_or(Direction::NONE), passives});
+        }), py::arg("count"), py::arg("rows"), py::arg("cols"), py::arg("seed"),
+            py::arg("expansion") = py::none(), py::arg("passives") = PassivePolicy::DECLINE, release)
+        .def_property_readonly_static("PADDING", [](py::object) { return EngineBatch::kPadding; })
+        .def("__len__", &EngineBatch::size)
+        .def("engine", [](EngineBatch& b, int i) -> GameEngine& {
+            if (i < 0 || i >= b.size()) throw py::index_error("engine index out of range");
+            return b.engine(i);
+        }, py::return_value_policy::reference_internal)
+        .def("step", [](EngineBatch& b, py::array_t<int, py::array::c_style | py::array::forcecast> directions,
+                        bool boards) {
+            if ((directions.ndim() != 1 && directions.ndim() != 2) || directions.shape(0) != b.size())
+                throw std::invalid_argument("directions must have shape (n,) or (n, turns) for a batch of n");
+            const int turns = directions.ndim() == 2 ? static_cast<int>(directions.shape(1)) : 1;
+            std::vector<Direction> dirs(directions.size());
+            const int* d = directions.data();
+            for (size_t k = 0; k < dirs.size(); k++) dirs[k] = direction_from_int(d[k]);
+
+            std::vector<py::ssize_t> shape(directions.shape(), directions.shape() + directions.ndim());
+            py::array_t<std::uint8_t> valid(shape), changed(shape);
+            py::array_t<std::int32_t> score(b.size());
+            py::array_t<std::uint8_t> done(b.size());
+            std::uint8_t* valid_out = valid.mutable_data();
+            std::uint8_t* changed_out = changed.mutable_data();
+            std::int32_t* score_out = score.mutable_data();
+            std::uint8_t* done_out = done.mutable_data();
+            {
+                py::gil_scoped_release unlocked;
+                b.run(dirs.data(), turns, valid_out, changed_out);
+                for (int i = 0; i < b.size(); i++) {
+                    score_out[i] = b.engine(i).score();
+                    done_out[i] = b.done(i);
+                }
+            }
+            py::dict out;
+            out["valid"] = valid;
+            out["changed"] = changed;
+            out["score"] = score;
+            out["done"] = done;
+            if (boards) out["boards"] = boards_array(b);
+            return out;
+        }, py::arg("directions"), py::arg("boards") = false)
+        .def("boards", &boards_array)
+        .def("scores", [](const EngineBatch& b) {
+            py::array_t<std::int32_t> out(b.size());
+            for (int i = 0; i < b.size(); i++) out.mutable_data()[i] = b.engine(i).score();
+            return out;
+        })
+        .def("done", [](const EngineBatch& b) {
+            py::array_t<std::uint8_t> out(b.size());
+            for (int i = 0; i < b.size(); i++) out.mutable_data()[i] = b.done(i);
+            return out;
+        });
+
+    py::enum_<RolloutPolicy>(m, "RolloutPolicy")
+        .value("RANDOM", RolloutPolicy::RANDOM)
+        .value("GREEDY_MERGE", RolloutPolicy::GREEDY_MERGE)
+        .value("CORNER", RolloutPolicy::CORNER);
+
+    // RolloutStats
+    py::class_<RolloutStats>(m, "RolloutStats")
+        .def_readonly("valid", &RolloutStats::valid)
+        .def_readonly("rollouts", &RolloutStats::rollouts)
+        .def_readonly("mean_score", &RolloutStats::mean_score)
+        .def_readonly("mean_turns", &RolloutStats::mean_turns)
+        .def_readonly("mean_max_tile", &RolloutStats::mean_max_tile)
+        .def_readonly("max_tile", &RolloutStats::max_tile);
+
+    // RolloutExecutor
+    // run() returns four RolloutStats indexed by int(Direction) and keeps the
+    // GIL released for the whole call, rollouts included.
+    py::class_<RolloutExecutor>(m, "RolloutExecutor")
+        .def(py::init<int>(), py::arg("threads") = 0, release)
+        .def_property_readonly("threads", &RolloutExecutor::threads)
+        .def("run", [](RolloutExecutor& x, const GameEngine& root, int rollouts, RolloutPolicy policy,
+                       unsigned int seed, int max_turns, std::optional<Direction> expansion,
+                       PassivePolicy passives) {
+            RolloutOptions options;
+            options.policy = policy;
+            options.rollouts = rollouts;
+            options.max_turns = max_turns;
+            options.seed = seed;
+            options.game = BatchOptions{expansion.value_or(Direction::NONE), passives};
+            return x.run(root, options);
+        }, py::arg("root"), py::arg("rollouts"), py::arg("policy") = RolloutPolicy::RANDOM,
+           py::arg("seed") = 0, py::arg("max_turns") = 500, py::arg("expansion") = py::none(),
+           py::arg("passives") = PassivePolicy::DECLINE, release);
+
+    // SolveResult; values is indexed by int(Direction), -inf for invalid moves.
+    py::class_<SolveResult>(m, "SolveResult")
+        .def_readonly("best", &SolveResult::best)
+        .def_readonly("values", &SolveResult::values)
+        .def_readonly("depth", &SolveResult::depth)
+        .def_readonly("nodes", &SolveResult::nodes);
+
+    // Solver
+    // solve() keeps the GIL released for the whole search.
+    py::class_<Solver>(m, "Solver")
+        .def(py::init<int, int>(), py::arg("threads") = 0, py::arg("table_bits") = 20, release)
+        .def_property_readonly("threads", &Solver::threads)
+        .def("solve", [](Solver& s, const GameEngine& root, int depth, double time_budget,
+                         double min_probability, std::optional<Direction> expansion,
+                         PassivePolicy passives) {
+            SolveOptions options;
+            options.depth = depth;
+            options.time_budget = time_budget;
+            options.min_probability = min_probability;
+            options.game = BatchOptions{expansion.value_or(Direction::NONE), passives};
+            return s.solve(root, options);
+        }, py::arg("root"), py::arg("depth") = 3, py::arg("time_budget") = 0.0,
+           py::arg("min_probability") = 1e-4, py::arg("expansion") = py::none(),
+           py::arg("passives") = PassivePolicy::DECLINE, release);
 }
@@ -6,8 +6,19 @@
 
 #include "board.h"
 #include <algorithm>
+#include <atomic>
 #include <stdexcept>
 
+namespace {
+
+// Spare rows/columns kept on each side of the live area. Regrowing sizes the
+// margin relative to the board so repeated expansion stays amortized O(1).
+int margin_for(int extent) {
+    return std::max(2, extent / 2);
+}
+
+} // anonymous namespace
+
 Board::Board(int rows, int cols)
     : Board(rows, cols, std::random_device{}())
 {
@@ -15,114 +26,287 @@ Board::Board(int rows, int cols)
 
 Board::Board(int rows, int cols, unsigned int seed)
     : rows_(rows), cols_(cols),
-      grid_(rows, std::vector<Tile>(cols)),
+      stride_(cols + 2 * margin_for(cols)),
+      cap_rows_(rows + 2 * margin_for(rows)),
+      row0_(margin_for(rows)), col0_(margin_for(cols)),
+      codes_(static_cast<size_t>(stride_) * cap_rows_, tile_code::EMPTY),
       rng_(seed)
 {
+    adopt_planes(std::vector<std::uint8_t>(codes_.size(), 0),
+                 std::vector<std::int32_t>(codes_.size(), 0));
+    rebuild_index();
+}
+
+Board::Board(const Board& other)
+    : rows_(other.rows_), cols_(other.cols_),
+      stride_(other.stride_), cap_rows_(other.cap_rows_),
+      row0_(other.row0_), col0_(other.col0_),
+      codes_(other.codes_),
+      rng_(other.rng_),
+      changed_(other.changed_),
+      journal_(other.journal_),
+      version_(other.version_),
+      hash_(other.hash_),
+      obstacle_stamp_(other.obstacle_stamp_)
+{
+    adopt_planes(*other.passive_plane_, *other.value_plane_);
+    for (int k = 0; k < kCellClassCount; k++) {
+        classes_[k] = other.classes_[k];
+        counts_[k] = other.counts_[k];
+    }
 }
 
-Tile& Board::at(int r, int c) {
-    return grid_[r][c];
+Board& Board::operator=(const Board& other) {
+    if (this == &other) return *this;
+    // Same layout (the usual case: restoring a saved copy of this board):
+    // overwrite the planes in place so views of them keep following the
+    // board. Otherwise their coordinates would no longer line up, so leave
+    // the old planes to any views, as expand() does.
+    bool same_layout = rows_ == other.rows_ && cols_ == other.cols_ &&
+                       stride_ == other.stride_ && cap_rows_ == other.cap_rows_ &&
+                       row0_ == other.row0_ && col0_ == other.col0_;
+    if (same_layout) {
+        std::copy(other.passive_plane_->begin(), other.passive_plane_->end(), passives_);
+        std::copy(other.value_plane_->begin(), other.value_plane_->end(), values_);
+    } else {
+        adopt_planes(*other.passive_plane_, *other.value_plane_);
+    }
+    rows_ = other.rows_;
+    cols_ = other.cols_;
+    stride_ = other.stride_;
+    cap_rows_ = other.cap_rows_;
+    row0_ = other.row0_;
+    col0_ = other.col0_;
+    codes_ = other.codes_;
+    rng_ = other.rng_;
+    for (int k = 0; k < kCellClassCount; k++) {
+        classes_[k] = other.classes_[k];
+        counts_[k] = other.counts_[k];
+    }
+    changed_ = other.changed_;
+    journal_ = other.journal_;
+    version_ = other.version_;
+    hash_ = other.hash_;
+    obstacle_stamp_ = other.obstacle_stamp_;
+    return *this;
 }
 
-const Tile& Board::at(int r, int c) const {
-    return grid_[r][c];
+void Board::adopt_planes(std::vector<std::uint8_t> passives, std::vector<std::int32_t> values) {
+    passive_plane_ = std::make_shared<std::vector<std::uint8_t>>(std::move(passives));
+    value_plane_ = std::make_shared<std::vector<std::int32_t>>(std::move(values));
+    passives_ = passive_plane_->data();
+    values_ = value_plane_->data();
 }
 
-void Board::expand(const std::string& direction) {
-    if (direction == "down") {
-        rows_++;
-        grid_.emplace_back(cols_);
-    } else if (direction == "up") {
-        rows_++;
-        grid_.insert(grid_.begin(), std::vector<Tile>(cols_));
-    } else if (direction == "right") {
-        cols_++;
-        for (auto& row : grid_) {
-            row.emplace_back();
+std::uint64_t Board::next_obstacle_stamp() {
+    static std::atomic<std::uint64_t> counter {0};
+    return counter.fetch_add(1, std::memory_order_relaxed) + 1;
+}
+
+void Board::rebuild_index() {
+    changed_.reset(rows_, cols_);
+    journal_.reset(rows_, cols_);
+    version_++;
+    hash_ = 0;
+    for (int k = 0; k < kCellClassCount; k++) {
+        classes_[k].reset(rows_, cols_);
+        counts_[k] = 0;
+    }
+    for (int r = 0; r < rows_; r++) {
+        int i = index(r, 0);
+        for (int c = 0; c < cols_; c++, i++) {
+            journal_.insert(r, c);
+            hash_ ^= zobrist::cell_key(r, c, codes_[i], passives_[i]);
+            int k = code_class(codes_[i]);
+            if (k >= 0) add_to(k, r, c);
+            if (passives_[i]) add_to(static_cast<int>(CellClass::PASSIVE), r, c);
         }
-    } else if (direction == "left") {
-        cols_++;
-        for (auto& row : grid_) {
-            row.insert(row.begin(), Tile{});
+    }
+    // Coordinates may have shifted even if no obstacle did.
+    obstacle_stamp_ = next_obstacle_stamp();
+}
+
+void Board::take_changes(std::vector<CellChange>& out) {
+    journal_.for_each([&](int r, int c) {
+        int i = index(r, c);
+        out.push_back({r, c, values_[i], passives_[i]});
+    });
+    journal_.clear();
+}
+
+void Board::swap_cells(int r1, int c1, int r2, int c2) {
+    int a = index(r1, c1), b = index(r2, c2);
+    track(r1, c1, codes_[a], passives_[a], codes_[b], passives_[b]);
+    track(r2, c2, codes_[b], passives_[b], codes_[a], passives_[a]);
+    std::swap(codes_[a], codes_[b]);
+    std::swap(passives_[a], passives_[b]);
+    std::swap(values_[a], values_[b]);
+}
+
+void Board::regrow() {
+    int row_margin = margin_for(rows_);
+    int col_margin = margin_for(cols_);
+    int new_stride = cols_ + 2 * col_margin;
+    int new_cap_rows = rows_ + 2 * row_margin;
+
+    std::vector<TileCode> codes(static_cast<size_t>(new_stride) * new_cap_rows, tile_code::EMPTY);
+    std::vector<std::uint8_t> passives(codes.size(), 0);
+    std::vector<std::int32_t> values(codes.size(), 0);
+    for (int r = 0; r < rows_; r++) {
+        int src = index(r, 0);
+        int dst = (row_margin + r) * new_stride + col_margin;
+        std::copy_n(&codes_[src], cols_, &codes[dst]);
+        std::copy_n(&passives_[src], cols_, &passives[dst]);
+        std::copy_n(&values_[src], cols_, &values[dst]);
+    }
+
+    codes_.swap(codes);
+    adopt_planes(std::move(passives), std::move(values));
+    stride_ = new_stride;
+    cap_rows_ = new_cap_rows;
+    row0_ = row_margin;
+    col0_ = col_margin;
+}
+
+void Board::reset(int rows, int cols) {
+    rows_ = rows;
+    cols_ = cols;
+    stride_ = cols + 2 * margin_for(cols);
+    cap_rows_ = rows + 2 * margin_for(rows);
+    row0_ = margin_for(rows);
+    col0_ = margin_for(cols);
+    codes_.assign(static_cast<size_t>(stride_) * cap_rows_, tile_code::EMPTY);
+    adopt_planes(std::vector<std::uint8_t>(codes_.size(), 0),
+                 std::vector<std::int32_t>(codes_.size(), 0));
+    rebuild_index();
+}
+
+void Board::expand(Direction direction) {
+    switch (direction) {
+        case Direction::DOWN:
+            if (row0_ + rows_ == cap_rows_) regrow();
+            rows_++;
+            break;
+        case Direction::UP:
+            if (row0_ == 0) regrow();
+            row0_--;
+            rows_++;
+            break;
+        case Direction::RIGHT:
+            if (col0_ + cols_ == stride_) regrow();
+            cols_++;
+            break;
+        case Direction::LEFT:
+            if (col0_ == 0) regrow();
+            col0_--;
+            cols_++;
+            break;
+        default:
+            return;
+    }
+    index_expansion(direction);
+}
+
+// Brings the registries, journal and hash in line with a new row or column,
+// which is all empty. Down/right keep every coordinate, so only the new
+// cells are indexed. Up/left shift every coordinate by one: the CellSets
+// shift word by word, the hash is refolded in one pass over the cells, and
+// the journal marks every cell for consumers keyed by coordinates.
+void Board::index_expansion(Direction direction) {
+    const bool rows = direction == Direction::UP || direction == Direction::DOWN;
+    const bool front = direction == Direction::UP || direction == Direction::LEFT;
+    for (CellSet* set : {&classes_[0], &classes_[1], &classes_[2], &classes_[3], &classes_[4], &changed_, &journal_})
+        rows ? set->add_row(front) : set->add_col(front);
+    static_assert(kCellClassCount == 5, "index_expansion grows every class set");
+
+    const int r0 = rows ? (front ? 0 : rows_ - 1) : 0;
+    const int c0 = rows ? 0 : (front ? 0 : cols_ - 1);
+    const int n = rows ? cols_ : rows_;
+    constexpr int empty = static_cast<int>(CellClass::EMPTY);
+    for (int k = 0; k < n; k++) {
+        const int r = rows ? r0 : k, c = rows ? k : c0;
+        classes_[empty].insert(r, c);
+        journal_.insert(r, c);
+    }
+    counts_[empty] += n;
+
+    if (front) {
+        hash_ = 0;
+        for (int r = 0; r < rows_; r++) {
+            int i = index(r, 0);
+            for (int c = 0; c < cols_; c++, i++)
+                if (codes_[i] != tile_code::EMPTY || passives_[i])
+                    hash_ ^= zobrist::cell_key(r, c, codes_[i], passives_[i]);
         }
+        journal_.fill();
     }
+    version_++;
+    // Every cached obstacle layout has the old size.
+    obstacle_stamp_ = next_obstacle_stamp();
 }
 
-std::pair<int,int> Board::spawn_number(const std::set<std::pair<int,int>>& excluded) {
-    auto empties = empty_cells(excluded);
-    if (empties.empty()) return {-1, -1};
+// Picks the k-th eligible empty cell in row-major order: the same cell the
+// old scan-and-collect approach picked for a given RNG draw.
+std::pair<int,int> Board::spawn_code(TileCode code, const CellSet& excluded) {
+    const CellSet& empties = cells(CellClass::EMPTY);
+    int n = excluded.empty() ? count(CellClass::EMPTY) : empties.count_excluding(excluded);
+    if (n == 0) return {-1, -1};
 
-    std::uniform_int_distribution<int> dist(0, (int)empties.size() - 1);
-    auto [r, c] = empties[dist(rng_)];
-    grid_[r][c].value = 2;
-    grid_[r][c].passive = PassiveType::NONE;
+    std::uniform_int_distribution<int> dist(0, n - 1);
+    auto [r, c] = empties.nth_excluding(dist(rng_), excluded);
+    set_code(r, c, code);
     return {r, c};
 }
 
-std::pair<int,int> Board::spawn_bomb() {
-    auto empties = empty_cells();
-    if (empties.empty()) return {-1, -1};
+std::pair<int,int> Board::spawn_number(const CellSet& excluded) {
+    return spawn_code(1, excluded);  // 2^1
+}
 
-    std::uniform_int_distribution<int> dist(0, (int)empties.size() - 1);
-    auto [r, c] = empties[dist(rng_)];
-    grid_[r][c].value = -1;
-    grid_[r][c].passive = PassiveType::NONE;
-    return {r, c};
+std::pair<int,int> Board::spawn_bomb() {
+    return spawn_code(tile_code::BOMB, {});
 }
 
 std::pair<int,int> Board::spawn_snail() {
-    auto empties = empty_cells();
-    if (empties.empty()) return {-1, -1};
-
-    std::uniform_int_distribution<int> dist(0, (int)empties.size() - 1);
-    auto [r, c] = empties[dist(rng_)];
-    grid_[r][c].value = -2;
-    grid_[r][c].passive = PassiveType::NONE;
-    return {r, c};
+    return spawn_code(tile_code::SNAIL, {});
 }
 
 std::pair<int,int> Board::spawn_wall() {
-    auto empties = empty_cells();
-    if (empties.empty()) return {-1, -1};
-
-    std::uniform_int_distribution<int> dist(0, (int)empties.size() - 1);
-    auto [r, c] = empties[dist(rng_)];
-    grid_[r][c].value = -3;
-    grid_[r][c].passive = PassiveType::NONE;
-    return {r, c};
+    return spawn_code(tile_code::WALL, {});
 }
 
-std::vector<std::pair<int,int>> Board::empty_cells(const std::set<std::pair<int,int>>& excluded) const {
+std::vector<std::pair<int,int>> Board::empty_cells(const CellSet& excluded) const {
     std::vector<std::pair<int,int>> result;
-    for (int r = 0; r < rows_; r++) {
-        for (int c = 0; c < cols_; c++) {
-            if (grid_[r][c].is_empty() && excluded.find({r, c}) == excluded.end()) {
-                result.push_back({r, c});
-            }
-        }
-    }
+    cells(CellClass::EMPTY).for_each([&](int r, int c) {
+        if (!excluded.test(r, c)) result.push_back({r, c});
+    });
     return result;
 }
 
-std::vector<std::pair<int,int>> Board::occupied_numbered_cells(const std::set<std::pair<int,int>>& excluded) const {
+std::vector<std::pair<int,int>> Board::occupied_numbered_cells(const CellSet& excluded) const {
     std::vector<std::pair<int,int>> result;
+    occupied_numbered_cells(excluded, result);
+    return result;
+}
+
+void Board::occupied_numbered_cells(const CellSet& excluded,
+                                    std::vector<std::pair<int,int>>& out) const {
+    out.clear();
     for (int r = 0; r < rows_; r++) {
+        const TileCode* row = &codes_[index(r, 0)];
         for (int c = 0; c < cols_; c++) {
-            if (grid_[r][c].is_numbered() && excluded.find({r, c}) == excluded.end()) {
-                result.push_back({r, c});
+            if (tile_code::is_numbered(row[c]) && !excluded.test(r, c)) {
+                out.push_back({r, c});
             }
         }
     }
-    return result;
 }
 
 std::vector<int> Board::to_flat_values() const {
     std::vector<int> result;
     result.reserve(rows_ * cols_);
     for (int r = 0; r < rows_; r++) {
-        for (int c = 0; c < cols_; c++) {
-            result.push_back(grid_[r][c].value);
-        }
+        const std::int32_t* row = &values_[index(r, 0)];
+        result.insert(result.end(), row, row + cols_);
     }
     return result;
 }
@@ -130,9 +314,10 @@ std::vector<int> Board::to_flat_values() const {
 std::vector<std::tuple<int,int,int>> Board::get_passive_map() const {
     std::vector<std::tuple<int,int,int>> result;
     for (int r = 0; r < rows_; r++) {
+        const std::uint8_t* row = &passives_[index(r, 0)];
         for (int c = 0; c < cols_; c++) {
-            if (grid_[r][c].has_passive()) {
-                result.push_back({r, c, static_cast<int>(grid_[r][c].passive)});
+            if (row[c] != 0) {
+                result.push_back({r, c, static_cast<int>(row[c])});
             }
         }
     }
@@ -9,33 +9,33 @@
 #include <cstdlib>
 
 void ContrarianBehavior::pre_snapshot(const Board& board, int dr, int dc) {
-    positions_.clear();
-    pre_blocked_.clear();
+    positions_.reset(board.rows(), board.cols());
+    pre_blocked_.reset(board.rows(), board.cols());
 
-    for (int r = 0; r < board.rows(); r++)
-        for (int c = 0; c < board.cols(); c++)
-            if (board.at(r, c).is_numbered() && matches(board.at(r, c).passive))
-                positions_.insert({r, c});
+    board.cells(CellClass::PASSIVE).for_each([&](int r, int c) {
+        if (board.at(r, c).is_numbered() && matches(board.passive(r, c)))
+            positions_.insert(r, c);
+    });
 
     // Pre-compute which contrarian tiles are immediately blocked in their movement
     // direction BEFORE regular movement runs. This prevents regular tiles that compact
     // against a contrarian tile during step 2 from falsely blocking it in advance().
     int opp_dr = -dr, opp_dc = -dc;
-    for (const auto& [cr, cc] : positions_) {
+    positions_.for_each([&](int cr, int cc) {
         int imm_r = cr + opp_dr, imm_c = cc + opp_dc;
         if (imm_r < 0 || imm_r >= board.rows() ||
             imm_c < 0 || imm_c >= board.cols()) {
-            pre_blocked_.insert({cr, cc});
+            pre_blocked_.insert(cr, cc);
         } else {
-            const Tile& t = board.at(imm_r, imm_c);
+            Tile t = board.at(imm_r, imm_c);
             if (!t.is_empty() && !has_passive(t.passive, PassiveType::CONTRARIAN)) {
                 // Only block if the adjacent tile can't be merged with.
                 // A normal tile with matching value is a valid merge target.
                 if (!t.is_numbered() || t.value != board.at(cr, cc).value)
-                    pre_blocked_.insert({cr, cc});
+                    pre_blocked_.insert(cr, cc);
             }
         }
-    }
+    });
 }
 
 bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
@@ -45,23 +45,21 @@ bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
     const int opp_dr = -dr, opp_dc = -dc;
 
     // Process leading-edge tiles first (closest to the opposite wall).
-    // Set iterates ascending. opp moving right (opp_dc>0) or down (opp_dr>0) → reverse.
-    std::vector<std::pair<int,int>> order(positions_.begin(), positions_.end());
-    if (opp_dc > 0 || opp_dr > 0)
-        std::reverse(order.begin(), order.end());
+    // Row-major order; opp moving right (opp_dc>0) or down (opp_dr>0) → reversed.
+    positions_.collect(order_, opp_dc > 0 || opp_dr > 0);
 
-    for (const auto& [cr, cc] : order) {
+    for (const auto& [cr, cc] : order_) {
         if (!board.at(cr, cc).is_numbered()) continue;
-        if (!matches(board.at(cr, cc).passive)) continue;
+        if (!matches(board.passive(cr, cc))) continue;
 
         // Skip active slow-contrarian movers — advance_slow_movers handles them.
-        if (ctx.active_sm_positions.count({cr, cc})) continue;
+        if (ctx.active_sm_positions.test(cr, cc)) continue;
 
         // Skip if pre-move blocked (immediate opposite-direction cell was occupied).
-        if (pre_blocked_.count({cr, cc})) continue;
+        if (pre_blocked_.test(cr, cc)) continue;
 
         int tile_value = board.at(cr, cc).value;
-        PassiveType tile_passive = board.at(cr, cc).passive;
+        PassiveType tile_passive = board.passive(cr, cc);
         bool is_slow_contrarian = has_passive(tile_passive, PassiveType::A_LITTLE_SLOW);
 
         // Scan in the opposite direction to find ultimate destination.
@@ -71,7 +69,7 @@ bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
 
         while (scan_r >= 0 && scan_r < board.rows() &&
                scan_c >= 0 && scan_c < board.cols()) {
-            const Tile& t = board.at(scan_r, scan_c);
+            Tile t = board.at(scan_r, scan_c);
             if (t.is_empty()) {
                 dest_r = scan_r; dest_c = scan_c;
             } else if (t.is_numbered() && t.value == tile_value) {
@@ -94,11 +92,9 @@ bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
             // Immediate merge: pure contrarian (moves full distance) or
             // slow contrarian adjacent to its merge target.
             int new_value = tile_value * 2;
-            board.at(cr, cc).value = 0;
-            board.at(cr, cc).passive = PassiveType::NONE;
-            board.at(dest_r, dest_c).value = new_value;
-            board.at(dest_r, dest_c).passive = combine_passives(tile_passive,
-                                                                board.at(dest_r, dest_c).passive);
+            board.clear(cr, cc);
+            board.set(dest_r, dest_c, new_value,
+                      combine_passives(tile_passive, board.passive(dest_r, dest_c)));
             result.slow_tile_moves.push_back({cr, cc, dest_r, dest_c, tile_value});
             result.slow_tile_merges.push_back({dest_r, dest_c, new_value});
         } else {
@@ -108,9 +104,8 @@ bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
             int actual_dest_c = needs_sm ? next_c : dest_c;
 
             Tile saved = board.at(cr, cc);
-            board.at(cr, cc).value = 0;
-            board.at(cr, cc).passive = PassiveType::NONE;
-            board.at(actual_dest_r, actual_dest_c) = saved;
+            board.clear(cr, cc);
+            board.set(actual_dest_r, actual_dest_c, saved);
             result.slow_tile_moves.push_back({cr, cc, actual_dest_r, actual_dest_c, tile_value});
 
             if (needs_sm) {
@@ -121,7 +116,7 @@ bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
                 sm.value = saved.value;
                 sm.passive = saved.passive;
                 sm.active = true;
-                ctx.slow_movers.push_back(sm);
+                ctx.slow_movers.add(sm);
             }
         }
         changed = true;
@@ -129,3 +124,26 @@ bool ContrarianBehavior::advance(MoveContext& ctx, TurnResult& result) {
 
     return changed;
 }
+
+bool ContrarianBehavior::can_advance(const AdvanceQuery& q) const {
+    const Board& board = q.board;
+    const int opp_dr = -q.dr, opp_dc = -q.dc;
+
+    // A contrarian tile advances when the cell opposite the move is empty or
+    // holds an equal numbered tile; anything else either pre-blocks it or stops
+    // its scan at once.
+    bool moves = false;
+    board.cells(CellClass::PASSIVE).for_each([&](int cr, int cc) {
+        if (moves) return;
+        Tile tile = board.at(cr, cc);
+        if (!tile.is_numbered() || !matches(tile.passive)) return;
+        if (q.active_sm_positions.test(cr, cc)) return;
+
+        int imm_r = cr + opp_dr, imm_c = cc + opp_dc;
+        if (imm_r < 0 || imm_r >= board.rows() || imm_c < 0 || imm_c >= board.cols()) return;
+        Tile t = board.at(imm_r, imm_c);
+        if (t.is_empty() || (t.is_numbered() && t.value == tile.value))
+            moves = true;
+    });
+    return moves;
+}
@@ -0,0 +1,104 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#include "engine_batch.h"
+#include <algorithm>
+
+bool play_turn(GameEngine& engine, Direction direction, const BatchOptions& options,
+               std::mt19937& rng, TurnResult& result)
+{
+    engine.process_move_into(direction, result);
+    if (!result.board_changed) return false;
+
+    // Candidates carry this turn's coordinates, so they are resolved before
+    // an expansion can shift them.
+    if (options.passives != PassivePolicy::DECLINE) {
+        for (const auto& p : result.passive_candidates) {
+            PassiveType passive = static_cast<PassiveType>(options.passives);
+            if (options.passives == PassivePolicy::RANDOM) {
+                std::uniform_int_distribution<int> dist(0, 1);
+                passive = dist(rng) ? PassiveType::CONTRARIAN : PassiveType::A_LITTLE_SLOW;
+            }
+            // Ignored if the tile is gone, like a stale candidate in the game.
+            engine.assign_passive(p.row, p.col, static_cast<int>(passive));
+        }
+    }
+    if (result.should_expand) {
+        Direction d = options.expansion;
+        if (d == Direction::NONE) {
+            std::uniform_int_distribution<int> dist(0, 3);
+            d = static_cast<Direction>(dist(rng));
+        }
+        engine.complete_expansion(d);
+    }
+    return true;
+}
+
+EngineBatch::EngineBatch(int count, int rows, int cols, unsigned int seed, BatchOptions options)
+    : options_(options),
+      done_(count, 0)
+{
+    engines_.reserve(count);
+    policy_rngs_.reserve(count);
+    for (int i = 0; i < count; i++) {
+        unsigned int engine_seed = seed + 4u * i;
+        engines_.emplace_back(rows, cols, engine_seed);
+        policy_rngs_.emplace_back(engine_seed + 3);
+        done_[i] = !engines_[i].has_moves();
+    }
+}
+
+void EngineBatch::run(const Direction* directions, int turns,
+                      std::uint8_t* valid, std::uint8_t* changed)
+{
+    std::uint8_t unused_valid, unused_changed;
+    for (int i = 0; i < size(); i++) {
+        for (int t = 0; t < turns; t++) {
+            size_t k = static_cast<size_t>(i) * turns + t;
+            play(i, directions[k],
+                 valid ? valid[k] : unused_valid,
+                 changed ? changed[k] : unused_changed);
+        }
+    }
+}
+
+void EngineBatch::play(int i, Direction direction, std::uint8_t& valid, std::uint8_t& changed) {
+    valid = changed = 0;
+    if (done_[i]) return;
+
+    GameEngine& engine = engines_[i];
+    const auto version_before = engine.board().version();
+    valid = play_turn(engine, direction, options_, policy_rngs_[i], result_);
+    if (valid) done_[i] = !engine.has_moves();
+    changed = engine.board().version() != version_before;
+}
+
+int EngineBatch::max_rows() const {
+    int rows = 0;
+    for (const auto& e : engines_) rows = std::max(rows, e.rows());
+    return rows;
+}
+
+int EngineBatch::max_cols() const {
+    int cols = 0;
+    for (const auto& e : engines_) cols = std::max(cols, e.cols());
+    return cols;
+}
+
+void EngineBatch::copy_boards(std::int32_t* out, int rows, int cols) const {
+    for (const auto& e : engines_) {
+        const Board& board = e.board();
+        const std::int32_t* src = board.value_plane()->data() + board.offset();
+        for (int r = 0; r < rows; r++) {
+            std::int32_t* dst = out + static_cast<size_t>(r) * cols;
+            int n = r < board.rows() ? board.cols() : 0;
+            std::copy(src, src + n, dst);
+            std::fill(dst + n, dst + cols, kPadding);
+            if (n) src += board.stride();
+        }
+        out += static_cast<size_t>(rows) * cols;
+    }
+}
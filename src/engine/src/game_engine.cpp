@@ -8,6 +8,7 @@
 #include "slow_behavior.h"
 #include "contrarian_behavior.h"
 #include <algorithm>
+#include <stdexcept>
 
 GameEngine::GameEngine(int rows, int cols)
     : GameEngine(rows, cols, std::random_device{}())
@@ -21,85 +22,190 @@ GameEngine::GameEngine(int rows, int cols, unsigned int seed)
       passive_roller_(seed + 1),
       rng_(seed + 2)
 {
+    frozen_tiles_.reset(rows, cols);
+    slow_movers_.reset(rows, cols);
+    random_movers_.reset(rows, cols);
+
     // Register passive behaviors in advance-phase order.
     // To add a new passive: implement TileBehavior, add one line here.
-    behaviors_.push_back(std::make_unique<SlowBehavior>());
-    behaviors_.push_back(std::make_unique<ContrarianBehavior>());
+    register_behavior(std::make_unique<SlowBehavior>());
+    register_behavior(std::make_unique<ContrarianBehavior>());
+    reserve_scratch();
 
     board_.spawn_number();
     board_.spawn_number();
 }
 
-TurnResult GameEngine::process_move(const std::string& direction) {
+GameEngine::GameEngine(const GameEngine& other)
+    : board_(other.board_),
+      score_(other.score_),
+      tar_expand_(other.tar_expand_),
+      frozen_tiles_(other.frozen_tiles_),
+      slow_movers_(other.slow_movers_),
+      random_movers_(other.random_movers_),
+      passive_roller_(other.passive_roller_),
+      rng_(other.rng_),
+      snail_respawn_timer_(other.snail_respawn_timer_),
+      expand_count_(other.expand_count_),
+      has_moves_version_(other.has_moves_version_),
+      has_moves_cached_(other.has_moves_cached_),
+      legal_moves_version_(other.legal_moves_version_),
+      legal_moves_cached_(other.legal_moves_cached_),
+      owners_(other.owners_)
+{
+    behaviors_.reserve(other.behaviors_.size());
+    for (const auto& b : other.behaviors_)
+        behaviors_.push_back(b->clone());
+}
+
+void GameEngine::reseed(unsigned int seed) {
+    board_.reseed(seed);
+    passive_roller_.reseed(seed + 1);
+    rng_.seed(seed + 2);
+    if (recorder_) recorder_->reseed(seed);
+}
+
+void GameEngine::set_move_threads(int threads, int min_cells) {
+    if (threads < 0) throw std::invalid_argument("threads must not be negative");
+    if (min_cells < 0) throw std::invalid_argument("min_cells must not be negative");
+    if (threads == 1) line_workers_.reset();
+    else line_workers_ = std::make_unique<movement::LineWorkers>(threads, min_cells);
+}
+
+int GameEngine::move_threads() const {
+    return line_workers_ ? line_workers_->threads() : 1;
+}
+
+// Size the per-turn buffers for the current board so that turns never have
+// to grow them.
+void GameEngine::reserve_scratch() {
+    const size_t cells = static_cast<size_t>(board_.rows()) * board_.cols();
+    slow_movers_.reserve(cells);
+    random_movers_.reserve(cells);
+    detonations_.reserve(cells);
+    move_scratch_.moves.reserve(cells);
+    move_scratch_.merges.reserve(cells);
+}
+
+void GameEngine::register_behavior(std::unique_ptr<TileBehavior> behavior) {
+    behaviors_.push_back(std::move(behavior));
+
+    // Resolve every passive bitmask against the behaviors in registration
+    // order, exactly as the per-tile loops over behaviors_ used to.
+    for (int mask = 0; mask < kPassiveMasks; mask++) {
+        auto p = static_cast<PassiveType>(mask);
+        PassiveOwner entry;
+        for (size_t i = 0; i < behaviors_.size(); i++) {
+            const auto& b = behaviors_[i];
+            if (!b->matches(p)) continue;
+            if (!entry.owned()) {
+                entry.owner = static_cast<int>(i);
+                entry.requires_slow_mover_cleanup = b->requires_slow_mover_cleanup(p);
+            }
+            if (!entry.freeze_during_move && b->freeze_during_move()) {
+                entry.freeze_during_move = true;
+                entry.freeze_tile_behind = b->freeze_tile_behind();
+            }
+            entry.blocks_cascade |= b->blocks_cascade();
+        }
+        owners_[mask] = entry;
+    }
+}
+
+TurnResult GameEngine::process_move(Direction direction) {
     TurnResult result;
+    process_move_into(direction, result);
+    return result;
+}
+
+std::vector<TurnResult> GameEngine::preview_moves() {
+    static constexpr Direction kDirections[] = {
+        Direction::UP, Direction::DOWN, Direction::LEFT, Direction::RIGHT};
+
+    // The copied board keeps its cell-class registries, so no trial turn
+    // rebuilds them; the owner table is the engine's own throughout.
+    const TurnState saved {board_, score_, tar_expand_, frozen_tiles_, slow_movers_,
+                           random_movers_, passive_roller_, rng_, snail_respawn_timer_};
+    std::vector<TurnResult> results(4);
+    for (Direction d : kDirections) {
+        run_turn(d, results[static_cast<int>(d)]);
+        restore_state(saved);
+    }
+    return results;
+}
 
-    int move_dr = 0, move_dc = 0;
-    if      (direction == "up")    move_dr = -1;
-    else if (direction == "down")  move_dr =  1;
-    else if (direction == "left")  move_dc = -1;
-    else if (direction == "right") move_dc =  1;
+void GameEngine::restore_state(const TurnState& state) {
+    board_ = state.board;  // same layout: writes into the live planes
+    score_ = state.score;
+    tar_expand_ = state.tar_expand;
+    frozen_tiles_ = state.frozen_tiles;
+    slow_movers_ = state.slow_movers;
+    random_movers_ = state.random_movers;
+    passive_roller_ = state.passive_roller;
+    rng_ = state.rng;
+    snail_respawn_timer_ = state.snail_respawn_timer;
+}
+
+std::vector<CellChange> GameEngine::take_changes() {
+    std::vector<CellChange> changes;
+    board_.take_changes(changes);
+    return changes;
+}
+
+void GameEngine::process_move_into(Direction direction, TurnResult& result) {
+    if (recorder_) {
+        if (recorder_->checkpoint_due()) recorder_->checkpoint(*snapshot());
+        recorder_->move(direction);
+    }
+    if (history_.empty()) {
+        run_turn(direction, result);
+        return;
+    }
+    Snapshot before = snapshot();
+    run_turn(direction, result);
+    if (result.board_changed) {
+        const int limit = history_limit();
+        history_[(history_start_ + history_count_) % limit] = std::move(before);
+        if (history_count_ < limit) history_count_++;
+        else history_start_ = (history_start_ + 1) % limit;
+    }
+}
+
+void GameEngine::run_turn(Direction direction, TurnResult& result) {
+    result.clear(board_.rows(), board_.cols());
+
+    const int move_dr = row_step(direction), move_dc = col_step(direction);
 
     // Phase 1: Each behavior snapshots pre-move state (positions, pre-blocked sets, etc.)
     for (auto& b : behaviors_)
         b->pre_snapshot(board_, move_dr, move_dc);
 
     // Phase 2: Build effective frozen set.
-    // Starts with active slow movers + user-frozen tiles, then behaviors add their tiles.
-    auto effective_frozen = get_effective_frozen();
-    for (int r = 0; r < board_.rows(); r++) {
-        for (int c = 0; c < board_.cols(); c++) {
-            const Tile& tile = board_.at(r, c);
-            if (!tile.is_numbered()) continue;
-            for (auto& b : behaviors_) {
-                if (b->matches(tile.passive) && b->freeze_during_move()) {
-                    effective_frozen.insert({r, c});
-                    // Freeze the same-value tile immediately behind if behavior requests it.
-                    if (b->freeze_tile_behind()) {
-                        int br = r - move_dr, bc = c - move_dc;
-                        if (br >= 0 && br < board_.rows() &&
-                            bc >= 0 && bc < board_.cols() &&
-                            board_.at(br, bc).is_numbered() &&
-                            board_.at(br, bc).value == tile.value) {
-                            effective_frozen.insert({br, bc});
-                        }
-                    }
-                    break;  // First matching behavior claims this tile.
-                }
-            }
-        }
-    }
-    // Freeze snails and walls (not passive behaviors — special tile types).
-    for (int r = 0; r < board_.rows(); r++)
-        for (int c = 0; c < board_.cols(); c++)
-            if (board_.at(r, c).is_snail() || board_.at(r, c).is_wall())
-                effective_frozen.insert({r, c});
+    CellSet& effective_frozen = effective_frozen_;
+    build_effective_frozen(effective_frozen, move_dr, move_dc);
 
-    int snails_before = 0;
-    for (int r = 0; r < board_.rows(); r++)
-        for (int c = 0; c < board_.cols(); c++)
-            if (board_.at(r, c).is_snail()) snails_before++;
+    int snails_before = board_.count(CellClass::SNAIL);
 
-    // Phase 3: Pre-movement bomb detonation.
-    detonate_adjacent_bombs(result, effective_frozen);
+    // Phase 3: Pre-movement bomb detonation. The only pass that examines
+    // every bomb; later passes follow the board's changed cells.
+    detonate_adjacent_bombs(result, effective_frozen, false);
 
     // Phase 4: Regular movement (all non-frozen tiles).
-    MoveResult move_result;
-    if      (direction == "up")    move_result = movement::move_up   (board_, effective_frozen, slow_movers_);
-    else if (direction == "down")  move_result = movement::move_down (board_, effective_frozen, slow_movers_);
-    else if (direction == "left")  move_result = movement::move_left (board_, effective_frozen, slow_movers_);
-    else if (direction == "right") move_result = movement::move_right(board_, effective_frozen, slow_movers_);
+    MoveResult& move_result = move_scratch_;
+    movement::move_into(board_, direction, effective_frozen, slow_movers_.movers(), frozen_lines_, move_result,
+                        line_workers_.get());
 
     // Phase 5: Post-movement bomb detonation.
     // Bombs may have slid up to frozen tiles; also check user-frozen tile adjacency.
-    detonate_adjacent_bombs(result, effective_frozen, true);
+    detonate_adjacent_bombs(result, effective_frozen, true, true);
 
     // Phase 6: Advance existing slow movers (from previous turns).
-    result.slow_mover_updates = advance_slow_movers();
+    advance_slow_movers(result.slow_mover_updates);
 
-    // Build active slow mover positions (updated after advance removes finished movers).
-    std::set<std::pair<int,int>> active_sm_positions;
-    for (const auto& sm : slow_movers_)
-        if (sm.active) active_sm_positions.insert({sm.current_row, sm.current_col});
+    // Snapshot of the active slow mover positions (after advance removed
+    // finished movers); movers the behaviors add this turn are not in it.
+    CellSet& active_sm_positions = active_sm_positions_;
+    active_sm_positions = slow_movers_.active();
 
     // Cascade callback: slide regular tiles into a cell vacated by a special tile.
     auto cascade_fn = [this, move_dr, move_dc, &active_sm_positions]
@@ -117,7 +223,7 @@ TurnResult GameEngine::process_move(const std::string& direction) {
     for (auto& b : behaviors_) {
         bool changed = b->advance(ctx, result);
         move_result.board_changed |= changed;
-        detonate_adjacent_bombs(result, effective_frozen);
+        detonate_adjacent_bombs(result, effective_frozen, true);
     }
 
     // Validity check: at least one tile must have moved this turn.
@@ -126,31 +232,29 @@ TurnResult GameEngine::process_move(const std::string& direction) {
         bool slow_movers_moved = !result.slow_mover_updates.empty();
         if (!move_result.board_changed && !slow_movers_moved) {
             result.board_changed = false;
-            return result;
+            return;
         }
     }
 
     // Phase 8: Advance snails (only on valid turns).
-    result.random_mover_updates = advance_random_movers(result.bomb_destroyed);
+    advance_random_movers(result.random_mover_updates, result.bomb_destroyed);
 
-    std::set<std::pair<int,int>> snail_vacated;
+    CellSet& snail_vacated = snail_vacated_;
+    snail_vacated.reset(board_.rows(), board_.cols());
     for (const auto& u : result.random_mover_updates)
         if (u.old_row != u.new_row || u.old_col != u.new_col)
-            snail_vacated.insert({u.old_row, u.old_col});
+            snail_vacated.insert(u.old_row, u.old_col);
 
     if (tar_expand_ > 4096) {
-        int snails_after = 0;
-        for (int r = 0; r < board_.rows(); r++)
-            for (int c = 0; c < board_.cols(); c++)
-                if (board_.at(r, c).is_snail()) snails_after++;
-        if (snails_after < snails_before)
+        if (board_.count(CellClass::SNAIL) < snails_before)
             snail_respawn_timer_ = 3;
     }
 
     // Cascade regular tiles into cells vacated by snails this turn.
-    for (const auto& [vr, vc] : snail_vacated)
+    snail_vacated.for_each([&](int vr, int vc) {
         if (board_.at(vr, vc).is_empty())
             cascade_fill_behind(vr, vc, move_dr, move_dc, active_sm_positions, result.slow_tile_moves);
+    });
 
     result.board_changed = true;
     // Prepend rather than assign: behaviors may already have pushed entries
@@ -159,8 +263,7 @@ TurnResult GameEngine::process_move(const std::string& direction) {
                         move_result.moves.begin(), move_result.moves.end());
     result.merges.insert(result.merges.begin(),
                          move_result.merges.begin(), move_result.merges.end());
-    result.bomb_destroyed.insert(move_result.bomb_destroyed.begin(),
-                                  move_result.bomb_destroyed.end());
+    result.bomb_destroyed.insert(move_result.bomb_destroyed);
 
     frozen_tiles_.clear();
 
@@ -172,15 +275,17 @@ TurnResult GameEngine::process_move(const std::string& direction) {
         if (u.is_merge) result.points_gained += u.value;
     score_ += result.points_gained;
 
-    std::set<std::pair<int,int>> excluded;
-    for (const auto& m  : result.merges)  excluded.insert({m.row, m.col});
-    for (const auto& sm : slow_movers_)   if (sm.active) excluded.insert({sm.current_row, sm.current_col});
-    for (const auto& rm : random_movers_) excluded.insert({rm.row, rm.col});
+    CellSet& excluded = spawn_excluded_;
+    excluded.reset(board_.rows(), board_.cols());
+    for (const auto& m  : result.merges)  excluded.insert(m.row, m.col);
+    excluded.insert(slow_movers_.active());
+    excluded.insert(random_movers_.positions());
 
-    result.spawned_tile = board_.spawn_number(move_result.bomb_destroyed);
+    result.spawn_excluded.insert(move_result.bomb_destroyed);
+    result.spawned_tile = board_.spawn_number(result.spawn_excluded);
     if (result.spawned_tile.first >= 0) excluded.insert(result.spawned_tile);
 
-    result.passive_candidates = passive_roller_.roll(board_, result.merges, excluded);
+    passive_roller_.roll(board_, result.merges, excluded, result.passive_candidates);
 
     for (const auto& m : result.merges) {
         if (m.new_value == tar_expand_) {
@@ -211,63 +316,64 @@ TurnResult GameEngine::process_move(const std::string& direction) {
     if (snail_respawn_timer_ > 0) {
         snail_respawn_timer_--;
         if (snail_respawn_timer_ == 0 && tar_expand_ > 4096) {
-            bool has_snail = false;
-            for (int r = 0; r < board_.rows() && !has_snail; r++)
-                for (int c = 0; c < board_.cols() && !has_snail; c++)
-                    if (board_.at(r, c).is_snail()) has_snail = true;
-            if (!has_snail) {
+            if (board_.count(CellClass::SNAIL) == 0) {
                 auto pos = board_.spawn_snail();
                 if (pos.first >= 0) result.spawned_snail = pos;
                 else snail_respawn_timer_ = 1;
             }
         }
     }
-
-    return result;
 }
 
+// Inputs are recorded (recorder_) only once they have been applied, so a
+// call that throws leaves no event behind that playback could not repeat.
+
 void GameEngine::set_tile(int row, int col, int value, int passive_type) {
-    board_.at(row, col).value = value;
-    board_.at(row, col).passive = static_cast<PassiveType>(passive_type);
+    if (!is_valid_passive(passive_type)) throw std::invalid_argument("invalid passive type");
+    board_.set(row, col, value, static_cast<PassiveType>(passive_type));
+    if (recorder_) recorder_->set_tile(row, col, value, passive_type);
 }
 
 void GameEngine::assign_passive(int row, int col, int passive_type) {
-    if (!board_.at(row, col).is_numbered()) return;
-    int current = static_cast<int>(board_.at(row, col).passive);
-    board_.at(row, col).passive = static_cast<PassiveType>(current | passive_type);
+    if (!is_valid_passive(passive_type)) throw std::invalid_argument("invalid passive type");
+    if (board_.at(row, col).is_numbered()) {
+        int current = static_cast<int>(board_.passive(row, col));
+        board_.set_passive(row, col, static_cast<PassiveType>(current | passive_type));
+    }
+    if (recorder_) recorder_->assign_passive(row, col, passive_type);
 }
 
 void GameEngine::place_bomb(int row, int col) {
-    if (board_.at(row, col).is_empty()) {
-        board_.at(row, col).value = -1;
-        board_.at(row, col).passive = PassiveType::NONE;
-    }
+    if (board_.at(row, col).is_empty())
+        board_.set_code(row, col, tile_code::BOMB);
+    if (recorder_) recorder_->place_bomb(row, col);
 }
 
 void GameEngine::place_freeze(int row, int col) {
     if (board_.at(row, col).is_numbered() || board_.at(row, col).is_snail()) {
-        frozen_tiles_.insert({row, col});
+        frozen_tiles_.insert(row, col);
+        legal_moves_version_ = kNoVersion;
     }
+    if (recorder_) recorder_->place_freeze(row, col);
 }
 
 void GameEngine::clear_freeze(int row, int col) {
-    frozen_tiles_.erase({row, col});
+    frozen_tiles_.erase(row, col);
+    legal_moves_version_ = kNoVersion;
+    if (recorder_) recorder_->clear_freeze(row, col);
 }
 
 void GameEngine::switch_tiles(int r1, int c1, int r2, int c2) {
-    std::swap(board_.at(r1, c1), board_.at(r2, c2));
+    board_.swap_cells(r1, c1, r2, c2);
 
     // Drop slow mover tracking for both positions — their trajectories no longer apply.
-    slow_movers_.erase(
-        std::remove_if(slow_movers_.begin(), slow_movers_.end(),
-            [&](const SlowMoverState& sm) {
-                return (sm.current_row == r1 && sm.current_col == c1) ||
-                       (sm.current_row == r2 && sm.current_col == c2);
-            }),
-        slow_movers_.end());
+    slow_movers_.erase_at(r1, c1);
+    slow_movers_.erase_at(r2, c2);
 
-    frozen_tiles_.erase({r1, c1});
-    frozen_tiles_.erase({r2, c2});
+    frozen_tiles_.erase(r1, c1);
+    frozen_tiles_.erase(r2, c2);
+    legal_moves_version_ = kNoVersion;
+    if (recorder_) recorder_->switch_tiles(r1, c1, r2, c2);
 }
 
 std::vector<int> GameEngine::get_grid_values() const {
@@ -278,65 +384,55 @@ std::vector<std::tuple<int,int,int>> GameEngine::get_passive_map() const {
     return board_.get_passive_map();
 }
 
-std::vector<SlowMoverState> GameEngine::get_slow_movers() const {
-    return slow_movers_;
-}
-
-void GameEngine::complete_expansion(const std::string& direction) {
+void GameEngine::complete_expansion(Direction direction) {
     board_.expand(direction);
+    frozen_tiles_.resize(board_.rows(), board_.cols());
+    reserve_scratch();
 
-    if (direction == "up") {
-        for (auto& sm : slow_movers_) { sm.current_row++; sm.dest_row++; }
-        for (auto& rm : random_movers_) rm.row++;
-    } else if (direction == "left") {
-        for (auto& sm : slow_movers_) { sm.current_col++; sm.dest_col++; }
-        for (auto& rm : random_movers_) rm.col++;
-    }
+    // Expanding up or left shifts every coordinate by one.
+    const int shift_r = direction == Direction::UP, shift_c = direction == Direction::LEFT;
+    slow_movers_.resize(board_.rows(), board_.cols(), shift_r, shift_c);
+    random_movers_.resize(board_.rows(), board_.cols(), shift_r, shift_c);
 
     expand_count_++;
     if (expand_count_ == 1) {
         int wall_r, wall_c;
-        if      (direction == "down")  { wall_r = board_.rows() - 1; wall_c = board_.cols() / 2; }
-        else if (direction == "up")    { wall_r = 0;                 wall_c = board_.cols() / 2; }
-        else if (direction == "right") { wall_r = board_.rows() / 2; wall_c = board_.cols() - 1; }
+        if      (direction == Direction::DOWN)  { wall_r = board_.rows() - 1; wall_c = board_.cols() / 2; }
+        else if (direction == Direction::UP)    { wall_r = 0;                 wall_c = board_.cols() / 2; }
+        else if (direction == Direction::RIGHT) { wall_r = board_.rows() / 2; wall_c = board_.cols() - 1; }
         else                           { wall_r = board_.rows() / 2; wall_c = 0; }
-        board_.at(wall_r, wall_c).value = -3;
-        board_.at(wall_r, wall_c).passive = PassiveType::NONE;
+        board_.set_code(wall_r, wall_c, tile_code::WALL);
     } else {
         board_.spawn_wall();
     }
 
     if (tar_expand_ > 4096) {
-        bool has_snail = false;
-        for (int r = 0; r < board_.rows() && !has_snail; r++)
-            for (int c = 0; c < board_.cols() && !has_snail; c++)
-                if (board_.at(r, c).is_snail()) has_snail = true;
-        if (!has_snail) board_.spawn_snail();
+        if (board_.count(CellClass::SNAIL) == 0) board_.spawn_snail();
     }
+    if (recorder_) recorder_->expansion(direction);
 }
 
-std::vector<SlowMoverUpdate> GameEngine::advance_slow_movers() {
-    std::vector<SlowMoverUpdate> updates;
-
-    for (auto& sm : slow_movers_) {
+void GameEngine::advance_slow_movers(std::vector<SlowMoverUpdate>& updates) {
+    for (int i = 0; i < slow_movers_.size(); i++) {
+        const SlowMoverState& sm = slow_movers_[i];
         if (!sm.active) continue;
-        if (frozen_tiles_.count({sm.current_row, sm.current_col})) continue;
+        if (frozen_tiles_.test(sm.current_row, sm.current_col)) continue;
 
         int next_r = sm.current_row + sm.dr;
         int next_c = sm.current_col + sm.dc;
 
         if (sm.current_row == sm.dest_row && sm.current_col == sm.dest_col) {
-            sm.active = false;
             updates.push_back({sm.current_row, sm.current_col,
                                sm.current_row, sm.current_col, sm.value, true});
+            slow_movers_.finish(i);
             continue;
         }
 
         if (next_r < 0 || next_r >= board_.rows() ||
             next_c < 0 || next_c >= board_.cols()) {
-            sm.active = false;
             updates.push_back({sm.current_row, sm.current_col,
                                sm.current_row, sm.current_col, sm.value, true});
+            slow_movers_.finish(i);
             continue;
         }
 
@@ -344,19 +440,17 @@ std::vector<SlowMoverUpdate> GameEngine::advance_slow_movers() {
             if (board_.at(next_r, next_c).is_numbered() &&
                 board_.at(next_r, next_c).value == sm.value) {
                 int new_value = sm.value * 2;
-                board_.at(sm.current_row, sm.current_col).value = 0;
-                board_.at(sm.current_row, sm.current_col).passive = PassiveType::NONE;
-                board_.at(next_r, next_c).value = new_value;
-                board_.at(next_r, next_c).passive = combine_passives(sm.passive,
-                                                                     board_.at(next_r, next_c).passive);
-                sm.active = false;
+                board_.clear(sm.current_row, sm.current_col);
+                board_.set(next_r, next_c, new_value,
+                           combine_passives(sm.passive, board_.passive(next_r, next_c)));
                 updates.push_back({sm.current_row, sm.current_col,
                                    next_r, next_c, new_value, true, true});
+                slow_movers_.finish(i);
                 continue;
             }
-            sm.active = false;
             updates.push_back({sm.current_row, sm.current_col,
                                sm.current_row, sm.current_col, sm.value, true});
+            slow_movers_.finish(i);
             continue;
         }
 
@@ -365,81 +459,82 @@ std::vector<SlowMoverUpdate> GameEngine::advance_slow_movers() {
         update.new_row = next_r;         update.new_col = next_c;
         update.value = sm.value;
 
-        board_.at(sm.current_row, sm.current_col).value = 0;
-        board_.at(sm.current_row, sm.current_col).passive = PassiveType::NONE;
-        board_.at(next_r, next_c).value = sm.value;
-        board_.at(next_r, next_c).passive = sm.passive;
+        board_.clear(sm.current_row, sm.current_col);
+        board_.set(next_r, next_c, sm.value, sm.passive);
 
-        sm.current_row = next_r;
-        sm.current_col = next_c;
+        slow_movers_.move_to(i, next_r, next_c);
 
         update.finished = (next_r == sm.dest_row && next_c == sm.dest_col);
-        if (update.finished) sm.active = false;
+        if (update.finished) slow_movers_.finish(i);
         updates.push_back(update);
     }
 
-    slow_movers_.erase(
-        std::remove_if(slow_movers_.begin(), slow_movers_.end(),
-                       [](const SlowMoverState& sm) { return !sm.active; }),
-        slow_movers_.end());
-
-    return updates;
+    slow_movers_.remove_finished();
 }
 
-std::vector<RandomMoverUpdate> GameEngine::advance_random_movers(std::set<std::pair<int,int>>& bomb_destroyed) {
-    std::vector<RandomMoverUpdate> updates;
+void GameEngine::advance_random_movers(std::vector<RandomMoverUpdate>& updates,
+                                       CellSet& bomb_destroyed) {
+    static constexpr int kDirs[4][2] = {{-1,0},{1,0},{0,-1},{0,1}};
 
-    random_movers_.clear();
-    for (int r = 0; r < board_.rows(); r++)
-        for (int c = 0; c < board_.cols(); c++)
-            if (board_.at(r, c).is_snail())
-                random_movers_.push_back({r, c});
+    // Snails step in row-major order of their positions at the start of the
+    // turn. sync() re-sorts the ones that moved last turn, and only rebuilds
+    // the list when other writes placed or destroyed snails since.
+    random_movers_.sync(board_);
 
-    for (auto& rm : random_movers_) {
-        if (frozen_tiles_.count({rm.row, rm.col})) continue;
+    for (int i = 0; i < random_movers_.size(); ) {
+        const RandomMoverState rm = random_movers_[i];
+        if (frozen_tiles_.test(rm.row, rm.col)) { i++; continue; }
 
-        std::vector<std::pair<int,int>> valid_dirs;
-        for (auto [dr, dc] : std::vector<std::pair<int,int>>{{-1,0},{1,0},{0,-1},{0,1}}) {
-            int nr = rm.row + dr, nc = rm.col + dc;
+        int valid_dirs[4], n_valid = 0;
+        for (int d = 0; d < 4; d++) {
+            int nr = rm.row + kDirs[d][0], nc = rm.col + kDirs[d][1];
             if (nr < 0 || nr >= board_.rows() || nc < 0 || nc >= board_.cols()) continue;
             if (board_.at(nr, nc).is_empty() || board_.at(nr, nc).is_bomb())
-                valid_dirs.push_back({dr, dc});
+                valid_dirs[n_valid++] = d;
         }
-        if (valid_dirs.empty()) continue;
+        if (n_valid == 0) { i++; continue; }
 
-        std::uniform_int_distribution<int> dist(0, (int)valid_dirs.size() - 1);
-        auto [dr, dc] = valid_dirs[dist(rng_)];
+        std::uniform_int_distribution<int> dist(0, n_valid - 1);
+        int pick = valid_dirs[dist(rng_)];
+        int dr = kDirs[pick][0], dc = kDirs[pick][1];
         int new_r = rm.row + dr, new_c = rm.col + dc;
 
         RandomMoverUpdate update {rm.row, rm.col, new_r, new_c};
 
         if (board_.at(new_r, new_c).is_bomb()) {
-            board_.at(rm.row, rm.col).value = 0;
-            board_.at(new_r, new_c).value = 0;
-            bomb_destroyed.insert({new_r, new_c});
+            board_.set_value(rm.row, rm.col, 0);
+            board_.set_value(new_r, new_c, 0);
+            bomb_destroyed.insert(new_r, new_c);
+            random_movers_.erase(i);
         } else {
-            board_.at(new_r, new_c).value = -2;
-            board_.at(rm.row, rm.col).value = 0;
-            rm.row = new_r; rm.col = new_c;
+            board_.set_value(new_r, new_c, -2);
+            board_.set_value(rm.row, rm.col, 0);
+            random_movers_.move_to(i, new_r, new_c);
+            i++;
         }
         updates.push_back(update);
     }
-
-    return updates;
+    random_movers_.mark_synced(board_);
 }
 
-std::vector<RandomMoverState> GameEngine::get_random_movers() const {
-    return random_movers_;
+const std::vector<RandomMoverState>& GameEngine::get_random_movers() const {
+    random_movers_.sync(board_);
+    return random_movers_.movers();
 }
 
 bool GameEngine::has_moves() const {
-    for (int r = 0; r < board_.rows(); r++)
-        for (int c = 0; c < board_.cols(); c++)
-            if (board_.at(r, c).is_empty()) return true;
+    if (board_.count(CellClass::EMPTY) > 0) return true;
+    if (has_moves_version_ == board_.version()) return has_moves_cached_;
+    has_moves_version_ = board_.version();
+    has_moves_cached_ = find_merge_pair();
+    return has_moves_cached_;
+}
+
+bool GameEngine::find_merge_pair() const {
 
     for (int r = 0; r < board_.rows(); r++) {
         for (int c = 0; c < board_.cols(); c++) {
-            const Tile& t = board_.at(r, c);
+            Tile t = board_.at(r, c);
             if (!t.is_numbered()) continue;
             if (c + 1 < board_.cols() && board_.at(r, c+1).is_numbered() && board_.at(r, c+1).value == t.value)
                 return true;
@@ -450,62 +545,144 @@ bool GameEngine::has_moves() const {
     return false;
 }
 
-std::set<std::pair<int,int>> GameEngine::get_effective_frozen() const {
-    auto frozen = frozen_tiles_;
+void GameEngine::build_effective_frozen(CellSet& frozen, int move_dr, int move_dc) const {
+    // Starts with active slow movers + user-frozen tiles, then behaviors add their tiles.
+    frozen = frozen_tiles_;
+    frozen.insert(slow_movers_.active());
+    board_.cells(CellClass::PASSIVE).for_each([&](int r, int c) {
+        Tile tile = board_.at(r, c);
+        if (!tile.is_numbered()) return;
+        const PassiveOwner& own = owner_of(tile.passive);
+        if (!own.freeze_during_move) return;
+        frozen.insert(r, c);
+        // Freeze the same-value tile immediately behind if behavior requests it.
+        if (own.freeze_tile_behind) {
+            int br = r - move_dr, bc = c - move_dc;
+            if (br >= 0 && br < board_.rows() &&
+                bc >= 0 && bc < board_.cols() &&
+                board_.at(br, bc).is_numbered() &&
+                board_.at(br, bc).value == tile.value) {
+                frozen.insert(br, bc);
+            }
+        }
+    });
+    // Snails and walls are not added: movement freezes them itself, from
+    // the board's registries (movement::FrozenLines).
+}
+
+int GameEngine::legal_moves() const {
+    if (legal_moves_version_ == board_.version()) return legal_moves_cached_;
+    legal_moves_version_ = board_.version();
+    legal_moves_cached_ = find_legal_moves();
+    return legal_moves_cached_;
+}
+
+int GameEngine::find_legal_moves() const {
+    static constexpr Direction kDirections[] = {
+        Direction::UP, Direction::DOWN, Direction::LEFT, Direction::RIGHT};
+    static constexpr std::pair<int,int> dirs4[] = {{-1,0},{1,0},{0,-1},{0,1}};
+    constexpr int kAll = (1 << 4) - 1;
+
+    // An active slow mover that is not user-frozen reports an update on any
+    // turn, so every direction is valid.
     for (const auto& sm : slow_movers_)
-        if (sm.active) frozen.insert({sm.current_row, sm.current_col});
-    return frozen;
+        if (sm.active && !frozen_tiles_.test(sm.current_row, sm.current_col)) return kAll;
+
+    // A bomb that will detonate (before movement, or right after it next to a
+    // user-frozen tile) changes the board first; answering exactly would take
+    // a trial turn, so every direction is reported as legal.
+    bool detonation = false;
+    board_.cells(CellClass::BOMB).for_each([&](int r, int c) {
+        for (auto [dr, dc] : dirs4) {
+            int nr = r + dr, nc = c + dc;
+            if (nr < 0 || nr >= board_.rows() || nc < 0 || nc >= board_.cols()) continue;
+            Tile t = board_.at(nr, nc);
+            if (t.is_snail() || t.is_wall() ||
+                (t.is_numbered() && (owner_of(t.passive).owned() || frozen_tiles_.test(nr, nc))))
+                detonation = true;
+        }
+    });
+    if (detonation) return kAll;
+
+    // Otherwise a turn is valid exactly when regular movement changes the
+    // board, or, if it does not, when some behavior advances a tile.
+    const CellSet& active_sm_positions = slow_movers_.active();
+
+    int mask = 0;
+    for (Direction d : kDirections) {
+        const int dr = row_step(d), dc = col_step(d);
+        build_effective_frozen(legal_frozen_, dr, dc);
+        bool legal = movement::can_move(board_, d, legal_frozen_, slow_movers_.movers(), frozen_lines_);
+        AdvanceQuery query {board_, slow_movers_.movers(), frozen_tiles_, active_sm_positions, dr, dc};
+        for (const auto& b : behaviors_) {
+            if (legal) break;
+            legal = b->can_advance(query);
+        }
+        if (legal) mask |= 1 << static_cast<int>(d);
+    }
+    return mask;
 }
 
 void GameEngine::detonate_adjacent_bombs(TurnResult& result,
-                                          std::set<std::pair<int,int>>& effective_frozen,
+                                          CellSet& effective_frozen,
+                                          bool changed_only,
                                           bool check_frozen_tiles) {
-    const std::vector<std::pair<int,int>> dirs4 = {{-1,0},{1,0},{0,-1},{0,1}};
-
-    struct Detonation {
-        int br, bc, tr, tc;
-        bool target_is_snail;
-        bool target_is_wall;
-        bool needs_slow_mover_cleanup;
-        PassiveType target_passive;  // NONE means regular user-frozen tile
-    };
-    std::vector<Detonation> detonations;
+    static constexpr std::pair<int,int> dirs4[] = {{-1,0},{1,0},{0,-1},{0,1}};
 
-    for (int r = 0; r < board_.rows(); r++) {
-        for (int c = 0; c < board_.cols(); c++) {
-            if (!board_.at(r, c).is_bomb()) continue;
+    auto& detonations = detonations_;
+    detonations.clear();
+
+    // A bomb's targets depend only on its four neighbours, so after the first
+    // pass only bombs on or beside a changed cell can have gained one.
+    if (changed_only) {
+        detonation_scope_.reset(board_.rows(), board_.cols());
+        auto mark = [&](int r, int c) {
+            if (board_.at(r, c).is_bomb()) detonation_scope_.insert(r, c);
             for (auto [dr, dc] : dirs4) {
                 int nr = r + dr, nc = c + dc;
                 if (nr < 0 || nr >= board_.rows() || nc < 0 || nc >= board_.cols()) continue;
+                if (board_.at(nr, nc).is_bomb()) detonation_scope_.insert(nr, nc);
+            }
+        };
+        board_.changed().for_each(mark);
+        if (check_frozen_tiles) frozen_tiles_.for_each(mark);
+    }
+    // Writes made by this pass are what the next pass has to look at.
+    board_.clear_changed();
+
+    // Both sets iterate row-major, the order the old full scan used.
+    const CellSet& bombs = changed_only ? detonation_scope_ : board_.cells(CellClass::BOMB);
+    bombs.for_each([&](int r, int c) {
+        for (auto [dr, dc] : dirs4) {
+            int nr = r + dr, nc = c + dc;
+            if (nr < 0 || nr >= board_.rows() || nc < 0 || nc >= board_.cols()) continue;
 
-                bool is_snail = board_.at(nr, nc).is_snail();
-                bool is_wall  = board_.at(nr, nc).is_wall();
-                bool is_frozen_tile = check_frozen_tiles && !is_snail && !is_wall &&
-                                      board_.at(nr, nc).is_numbered() &&
-                                      frozen_tiles_.count({nr, nc}) > 0;
-
-                // Check if any behavior owns this tile (always detonatable when frozen).
-                bool is_behavior_tile = false;
-                bool needs_cleanup = false;
-                PassiveType target_passive = PassiveType::NONE;
-                if (!is_snail && !is_wall && board_.at(nr, nc).is_numbered()) {
-                    for (auto& b : behaviors_) {
-                        if (b->matches(board_.at(nr, nc).passive)) {
-                            is_behavior_tile = true;
-                            needs_cleanup = b->requires_slow_mover_cleanup(board_.at(nr, nc).passive);
-                            target_passive = board_.at(nr, nc).passive;
-                            break;
-                        }
-                    }
+            bool is_snail = board_.at(nr, nc).is_snail();
+            bool is_wall  = board_.at(nr, nc).is_wall();
+            bool is_frozen_tile = check_frozen_tiles && !is_snail && !is_wall &&
+                                  board_.at(nr, nc).is_numbered() &&
+                                  frozen_tiles_.test(nr, nc);
+
+            // Check if any behavior owns this tile (always detonatable when frozen).
+            bool is_behavior_tile = false;
+            bool needs_cleanup = false;
+            PassiveType target_passive = PassiveType::NONE;
+            if (!is_snail && !is_wall && board_.at(nr, nc).is_numbered()) {
+                PassiveType p = board_.passive(nr, nc);
+                const PassiveOwner& own = owner_of(p);
+                if (own.owned()) {
+                    is_behavior_tile = true;
+                    needs_cleanup = own.requires_slow_mover_cleanup;
+                    target_passive = p;
                 }
+            }
 
-                if (is_snail || is_wall || is_frozen_tile || is_behavior_tile) {
-                    detonations.push_back({r, c, nr, nc, is_snail, is_wall, needs_cleanup, target_passive});
-                    break;
-                }
+            if (is_snail || is_wall || is_frozen_tile || is_behavior_tile) {
+                detonations.push_back({r, c, nr, nc, is_snail, is_wall, needs_cleanup, target_passive});
+                break;
             }
         }
-    }
+    });
 
     for (auto& det : detonations) {
         if (!board_.at(det.br, det.bc).is_bomb()) continue;
@@ -522,36 +699,29 @@ void GameEngine::detonate_adjacent_bombs(TurnResult& result,
         } else {
             // Regular user-frozen tile.
             target_ok = board_.at(det.tr, det.tc).is_numbered() &&
-                        frozen_tiles_.count({det.tr, det.tc}) > 0;
+                        frozen_tiles_.test(det.tr, det.tc);
         }
         if (!target_ok) continue;
 
-        board_.at(det.br, det.bc).value = 0;
-        board_.at(det.tr, det.tc).value = 0;
-        board_.at(det.tr, det.tc).passive = PassiveType::NONE;
-        result.bomb_destroyed.insert({det.br, det.bc});
-        result.bomb_destroyed.insert({det.tr, det.tc});
-        effective_frozen.erase({det.tr, det.tc});
-        frozen_tiles_.erase({det.tr, det.tc});
-
-        if (det.needs_slow_mover_cleanup) {
-            slow_movers_.erase(
-                std::remove_if(slow_movers_.begin(), slow_movers_.end(),
-                    [&det](const SlowMoverState& sm) {
-                        return sm.current_row == det.tr && sm.current_col == det.tc;
-                    }),
-                slow_movers_.end());
-        }
+        board_.set_value(det.br, det.bc, 0);
+        board_.clear(det.tr, det.tc);
+        result.bomb_destroyed.insert(det.br, det.bc);
+        result.bomb_destroyed.insert(det.tr, det.tc);
+        effective_frozen.erase(det.tr, det.tc);
+        frozen_tiles_.erase(det.tr, det.tc);
+
+        if (det.needs_slow_mover_cleanup)
+            slow_movers_.erase_at(det.tr, det.tc);
 
         if (det.target_is_snail)
-            result.snail_bomb_kills.insert({det.tr, det.tc});
+            result.snail_bomb_kills.insert(det.tr, det.tc);
     }
 }
 
 void GameEngine::cascade_fill_behind(
     int empty_r, int empty_c,
     int dr, int dc,
-    const std::set<std::pair<int,int>>& skip,
+    const CellSet& skip,
     std::vector<MoveInfo>& out_moves)
 {
     int fill_r = empty_r, fill_c = empty_c;
@@ -560,25 +730,17 @@ void GameEngine::cascade_fill_behind(
         if (check_r < 0 || check_r >= board_.rows() ||
             check_c < 0 || check_c >= board_.cols()) break;
 
-        const Tile& ct = board_.at(check_r, check_c);
+        Tile ct = board_.at(check_r, check_c);
         if (!ct.is_numbered()) break;
 
         // Stop at any tile owned by a behavior (special tiles don't cascade-slide).
-        bool blocks = false;
-        for (auto& b : behaviors_) {
-            if (b->matches(ct.passive) && b->blocks_cascade()) {
-                blocks = true;
-                break;
-            }
-        }
-        if (blocks) break;
-        if (skip.count({check_r, check_c})) break;
-        if (frozen_tiles_.count({check_r, check_c})) break;
+        if (owner_of(ct.passive).blocks_cascade) break;
+        if (skip.test(check_r, check_c)) break;
+        if (frozen_tiles_.test(check_r, check_c)) break;
 
         Tile saved = ct;
-        board_.at(check_r, check_c).value = 0;
-        board_.at(check_r, check_c).passive = PassiveType::NONE;
-        board_.at(fill_r, fill_c) = saved;
+        board_.clear(check_r, check_c);
+        board_.set(fill_r, fill_c, saved);
 
         out_moves.push_back({check_r, check_c, fill_r, fill_c, saved.value});
 
@@ -586,3 +748,61 @@ void GameEngine::cascade_fill_behind(
         fill_c = check_c;
     }
 }
+
+std::uint64_t GameEngine::state_hash() const {
+    return hash_under(0);
+}
+
+std::uint64_t GameEngine::canonical_hash() const {
+    const int symmetries = board_.rows() == board_.cols() ? 8 : 4;
+    std::uint64_t best = hash_under(0);
+    for (int sym = 1; sym < symmetries; sym++)
+        best = std::min(best, hash_under(sym));
+    return best;
+}
+
+std::uint64_t GameEngine::hash_under(int sym) const {
+    using zobrist::field;
+    using zobrist::Part;
+    const bool transpose = sym & 4, flip_r = sym & 2, flip_c = sym & 1;
+    const int rows = board_.rows(), cols = board_.cols();
+    auto map = [&](int r, int c) {
+        if (flip_r) r = rows - 1 - r;
+        if (flip_c) c = cols - 1 - c;
+        return transpose ? std::make_pair(c, r) : std::make_pair(r, c);
+    };
+
+    std::uint64_t h = 0;
+    if (sym == 0) {
+        h = board_.hash();
+    } else {
+        for (int r = 0; r < rows; r++) {
+            for (int c = 0; c < cols; c++) {
+                auto [tr, tc] = map(r, c);
+                h ^= zobrist::cell_key(tr, tc, board_.code(r, c),
+                                       static_cast<std::uint8_t>(board_.passive(r, c)));
+            }
+        }
+    }
+
+    h ^= zobrist::part_key(Part::DIMENSIONS, field(transpose ? cols : rows, 16) |
+                                            field(transpose ? rows : cols, 0));
+    frozen_tiles_.for_each([&](int r, int c) {
+        auto [tr, tc] = map(r, c);
+        h ^= zobrist::part_key(Part::FROZEN, field(tr, 16) | field(tc, 0));
+    });
+    for (const auto& sm : slow_movers_) {
+        if (!sm.active) continue;
+        auto [cr, cc] = map(sm.current_row, sm.current_col);
+        auto [dest_r, dest_c] = map(sm.dest_row, sm.dest_col);
+        int step_r = flip_r ? -sm.dr : sm.dr, step_c = flip_c ? -sm.dc : sm.dc;
+        if (transpose) std::swap(step_r, step_c);
+        h ^= zobrist::part_key(Part::SLOW_MOVER,
+                               (field(cr, 48) | field(cc, 32) | field(dest_r, 16) | field(dest_c, 0)) ^
+                               zobrist::mix(field(step_r, 16) | field(step_c, 0)));
+    }
+    h ^= zobrist::part_key(Part::COUNTERS, (static_cast<std::uint64_t>(tar_expand_) << 32) |
+                                          field(expand_count_, 16) |
+                                          field(snail_respawn_timer_, 0));
+    return h;
+}
@@ -5,299 +5,274 @@
 //riverknuuttila2@outlook.com
 
 #include "movement.h"
+#include "thread_pool.h"
 #include <algorithm>
 
 namespace {
 
-// Split a range [0, size) into segments separated by frozen positions.
-// Each segment is [start, end) — a half-open interval.
-std::vector<std::pair<int,int>> get_segments(int size, const std::set<int>& frozen_positions) {
-    std::vector<std::pair<int,int>> segments;
-    int seg_start = -1;
-    for (int idx = 0; idx < size; idx++) {
-        if (frozen_positions.count(idx)) {
-            if (seg_start >= 0) {
-                segments.push_back({seg_start, idx});
-                seg_start = -1;
+// ─── Table-driven fast path ───
+//
+// Segments (runs of unfrozen cells) with no passives and only plain numbered
+// tiles resolve through a precomputed move table, like the classic 2048 row
+// tables. Cells are packed wall-first (the segment's first cell is the one
+// nearest the wall it compacts toward), one exponent nibble each, so one table
+// serves all four directions and every segment up to kTableWidth cells: a
+// whole short line, or a short run between frozen cells of any line. Shorter
+// segments leave the far nibbles empty.
+
+constexpr int kTableWidth = 4;
+constexpr TileCode kTableMaxCode = 14;  // a merge of two 14s must still fit a nibble
+
+struct LineMove {
+    std::uint16_t result;  // packed exponents after compaction
+    std::uint8_t dest;     // 2 bits per source cell: index it ends up at
+    std::uint8_t merged;   // bit k: source k is the second tile of a merged pair
+};
+
+const std::vector<LineMove>& line_table() {
+    static const std::vector<LineMove> table = [] {
+        std::vector<LineMove> t(1u << (4 * kTableWidth));
+        for (unsigned key = 0; key < t.size(); key++) {
+            int exps[kTableWidth], idxs[kTableWidth], n = 0;
+            for (int k = 0; k < kTableWidth; k++) {
+                int e = (key >> (4 * k)) & 0xF;
+                if (e) { exps[n] = e; idxs[n] = k; n++; }
             }
-        } else {
-            if (seg_start < 0) {
-                seg_start = idx;
+            LineMove m {0, 0, 0};
+            int target = 0;
+            for (int j = 0; j < n; target++) {
+                if (j + 1 < n && exps[j] == exps[j + 1]) {
+                    m.result |= (exps[j] + 1) << (4 * target);
+                    m.dest |= target << (2 * idxs[j]);
+                    m.dest |= target << (2 * idxs[j + 1]);
+                    m.merged |= 1 << idxs[j + 1];
+                    j += 2;
+                } else {
+                    m.result |= exps[j] << (4 * target);
+                    m.dest |= target << (2 * idxs[j]);
+                    j++;
+                }
             }
+            t[key] = m;
         }
-    }
-    if (seg_start >= 0) {
-        segments.push_back({seg_start, size});
-    }
-    return segments;
+        return t;
+    }();
+    return table;
 }
 
-struct TileEntry {
-    int value;
-    int orig;  // original position index
-    PassiveType passive;
+// Cell k of a line is (r0 + k*dr, c0 + k*dc); k = 0 is the wall side.
+struct Line {
+    int r0, c0, dr, dc;
 };
 
-// ─── Horizontal segment processors ───
+// A line's cells as the compactors see them, read and written straight on
+// the board...
+class BoardCells {
+public:
+    BoardCells(Board& board, const Line& line) : board_(board), line_(line) {}
+    TileCode code(int k) const { return board_.code(row(k), col(k)); }
+    PassiveType passive(int k) const { return board_.passive(row(k), col(k)); }
+    void set(int k, TileCode code, PassiveType passive) { board_.set_code(row(k), col(k), code, passive); }
+    void clear(int k) { board_.clear(row(k), col(k)); }
+
+private:
+    Board& board_;
+    const Line& line_;
+    int row(int k) const { return line_.r0 + k * line_.dr; }
+    int col(int k) const { return line_.c0 + k * line_.dc; }
+};
 
-// Compact tiles left within a segment. Returns new values left-to-right.
-std::vector<TileEntry> process_segment_left(
-    const std::vector<TileEntry>& tiles, int row_idx, int seg_start,
-    std::vector<MoveInfo>& moves, std::vector<MergeInfo>& merges,
-    std::set<std::pair<int,int>>& bomb_destroyed,
-    Board& board)
+// ...or in a wall-first copy of the line, which is written back to the board
+// afterwards (the parallel path, where workers must not write the board).
+class BufferCells {
+public:
+    BufferCells(TileCode* codes, PassiveType* passives) : codes_(codes), passives_(passives) {}
+    TileCode code(int k) const { return codes_[k]; }
+    PassiveType passive(int k) const { return passives_[k]; }
+    void set(int k, TileCode code, PassiveType passive) { codes_[k] = code; passives_[k] = passive; }
+    void clear(int k) { set(k, tile_code::EMPTY, PassiveType::NONE); }
+
+private:
+    TileCode* codes_;
+    PassiveType* passives_;
+};
+
+// Resolve cells [a, b) of a line through the move table. Returns false
+// (leaving the cells untouched) when the segment is not eligible for the fast
+// path. Moves and merges come out in the order compact_segment reports them.
+template <typename Cells>
+bool try_table_segment(Cells& cells, const Line& line, int a, int b,
+                       std::vector<MoveInfo>& moves, std::vector<MergeInfo>& merges)
 {
-    std::vector<TileEntry> new_vals;
-    int j = 0;
-    int target = seg_start;
-
-    while (j < (int)tiles.size()) {
-        int value = tiles[j].value;
-        int orig = tiles[j].orig;
-        PassiveType passive = tiles[j].passive;
-
-        if (value == -1) {
-            // Bomb tile
-            if (j < (int)tiles.size() - 1) {
-                // Bomb destroys next tile
-                if (orig != target)
-                    moves.push_back({row_idx, orig, row_idx, target, value});
-                if (tiles[j+1].orig != target)
-                    moves.push_back({row_idx, tiles[j+1].orig, row_idx, target, tiles[j+1].value});
-                bomb_destroyed.insert({row_idx, target});
-                j += 2;
-            } else {
-                // Bomb is last tile, just moves
-                new_vals.push_back({value, target, PassiveType::NONE});
-                if (orig != target)
-                    moves.push_back({row_idx, orig, row_idx, target, value});
-                j++;
-                target++;
-            }
-        } else if (j < (int)tiles.size() - 1 && tiles[j+1].value == -1) {
-            // Next tile is bomb, destroys this tile
-            if (orig != target)
-                moves.push_back({row_idx, orig, row_idx, target, value});
-            if (tiles[j+1].orig != target)
-                moves.push_back({row_idx, tiles[j+1].orig, row_idx, target, tiles[j+1].value});
-            bomb_destroyed.insert({row_idx, target});
-            j += 2;
-        } else if (j < (int)tiles.size() - 1 && value == tiles[j+1].value && value > 0) {
-            // Merge with next tile
-            int new_value = value * 2;
-            // Passive inheritance: merged tile carries both tiles' passives
-            PassiveType merged_passive = combine_passives(passive, tiles[j+1].passive);
-            new_vals.push_back({new_value, target, merged_passive});
-            if (orig != target)
-                moves.push_back({row_idx, orig, row_idx, target, value});
-            if (tiles[j+1].orig != target)
-                moves.push_back({row_idx, tiles[j+1].orig, row_idx, target, tiles[j+1].value});
-            merges.push_back({row_idx, target, new_value});
-            j += 2;
-            target++;
-        } else {
-            // Just move
-            new_vals.push_back({value, target, passive});
-            if (orig != target)
-                moves.push_back({row_idx, orig, row_idx, target, value});
-            j++;
-            target++;
-        }
+    const int width = b - a;
+    if (width > kTableWidth) return false;
+
+    unsigned key = 0;
+    for (int k = 0; k < width; k++) {
+        TileCode code = cells.code(a + k);
+        if (code > kTableMaxCode || cells.passive(a + k) != PassiveType::NONE) return false;
+        key |= unsigned(code) << (4 * k);
+    }
+
+    const LineMove& m = line_table()[key];
+    for (int k = 0; k < width; k++) {
+        int code = (key >> (4 * k)) & 0xF;
+        if (!code) continue;
+        int d = (m.dest >> (2 * k)) & 3;
+        int r = line.r0 + (a + k) * line.dr, c = line.c0 + (a + k) * line.dc;
+        int dest_r = line.r0 + (a + d) * line.dr, dest_c = line.c0 + (a + d) * line.dc;
+        if (d != k)
+            moves.push_back({r, c, dest_r, dest_c, 1 << code});
+        if ((m.merged >> k) & 1)
+            merges.push_back({dest_r, dest_c, 1 << (code + 1)});
     }
-    return new_vals;
+
+    if (m.result != key) {
+        for (int k = 0; k < width; k++)
+            cells.set(a + k, (m.result >> (4 * k)) & 0xF, PassiveType::NONE);
+    }
+    return true;
 }
 
-std::vector<TileEntry> process_segment_right(
-    const std::vector<TileEntry>& tiles, int row_idx, int seg_end,
-    std::vector<MoveInfo>& moves, std::vector<MergeInfo>& merges,
-    std::set<std::pair<int,int>>& bomb_destroyed,
-    Board& board)
+// Compact cells [a, b) of a line toward its wall (line cell 0), in place.
+// Reads always run ahead of the write position, and every cell is written at
+// most once: [a, target) with final tiles, then [target, b) cleared. Moves and
+// merges are reported in the same order the old per-direction processors used.
+template <typename Cells>
+void compact_segment(Cells& cells, const Line& line, int a, int b, MoveResult& out)
 {
-    std::vector<TileEntry> new_vals;
-    int j = (int)tiles.size() - 1;
-    int target = seg_end - 1;
-
-    while (j >= 0) {
-        int value = tiles[j].value;
-        int orig = tiles[j].orig;
-        PassiveType passive = tiles[j].passive;
-
-        if (value == -1) {
-            if (j > 0) {
-                if (orig != target)
-                    moves.push_back({row_idx, orig, row_idx, target, value});
-                if (tiles[j-1].orig != target)
-                    moves.push_back({row_idx, tiles[j-1].orig, row_idx, target, tiles[j-1].value});
-                bomb_destroyed.insert({row_idx, target});
-                j -= 2;
-            } else {
-                new_vals.insert(new_vals.begin(), {value, target, PassiveType::NONE});
-                if (orig != target)
-                    moves.push_back({row_idx, orig, row_idx, target, value});
-                j--;
-                target--;
+    auto row = [&](int k) { return line.r0 + k * line.dr; };
+    auto col = [&](int k) { return line.c0 + k * line.dc; };
+    auto next_tile = [&](int k) {
+        while (k < b && cells.code(k) == tile_code::EMPTY) k++;
+        return k;
+    };
+
+    int target = a;
+    int j = next_tile(a);
+    while (j < b) {
+        int r = row(j), c = col(j);
+        int tr = row(target), tc = col(target);
+        TileCode code = cells.code(j);
+        PassiveType passive = cells.passive(j);
+        int value = tile_code::decode(code);
+        int n = next_tile(j + 1);
+
+        if (n < b) {
+            int nr = row(n), nc = col(n);
+            TileCode next_code = cells.code(n);
+            // A bomb destroys its neighbour; equal numbered tiles merge.
+            bool bomb = code == tile_code::BOMB || next_code == tile_code::BOMB;
+            bool merge = !bomb && code == next_code && tile_code::is_numbered(code);
+            if (bomb || merge) {
+                if (j != target) out.moves.push_back({r, c, tr, tc, value});
+                if (n != target) out.moves.push_back({nr, nc, tr, tc, tile_code::decode(next_code)});
+                if (bomb) {
+                    out.bomb_destroyed.insert(tr, tc);
+                } else {
+                    // Passive inheritance: merged tile carries both tiles' passives.
+                    cells.set(target, code + 1, combine_passives(passive, cells.passive(n)));
+                    out.merges.push_back({tr, tc, value * 2});
+                    target++;
+                }
+                j = next_tile(n + 1);
+                continue;
             }
-        } else if (j > 0 && tiles[j-1].value == -1) {
-            if (orig != target)
-                moves.push_back({row_idx, orig, row_idx, target, value});
-            if (tiles[j-1].orig != target)
-                moves.push_back({row_idx, tiles[j-1].orig, row_idx, target, tiles[j-1].value});
-            bomb_destroyed.insert({row_idx, target});
-            j -= 2;
-        } else if (j > 0 && value == tiles[j-1].value && value > 0) {
-            int new_value = value * 2;
-            PassiveType merged_passive = combine_passives(passive, tiles[j-1].passive);
-            new_vals.insert(new_vals.begin(), {new_value, target, merged_passive});
-            if (orig != target)
-                moves.push_back({row_idx, orig, row_idx, target, value});
-            if (tiles[j-1].orig != target)
-                moves.push_back({row_idx, tiles[j-1].orig, row_idx, target, tiles[j-1].value});
-            merges.push_back({row_idx, target, new_value});
-            j -= 2;
-            target--;
-        } else {
-            new_vals.insert(new_vals.begin(), {value, target, passive});
-            if (orig != target)
-                moves.push_back({row_idx, orig, row_idx, target, value});
-            j--;
-            target--;
         }
+
+        // Just move (a trailing bomb moves too, without passives).
+        cells.set(target, code, code == tile_code::BOMB ? PassiveType::NONE : passive);
+        if (j != target) out.moves.push_back({r, c, tr, tc, value});
+        target++;
+        j = n;
     }
-    return new_vals;
+    for (int k = target; k < b; k++)
+        cells.clear(k);
 }
 
-// ─── Vertical segment processors ───
+// Compact one segment of a line: the table when the segment qualifies, the
+// segment compactor otherwise.
+template <typename Cells>
+void compact_run(Cells& cells, const Line& line, int a, int b, MoveResult& out)
+{
+    if (!try_table_segment(cells, line, a, b, out.moves, out.merges))
+        compact_segment(cells, line, a, b, out);
+}
 
-std::vector<TileEntry> process_segment_up(
-    const std::vector<TileEntry>& tiles, int col_idx, int seg_start,
-    std::vector<MoveInfo>& moves, std::vector<MergeInfo>& merges,
-    std::set<std::pair<int,int>>& bomb_destroyed,
-    Board& board)
+// Would compact_segment change anything? True when a tile has an empty cell
+// between it and the segment's wall end, or when two consecutive tiles merge
+// or meet a bomb.
+bool segment_can_move(const Board& board, const Line& line, int a, int b)
 {
-    std::vector<TileEntry> new_vals;
-    int i = 0;
-    int target = seg_start;
-
-    while (i < (int)tiles.size()) {
-        int value = tiles[i].value;
-        int orig = tiles[i].orig;
-        PassiveType passive = tiles[i].passive;
-
-        if (value == -1) {
-            if (i < (int)tiles.size() - 1) {
-                if (orig != target)
-                    moves.push_back({orig, col_idx, target, col_idx, value});
-                if (tiles[i+1].orig != target)
-                    moves.push_back({tiles[i+1].orig, col_idx, target, col_idx, tiles[i+1].value});
-                bomb_destroyed.insert({target, col_idx});
-                i += 2;
-            } else {
-                new_vals.push_back({value, target, PassiveType::NONE});
-                if (orig != target)
-                    moves.push_back({orig, col_idx, target, col_idx, value});
-                i++;
-                target++;
-            }
-        } else if (i < (int)tiles.size() - 1 && tiles[i+1].value == -1) {
-            if (orig != target)
-                moves.push_back({orig, col_idx, target, col_idx, value});
-            if (tiles[i+1].orig != target)
-                moves.push_back({tiles[i+1].orig, col_idx, target, col_idx, tiles[i+1].value});
-            bomb_destroyed.insert({target, col_idx});
-            i += 2;
-        } else if (i < (int)tiles.size() - 1 && value == tiles[i+1].value && value > 0) {
-            int new_value = value * 2;
-            PassiveType merged_passive = combine_passives(passive, tiles[i+1].passive);
-            new_vals.push_back({new_value, target, merged_passive});
-            if (orig != target)
-                moves.push_back({orig, col_idx, target, col_idx, value});
-            if (tiles[i+1].orig != target)
-                moves.push_back({tiles[i+1].orig, col_idx, target, col_idx, tiles[i+1].value});
-            merges.push_back({target, col_idx, new_value});
-            i += 2;
-            target++;
-        } else {
-            new_vals.push_back({value, target, passive});
-            if (orig != target)
-                moves.push_back({orig, col_idx, target, col_idx, value});
-            i++;
-            target++;
-        }
+    TileCode prev = tile_code::EMPTY;
+    bool gap = false;
+    for (int k = a; k < b; k++) {
+        TileCode code = board.code(line.r0 + k * line.dr, line.c0 + k * line.dc);
+        if (code == tile_code::EMPTY) { gap = true; continue; }
+        if (gap) return true;
+        if (prev != tile_code::EMPTY &&
+            (prev == tile_code::BOMB || code == tile_code::BOMB ||
+             (prev == code && tile_code::is_numbered(code))))
+            return true;
+        prev = code;
     }
-    return new_vals;
+    return false;
 }
 
-std::vector<TileEntry> process_segment_down(
-    const std::vector<TileEntry>& tiles, int col_idx, int seg_end,
-    std::vector<MoveInfo>& moves, std::vector<MergeInfo>& merges,
-    std::set<std::pair<int,int>>& bomb_destroyed,
-    Board& board)
+// First cell k in [from, len) of a line whose frozen bit equals `frozen`,
+// or len if there is none. Scans a word at a time.
+int next_cell(const std::uint64_t* bits, int words, int from, int len, bool frozen)
 {
-    std::vector<TileEntry> new_vals;
-    int i = (int)tiles.size() - 1;
-    int target = seg_end - 1;
-
-    while (i >= 0) {
-        int value = tiles[i].value;
-        int orig = tiles[i].orig;
-        PassiveType passive = tiles[i].passive;
-
-        if (value == -1) {
-            if (i > 0) {
-                if (orig != target)
-                    moves.push_back({orig, col_idx, target, col_idx, value});
-                if (tiles[i-1].orig != target)
-                    moves.push_back({tiles[i-1].orig, col_idx, target, col_idx, tiles[i-1].value});
-                bomb_destroyed.insert({target, col_idx});
-                i -= 2;
-            } else {
-                new_vals.insert(new_vals.begin(), {value, target, PassiveType::NONE});
-                if (orig != target)
-                    moves.push_back({orig, col_idx, target, col_idx, value});
-                i--;
-                target--;
-            }
-        } else if (i > 0 && tiles[i-1].value == -1) {
-            if (orig != target)
-                moves.push_back({orig, col_idx, target, col_idx, value});
-            if (tiles[i-1].orig != target)
-                moves.push_back({tiles[i-1].orig, col_idx, target, col_idx, tiles[i-1].value});
-            bomb_destroyed.insert({target, col_idx});
-            i -= 2;
-        } else if (i > 0 && value == tiles[i-1].value && value > 0) {
-            int new_value = value * 2;
-            PassiveType merged_passive = combine_passives(passive, tiles[i-1].passive);
-            new_vals.insert(new_vals.begin(), {new_value, target, merged_passive});
-            if (orig != target)
-                moves.push_back({orig, col_idx, target, col_idx, value});
-            if (tiles[i-1].orig != target)
-                moves.push_back({tiles[i-1].orig, col_idx, target, col_idx, tiles[i-1].value});
-            merges.push_back({target, col_idx, new_value});
-            i -= 2;
-            target--;
-        } else {
-            new_vals.insert(new_vals.begin(), {value, target, passive});
-            if (orig != target)
-                moves.push_back({orig, col_idx, target, col_idx, value});
-            i--;
-            target--;
-        }
+    if (from >= len) return len;
+    int w = from >> 6;
+    std::uint64_t word = (frozen ? bits[w] : ~bits[w]) & (~std::uint64_t(0) << (from & 63));
+    while (!word) {
+        if (++w >= words) return len;
+        word = frozen ? bits[w] : ~bits[w];
     }
-    return new_vals;
+    return std::min(w * 64 + __builtin_ctzll(word), len);
 }
 
-// Build the combined frozen set from explicit frozen tiles + slow mover positions
-std::set<std::pair<int,int>> build_frozen_set(
-    const std::set<std::pair<int,int>>& frozen,
-    const std::vector<SlowMoverState>& slow_movers)
+// The lines a direction compacts: rows for LEFT/RIGHT, columns for UP/DOWN.
+struct LineSet {
+    bool horizontal;
+    bool reversed;  // right and down compact toward the high end of the line
+    int rows, cols;
+    int lines, len;
+
+    LineSet(const Board& board, Direction direction)
+        : horizontal(direction == Direction::LEFT || direction == Direction::RIGHT),
+          reversed(direction == Direction::RIGHT || direction == Direction::DOWN),
+          rows(board.rows()), cols(board.cols()),
+          lines(horizontal ? rows : cols), len(horizontal ? cols : rows) {}
+
+    Line line(int i) const {
+        return horizontal ? (reversed ? Line{i, cols - 1, 0, -1} : Line{i, 0, 0, 1})
+                          : (reversed ? Line{rows - 1, i, -1, 0} : Line{0, i, 1, 0});
+    }
+};
+
+// Call f(line, a, b) for every run of non-frozen cells [a, b) of line i, in
+// line-cell coordinates (cell 0 is the wall side), top/left run first
+// whatever the direction (the order moves have always been reported in).
+// `index` must have been built for this orientation. f returns false to stop
+// early; for_each_segment then returns false too.
+template <typename F>
+bool for_each_segment(const LineSet& set, const movement::FrozenLines& index, int i, F&& f)
 {
-    auto combined = frozen;
-    for (const auto& sm : slow_movers) {
-        if (sm.active) {
-            combined.insert({sm.current_row, sm.current_col});
-        }
+    const int len = set.len, words = index.words();
+    const Line line = set.line(i);
+    const std::uint64_t* bits = index.line(i);
+
+    for (int s = next_cell(bits, words, 0, len, false); s < len;
+         s = next_cell(bits, words, s, len, false)) {
+        int e = next_cell(bits, words, s + 1, len, true);
+        int a = set.reversed ? len - e : s;
+        int b = set.reversed ? len - s : e;
+        if (!f(line, a, b)) return false;
+        s = e;
     }
-    return combined;
+    return true;
 }
 
 } // anonymous namespace
@@ -305,189 +280,205 @@ std::set<std::pair<int,int>> build_frozen_set(
 
 namespace movement {
 
-MoveResult move_left(Board& board,
-                     const std::set<std::pair<int,int>>& frozen,
-                     const std::vector<SlowMoverState>& slow_movers)
+void FrozenLines::build(const Board& board, bool horizontal,
+                        const CellSet& frozen,
+                        const std::vector<SlowMoverState>& slow_movers)
 {
-    auto effective_frozen = build_frozen_set(frozen, slow_movers);
-    MoveResult result;
-    int rows = board.rows();
-    int cols = board.cols();
+    const int rows = board.rows(), cols = board.cols();
+    const int lines = horizontal ? rows : cols;
+    words_ = ((horizontal ? cols : rows) + 63) / 64;
+    const size_t size = static_cast<size_t>(lines) * words_;
+
+    auto mark = [&](std::vector<std::uint64_t>& bits, int r, int c) {
+        if (r < 0 || r >= rows || c < 0 || c >= cols) return;
+        int i = horizontal ? r : c, k = horizontal ? c : r;
+        bits[static_cast<size_t>(i) * words_ + (k >> 6)] |= std::uint64_t(1) << (k & 63);
+    };
+
+    Layer& statics = statics_[horizontal];
+    if (statics.stamp != board.obstacle_stamp()) {
+        statics.stamp = board.obstacle_stamp();
+        statics.bits.assign(size, 0);
+        auto add = [&](int r, int c) { mark(statics.bits, r, c); };
+        board.cells(CellClass::WALL).for_each(add);
+        board.cells(CellClass::SNAIL).for_each(add);
+    }
 
-    // Save original grid for change detection
-    auto original = board.to_flat_values();
+    bits_.assign(statics.bits.begin(), statics.bits.end());
+    frozen.for_each([&](int r, int c) { mark(bits_, r, c); });
+    for (const auto& sm : slow_movers)
+        if (sm.active) mark(bits_, sm.current_row, sm.current_col);
+}
 
-    for (int i = 0; i < rows; i++) {
-        std::set<int> frozen_cols;
-        for (const auto& [fr, fc] : effective_frozen) {
-            if (fr == i) frozen_cols.insert(fc);
-        }
-        auto segments = get_segments(cols, frozen_cols);
+LineWorkers::LineWorkers(int threads, int min_cells)
+    : pool_(std::make_unique<ThreadPool>(threads)),
+      min_cells_(min_cells)
+{
+}
 
-        for (auto [seg_start, seg_end] : segments) {
-            std::vector<TileEntry> seg_tiles;
-            for (int j = seg_start; j < seg_end; j++) {
-                if (!board.at(i, j).is_empty()) {
-                    seg_tiles.push_back({board.at(i, j).value, j, board.at(i, j).passive});
-                }
+LineWorkers::~LineWorkers() = default;
+
+int LineWorkers::threads() const { return pool_->threads(); }
+
+void LineWorkers::compact(Board& board, Direction direction, const FrozenLines& index, MoveResult& out) {
+    const LineSet set(board, direction);
+    // A few blocks per thread, so uneven lines balance out.
+    const int n_blocks = std::min(set.lines, threads() * 4);
+    const int per_block = (set.lines + n_blocks - 1) / n_blocks;
+    if (blocks_.size() < static_cast<size_t>(n_blocks)) blocks_.resize(n_blocks);
+
+    // Workers only read the board: each compacts its lines into a copy.
+    auto job = [&](int, int item) {
+        Block& block = blocks_[item];
+        const int first = item * per_block, last = std::min(set.lines, first + per_block);
+        const size_t cells = static_cast<size_t>(std::max(last - first, 0)) * set.len;
+        block.out.moves.clear();
+        block.out.merges.clear();
+        block.out.bomb_destroyed.reset(set.rows, set.cols);
+        block.codes.resize(cells);
+        block.passives.resize(cells);
+        for (int i = first; i < last; i++) {
+            const Line line = set.line(i);
+            TileCode* codes = block.codes.data() + static_cast<size_t>(i - first) * set.len;
+            PassiveType* passives = block.passives.data() + static_cast<size_t>(i - first) * set.len;
+            for (int k = 0; k < set.len; k++) {
+                int r = line.r0 + k * line.dr, c = line.c0 + k * line.dc;
+                codes[k] = board.code(r, c);
+                passives[k] = board.passive(r, c);
             }
-            auto new_vals = process_segment_left(seg_tiles, i, seg_start,
-                                                  result.moves, result.merges,
-                                                  result.bomb_destroyed, board);
-            for (int idx = 0; idx < seg_end - seg_start; idx++) {
-                int col = seg_start + idx;
-                if (idx < (int)new_vals.size()) {
-                    board.at(i, col).value = new_vals[idx].value;
-                    board.at(i, col).passive = new_vals[idx].passive;
-                } else {
-                    board.at(i, col).value = 0;
-                    board.at(i, col).passive = PassiveType::NONE;
-                }
+            BufferCells buffer(codes, passives);
+            for_each_segment(set, index, i, [&](const Line& l, int a, int b) {
+                compact_run(buffer, l, a, b, block.out);
+                return true;
+            });
+        }
+    };
+    pool_->parallel_for(n_blocks, job);
+
+    // Merged in line order: the records come out as the serial path writes
+    // them, and every changed cell is written once, as it would be there.
+    for (int item = 0; item < n_blocks; item++) {
+        const Block& block = blocks_[item];
+        const int first = item * per_block, last = std::min(set.lines, first + per_block);
+        out.moves.insert(out.moves.end(), block.out.moves.begin(), block.out.moves.end());
+        out.merges.insert(out.merges.end(), block.out.merges.begin(), block.out.merges.end());
+        out.bomb_destroyed.insert(block.out.bomb_destroyed);
+        for (int i = first; i < last; i++) {
+            const Line line = set.line(i);
+            const size_t base = static_cast<size_t>(i - first) * set.len;
+            for (int k = 0; k < set.len; k++) {
+                int r = line.r0 + k * line.dr, c = line.c0 + k * line.dc;
+                TileCode code = block.codes[base + k];
+                PassiveType passive = block.passives[base + k];
+                if (code != board.code(r, c) || passive != board.passive(r, c))
+                    board.set_code(r, c, code, passive);
             }
         }
     }
-
-    result.board_changed = (original != board.to_flat_values());
-    return result;
 }
 
-MoveResult move_right(Board& board,
-                      const std::set<std::pair<int,int>>& frozen,
-                      const std::vector<SlowMoverState>& slow_movers)
+void move_into(Board& board, Direction direction,
+               const CellSet& frozen,
+               const std::vector<SlowMoverState>& slow_movers,
+               FrozenLines& lines, MoveResult& out,
+               LineWorkers* workers)
 {
-    auto effective_frozen = build_frozen_set(frozen, slow_movers);
-    MoveResult result;
-    int rows = board.rows();
-    int cols = board.cols();
-
-    auto original = board.to_flat_values();
-
-    for (int i = 0; i < rows; i++) {
-        std::set<int> frozen_cols;
-        for (const auto& [fr, fc] : effective_frozen) {
-            if (fr == i) frozen_cols.insert(fc);
-        }
-        auto segments = get_segments(cols, frozen_cols);
-
-        for (auto [seg_start, seg_end] : segments) {
-            std::vector<TileEntry> seg_tiles;
-            for (int j = seg_start; j < seg_end; j++) {
-                if (!board.at(i, j).is_empty()) {
-                    seg_tiles.push_back({board.at(i, j).value, j, board.at(i, j).passive});
-                }
-            }
-            auto new_vals = process_segment_right(seg_tiles, i, seg_end,
-                                                   result.moves, result.merges,
-                                                   result.bomb_destroyed, board);
-            int seg_len = seg_end - seg_start;
-            for (int idx = 0; idx < seg_len; idx++) {
-                int col = seg_start + idx;
-                int right_idx = idx - (seg_len - (int)new_vals.size());
-                if (right_idx >= 0) {
-                    board.at(i, col).value = new_vals[right_idx].value;
-                    board.at(i, col).passive = new_vals[right_idx].passive;
-                } else {
-                    board.at(i, col).value = 0;
-                    board.at(i, col).passive = PassiveType::NONE;
-                }
-            }
+    out.moves.clear();
+    out.merges.clear();
+    out.bomb_destroyed.reset(board.rows(), board.cols());
+    out.board_changed = false;
+    if (direction == Direction::NONE) return;
+
+    // Every cell is written at most once, so any write that differs bumps the version.
+    const auto version_before = board.version();
+
+    const LineSet set(board, direction);
+    lines.build(board, set.horizontal, frozen, slow_movers);
+    if (workers && workers->threads() > 1 &&
+        static_cast<long>(board.rows()) * board.cols() >= workers->min_cells()) {
+        workers->compact(board, direction, lines, out);
+    } else {
+        for (int i = 0; i < set.lines; i++) {
+            for_each_segment(set, lines, i, [&](const Line& line, int a, int b) {
+                BoardCells cells(board, line);
+                compact_run(cells, line, a, b, out);
+                return true;
+            });
         }
     }
 
-    result.board_changed = (original != board.to_flat_values());
-    return result;
+    out.board_changed = board.version() != version_before;
 }
 
-MoveResult move_up(Board& board,
-                   const std::set<std::pair<int,int>>& frozen,
-                   const std::vector<SlowMoverState>& slow_movers)
+void move_into(Board& board, Direction direction,
+               const CellSet& frozen,
+               const std::vector<SlowMoverState>& slow_movers,
+               MoveResult& out)
 {
-    auto effective_frozen = build_frozen_set(frozen, slow_movers);
-    MoveResult result;
-    int rows = board.rows();
-    int cols = board.cols();
-
-    auto original = board.to_flat_values();
-
-    for (int col = 0; col < cols; col++) {
-        std::set<int> frozen_rows;
-        for (const auto& [fr, fc] : effective_frozen) {
-            if (fc == col) frozen_rows.insert(fr);
-        }
-        auto segments = get_segments(rows, frozen_rows);
+    FrozenLines lines;
+    move_into(board, direction, frozen, slow_movers, lines, out);
+}
 
-        for (auto [seg_start, seg_end] : segments) {
-            std::vector<TileEntry> seg_tiles;
-            for (int row = seg_start; row < seg_end; row++) {
-                if (!board.at(row, col).is_empty()) {
-                    seg_tiles.push_back({board.at(row, col).value, row, board.at(row, col).passive});
-                }
-            }
-            auto new_vals = process_segment_up(seg_tiles, col, seg_start,
-                                                result.moves, result.merges,
-                                                result.bomb_destroyed, board);
-            for (int idx = 0; idx < seg_end - seg_start; idx++) {
-                int row = seg_start + idx;
-                if (idx < (int)new_vals.size()) {
-                    board.at(row, col).value = new_vals[idx].value;
-                    board.at(row, col).passive = new_vals[idx].passive;
-                } else {
-                    board.at(row, col).value = 0;
-                    board.at(row, col).passive = PassiveType::NONE;
-                }
-            }
-        }
+bool can_move(const Board& board, Direction direction,
+              const CellSet& frozen,
+              const std::vector<SlowMoverState>& slow_movers,
+              FrozenLines& lines)
+{
+    if (direction == Direction::NONE) return false;
+    const LineSet set(board, direction);
+    lines.build(board, set.horizontal, frozen, slow_movers);
+    for (int i = 0; i < set.lines; i++) {
+        bool still = for_each_segment(set, lines, i, [&](const Line& line, int a, int b) {
+            return !segment_can_move(board, line, a, b);
+        });
+        if (!still) return true;
     }
+    return false;
+}
 
-    result.board_changed = (original != board.to_flat_values());
-    return result;
+bool can_move(const Board& board, Direction direction,
+              const CellSet& frozen,
+              const std::vector<SlowMoverState>& slow_movers)
+{
+    FrozenLines lines;
+    return can_move(board, direction, frozen, slow_movers, lines);
 }
 
-MoveResult move_down(Board& board,
-                     const std::set<std::pair<int,int>>& frozen,
-                     const std::vector<SlowMoverState>& slow_movers)
+MoveResult move(Board& board, Direction direction,
+                const CellSet& frozen,
+                const std::vector<SlowMoverState>& slow_movers)
 {
-    auto effective_frozen = build_frozen_set(frozen, slow_movers);
     MoveResult result;
-    int rows = board.rows();
-    int cols = board.cols();
+    move_into(board, direction, frozen, slow_movers, result);
+    return result;
+}
 
-    auto original = board.to_flat_values();
+MoveResult move_left(Board& board,
+                     const CellSet& frozen,
+                     const std::vector<SlowMoverState>& slow_movers)
+{
+    return move(board, Direction::LEFT, frozen, slow_movers);
+}
 
-    for (int col = 0; col < cols; col++) {
-        std::set<int> frozen_rows;
-        for (const auto& [fr, fc] : effective_frozen) {
-            if (fc == col) frozen_rows.insert(fr);
-        }
-        auto segments = get_segments(rows, frozen_rows);
+MoveResult move_right(Board& board,
+                      const CellSet& frozen,
+                      const std::vector<SlowMoverState>& slow_movers)
+{
+    return move(board, Direction::RIGHT, frozen, slow_movers);
+}
 
-        for (auto [seg_start, seg_end] : segments) {
-            std::vector<TileEntry> seg_tiles;
-            for (int row = seg_start; row < seg_end; row++) {
-                if (!board.at(row, col).is_empty()) {
-                    seg_tiles.push_back({board.at(row, col).value, row, board.at(row, col).passive});
-                }
-            }
-            auto new_vals = process_segment_down(seg_tiles, col, seg_end,
-                                                  result.moves, result.merges,
-                                                  result.bomb_destroyed, board);
-            int seg_len = seg_end - seg_start;
-            for (int idx = 0; idx < seg_len; idx++) {
-                int row = seg_start + idx;
-                int down_idx = idx - (seg_len - (int)new_vals.size());
-                if (down_idx >= 0) {
-                    board.at(row, col).value = new_vals[down_idx].value;
-                    board.at(row, col).passive = new_vals[down_idx].passive;
-                } else {
-                    board.at(row, col).value = 0;
-                    board.at(row, col).passive = PassiveType::NONE;
-                }
-            }
-        }
-    }
+MoveResult move_up(Board& board,
+                   const CellSet& frozen,
+                   const std::vector<SlowMoverState>& slow_movers)
+{
+    return move(board, Direction::UP, frozen, slow_movers);
+}
 
-    result.board_changed = (original != board.to_flat_values());
-    return result;
+MoveResult move_down(Board& board,
+                     const CellSet& frozen,
+                     const std::vector<SlowMoverState>& slow_movers)
+{
+    return move(board, Direction::DOWN, frozen, slow_movers);
 }
 
 } // namespace movement
@@ -17,25 +17,51 @@ PassiveRoller::PassiveRoller(unsigned int seed)
 {
 }
 
+void PassiveRoller::eligible_tiles(const Board& board, const CellSet& excluded,
+                                   std::vector<std::pair<int,int>>& out)
+{
+    // Occupied, numbered, not excluded, no existing passive
+    board.occupied_numbered_cells(excluded, out);
+    out.erase(
+        std::remove_if(out.begin(), out.end(),
+            [&board](const std::pair<int,int>& p) {
+                return board.at(p.first, p.second).has_passive();
+            }),
+        out.end());
+}
+
+double PassiveRoller::candidate_chance(const std::vector<MergeInfo>& merges) {
+    double none = 1.0;
+    for (const auto& merge : merges) {
+        double chance = merge_chance(merge.new_value);
+        if (chance >= 100.0) return 1.0;
+        none *= 1.0 - chance / 100.0;
+    }
+    return 1.0 - none;
+}
+
 std::vector<PassiveCandidate> PassiveRoller::roll(
     const Board& board,
     const std::vector<MergeInfo>& merges,
-    const std::set<std::pair<int,int>>& excluded_positions)
+    const CellSet& excluded_positions)
 {
     std::vector<PassiveCandidate> candidates;
+    roll(board, merges, excluded_positions, candidates);
+    return candidates;
+}
 
-    // Get all eligible tiles (occupied, numbered, not excluded, no existing passive)
-    auto eligible = board.occupied_numbered_cells(excluded_positions);
-    eligible.erase(
-        std::remove_if(eligible.begin(), eligible.end(),
-            [&board](const std::pair<int,int>& p) {
-                return board.at(p.first, p.second).has_passive();
-            }),
-        eligible.end());
-    if (eligible.empty()) return candidates;
+void PassiveRoller::roll(
+    const Board& board,
+    const std::vector<MergeInfo>& merges,
+    const CellSet& excluded_positions,
+    std::vector<PassiveCandidate>& candidates)
+{
+    auto& eligible = eligible_;
+    eligible_tiles(board, excluded_positions, eligible);
+    if (eligible.empty()) return;
 
     for (const auto& merge : merges) {
-        double chance = merge.new_value * 0.1;  // e.g., 2+2=4 -> 0.4%
+        double chance = merge_chance(merge.new_value);
 
         // Determine number of picks
         int guaranteed = static_cast<int>(chance / 100.0);
@@ -59,10 +85,8 @@ std::vector<PassiveCandidate> PassiveRoller::roll(
 
             if (board.at(r, c).is_numbered()) {
                 candidates.push_back({r, c, board.at(r, c).value});
-                return candidates;  // Stop rolling after first success
+                return;  // Stop rolling after first success
             }
         }
     }
-
-    return candidates;
 }
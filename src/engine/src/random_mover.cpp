@@ -5,6 +5,99 @@
 //riverknuuttila2@outlook.com
 
 #include "random_mover.h"
+#include <algorithm>
 
 // RandomMoverState and RandomMoverUpdate are POD structs defined in the header.
-// Logic for advancing random movers lives in GameEngine::advance_random_movers().
+// Logic for advancing random movers lives in GameEngine::advance_random_movers();
+// this file keeps their registry.
+
+void RandomMoverRegistry::reset(int rows, int cols) {
+    movers_.clear();
+    rows_ = rows;
+    cols_ = cols;
+    slot_.clear();
+    positions_.reset(rows, cols);
+    stamp_ = 0;
+    sorted_ = true;
+}
+
+void RandomMoverRegistry::resize(int rows, int cols, int dr, int dc) {
+    rows_ = rows;
+    cols_ = cols;
+    slot_.clear();
+    positions_.reset(rows, cols);
+    for (auto& rm : movers_) { rm.row += dr; rm.col += dc; }
+    index_all();
+}
+
+void RandomMoverRegistry::sync(const Board& board) {
+    if (board.rows() != rows_ || board.cols() != cols_) reset(board.rows(), board.cols());
+    if (stamp_ != board.obstacle_stamp()) {
+        stamp_ = board.obstacle_stamp();
+        unindex_all();
+        movers_.clear();
+        board.cells(CellClass::SNAIL).for_each([&](int r, int c) { movers_.push_back({r, c}); });
+        index_all();
+        sorted_ = true;
+    } else if (!sorted_) {
+        // Steps only reorder snails that moved; the list stays short.
+        unindex_all();
+        std::sort(movers_.begin(), movers_.end(), [](const RandomMoverState& a, const RandomMoverState& b) {
+            return a.row != b.row ? a.row < b.row : a.col < b.col;
+        });
+        index_all();
+        sorted_ = true;
+    }
+}
+
+void RandomMoverRegistry::assign(const std::vector<RandomMoverState>& movers) {
+    unindex_all();
+    movers_ = movers;
+    index_all();
+    stamp_ = 0;
+}
+
+int RandomMoverRegistry::find(int r, int c) const {
+    if (slot_.empty() || !in_bounds(r, c)) return -1;
+    return slot_[cell(r, c)];
+}
+
+void RandomMoverRegistry::move_to(int i, int r, int c) {
+    unindex(i);
+    movers_[i].row = r;
+    movers_[i].col = c;
+    index(i);
+    sorted_ = false;
+}
+
+void RandomMoverRegistry::erase(int i) {
+    unindex(i);
+    movers_.erase(movers_.begin() + i);
+    // Later snails moved down one slot.
+    for (int j = i; j < size(); j++) index(j);
+}
+
+void RandomMoverRegistry::index(int i) {
+    const RandomMoverState& rm = movers_[i];
+    if (!in_bounds(rm.row, rm.col)) return;
+    if (slot_.empty()) slot_.assign(static_cast<size_t>(rows_) * cols_, -1);
+    slot_[cell(rm.row, rm.col)] = i;
+    positions_.insert(rm.row, rm.col);
+}
+
+void RandomMoverRegistry::unindex(int i) {
+    const RandomMoverState& rm = movers_[i];
+    if (!in_bounds(rm.row, rm.col) || slot_.empty()) return;
+    std::int32_t& s = slot_[cell(rm.row, rm.col)];
+    if (s != i) return;
+    s = -1;
+    positions_.erase(rm.row, rm.col);
+}
+
+void RandomMoverRegistry::unindex_all() {
+    for (int i = 0; i < size(); i++) unindex(i);
+}
+
+void RandomMoverRegistry::index_all() {
+    for (int i = 0; i < size(); i++) index(i);
+}
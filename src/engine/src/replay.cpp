@@ -0,0 +1,247 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#include "replay.h"
+#include "game_engine.h"
+#include "varint.h"
+#include <algorithm>
+#include <stdexcept>
+
+namespace {
+
+constexpr char kMagic[] = "2SQR";
+constexpr size_t kMagicSize = 4;
+constexpr std::uint64_t kVersion = 2;  // 2: RNG states in MersenneTwister's layout
+
+// Event tags after the moves (0-4, int(Direction)); see replay.h.
+enum class Tag : std::uint8_t {
+    PLACE_BOMB = 5,
+    PLACE_FREEZE = 6,
+    CLEAR_FREEZE = 7,
+    SWITCH_TILES = 8,
+    ASSIGN_PASSIVE = 9,
+    EXPANSION = 10,
+    SET_TILE = 11,
+    RESEED = 12,
+    CHECKPOINT = 13,
+    STATE = 14,
+};
+constexpr std::uint8_t kLastMove = static_cast<std::uint8_t>(Direction::NONE);
+
+std::uint8_t tag(Tag t) { return static_cast<std::uint8_t>(t); }
+
+// Number of varint arguments of an input event; -1 for an unknown tag.
+int arity(std::uint8_t t) {
+    switch (static_cast<Tag>(t)) {
+        case Tag::PLACE_BOMB:
+        case Tag::PLACE_FREEZE:
+        case Tag::CLEAR_FREEZE:   return 2;
+        case Tag::SWITCH_TILES:   return 4;
+        case Tag::ASSIGN_PASSIVE: return 3;
+        case Tag::EXPANSION:      return 1;
+        case Tag::SET_TILE:       return 4;
+        case Tag::RESEED:         return 1;
+        default:                  return -1;
+    }
+}
+
+int get_int(varint::Reader& in) {
+    std::int64_t v = in.get_signed();
+    if (v < INT32_MIN || v > INT32_MAX) throw std::invalid_argument("replay value out of range");
+    return static_cast<int>(v);
+}
+
+// A recorded cell is always on the board it was recorded on.
+void check_cell(const GameEngine& engine, int r, int c) {
+    if (r < 0 || r >= engine.rows() || c < 0 || c >= engine.cols())
+        throw std::invalid_argument("replay event outside the board");
+}
+
+Direction get_direction(varint::Reader& in) {
+    std::uint64_t d = in.get();
+    if (d > kLastMove) throw std::invalid_argument("replay direction out of range");
+    return static_cast<Direction>(d);
+}
+
+} // anonymous namespace
+
+ReplayWriter::ReplayWriter(int checkpoint_interval, const EngineSnapshot& start)
+    : interval_(checkpoint_interval)
+{
+    data_.append(kMagic, kMagicSize);
+    varint::put(data_, kVersion);
+    varint::put(data_, static_cast<std::uint64_t>(interval_));
+    put_state(tag(Tag::STATE), start);
+}
+
+void ReplayWriter::event(std::uint8_t t, std::initializer_list<int> args) {
+    data_.push_back(static_cast<char>(t));
+    for (int v : args) varint::put_signed(data_, v);
+}
+
+void ReplayWriter::put_state(std::uint8_t t, const EngineSnapshot& state) {
+    std::string body;
+    state.write(body);
+    data_.push_back(static_cast<char>(t));
+    varint::put(data_, body.size());
+    data_ += body;
+    last_state_turn_ = turns_;
+}
+
+void ReplayWriter::move(Direction direction) {
+    data_.push_back(static_cast<char>(direction));
+    turns_++;
+}
+
+void ReplayWriter::place_bomb(int row, int col)   { event(tag(Tag::PLACE_BOMB), {row, col}); }
+void ReplayWriter::place_freeze(int row, int col) { event(tag(Tag::PLACE_FREEZE), {row, col}); }
+void ReplayWriter::clear_freeze(int row, int col) { event(tag(Tag::CLEAR_FREEZE), {row, col}); }
+void ReplayWriter::switch_tiles(int r1, int c1, int r2, int c2) {
+    event(tag(Tag::SWITCH_TILES), {r1, c1, r2, c2});
+}
+void ReplayWriter::assign_passive(int row, int col, int passive_type) {
+    event(tag(Tag::ASSIGN_PASSIVE), {row, col, passive_type});
+}
+void ReplayWriter::expansion(Direction direction) {
+    data_.push_back(static_cast<char>(tag(Tag::EXPANSION)));
+    varint::put(data_, static_cast<std::uint64_t>(direction));
+}
+void ReplayWriter::set_tile(int row, int col, int value, int passive_type) {
+    event(tag(Tag::SET_TILE), {row, col, value, passive_type});
+}
+void ReplayWriter::reseed(unsigned int seed) {
+    data_.push_back(static_cast<char>(tag(Tag::RESEED)));
+    varint::put(data_, seed);
+}
+void ReplayWriter::checkpoint(const EngineSnapshot& state) { put_state(tag(Tag::CHECKPOINT), state); }
+void ReplayWriter::state(const EngineSnapshot& state)      { put_state(tag(Tag::STATE), state); }
+
+Replay::Replay(std::string data)
+    : data_(std::move(data))
+{
+    if (data_.compare(0, kMagicSize, kMagic, kMagicSize) != 0)
+        throw std::invalid_argument("not a replay");
+    varint::Reader in(data_, kMagicSize);
+    if (in.get() != kVersion) throw std::invalid_argument("unsupported replay version");
+    std::uint64_t interval = in.get();
+    if (interval > INT32_MAX) throw std::invalid_argument("replay checkpoint interval out of range");
+    interval_ = static_cast<int>(interval);
+    if (in.done() || in.peek() != tag(Tag::STATE))
+        throw std::invalid_argument("replay does not open with a state");
+
+    // Index the full states and count the moves; arguments are only skipped.
+    while (!in.done()) {
+        const std::uint8_t t = in.byte();
+        if (t <= kLastMove) {
+            if (turns_ == INT32_MAX) throw std::invalid_argument("replay too long");
+            turns_++;
+        } else if (t == tag(Tag::CHECKPOINT) || t == tag(Tag::STATE)) {
+            const std::uint64_t size = in.get();
+            const size_t state = in.offset();
+            in.skip(size);
+            checkpoints_.push_back({turns_, state, in.offset()});
+        } else {
+            const int n = arity(t);
+            if (n < 0) throw std::invalid_argument("unknown replay event");
+            for (int i = 0; i < n; i++) in.get();
+        }
+    }
+}
+
+const Replay::Checkpoint& Replay::start_for(int turn) const {
+    if (turn < 0 || turn > turns_) throw std::out_of_range("turn outside the replay");
+    auto it = std::upper_bound(checkpoints_.begin(), checkpoints_.end(), turn,
+                               [](int t, const Checkpoint& c) { return t < c.turn; });
+    return *(it - 1);  // the opening state is at turn 0
+}
+
+Snapshot Replay::state_at(const Checkpoint& c) const {
+    varint::Reader in(data_, c.state);
+    return EngineSnapshot::read(in);
+}
+
+void Replay::seek(GameEngine& engine, int turn) const {
+    const Checkpoint& start = start_for(turn);
+    engine.restore(state_at(start));
+    play(engine, start.next, start.turn, turn);
+}
+
+std::unique_ptr<GameEngine> Replay::engine_at(int turn) const {
+    const Checkpoint& start = start_for(turn);
+    Snapshot state = state_at(start);
+    auto engine = std::make_unique<GameEngine>(state->rows(), state->cols(), 0);
+    engine->restore(state);
+    play(*engine, start.next, start.turn, turn);
+    return engine;
+}
+
+void Replay::play(GameEngine& engine, size_t from, int at, int turn) const {
+    varint::Reader in(data_, from);
+    TurnResult result;
+    while (!in.done()) {
+        const std::uint8_t t = in.peek();
+        if (t <= kLastMove) {
+            if (at == turn) return;
+            in.byte();
+            engine.process_move_into(static_cast<Direction>(t), result);
+            at++;
+            continue;
+        }
+        in.byte();
+        switch (static_cast<Tag>(t)) {
+            case Tag::PLACE_BOMB:
+            case Tag::PLACE_FREEZE: {
+                const int r = get_int(in), c = get_int(in);
+                check_cell(engine, r, c);
+                if (t == tag(Tag::PLACE_BOMB)) engine.place_bomb(r, c);
+                else                           engine.place_freeze(r, c);
+                break;
+            }
+            case Tag::CLEAR_FREEZE: {  // ignores cells off the board
+                const int r = get_int(in), c = get_int(in);
+                engine.clear_freeze(r, c);
+                break;
+            }
+            case Tag::SWITCH_TILES: {
+                const int r1 = get_int(in), c1 = get_int(in), r2 = get_int(in), c2 = get_int(in);
+                check_cell(engine, r1, c1);
+                check_cell(engine, r2, c2);
+                engine.switch_tiles(r1, c1, r2, c2);
+                break;
+            }
+            case Tag::ASSIGN_PASSIVE: {
+                const int r = get_int(in), c = get_int(in), passive = get_int(in);
+                check_cell(engine, r, c);
+                engine.assign_passive(r, c, passive);
+                break;
+            }
+            case Tag::EXPANSION:
+                engine.complete_expansion(get_direction(in));
+                break;
+            case Tag::SET_TILE: {
+                const int r = get_int(in), c = get_int(in), value = get_int(in), passive = get_int(in);
+                check_cell(engine, r, c);
+                engine.set_tile(r, c, value, passive);
+                break;
+            }
+            case Tag::RESEED:
+                engine.reseed(static_cast<unsigned int>(in.get()));
+                break;
+            case Tag::CHECKPOINT:
+                in.skip(in.get());
+                break;
+            case Tag::STATE: {
+                const std::uint64_t size = in.get();
+                varint::Reader body(data_, in.offset());
+                in.skip(size);
+                engine.restore(EngineSnapshot::read(body));
+                break;
+            }
+            default:
+                throw std::invalid_argument("unknown replay event");
+        }
+    }
+}
@@ -0,0 +1,148 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#include "rollout.h"
+#include <algorithm>
+
+namespace {
+
+constexpr int kDirections = 4;
+
+int max_tile(const Board& board) {
+    int best = 0;
+    for (int r = 0; r < board.rows(); r++)
+        for (int c = 0; c < board.cols(); c++)
+            best = std::max(best, board.at(r, c).value);
+    return best;
+}
+
+// Points the merges along one axis would score: equal numbered tiles that
+// meet after compaction, paired from one end. Specials break a line, which
+// is close enough for a rollout heuristic.
+int merge_gain(const Board& board, bool horizontal) {
+    const int lines = horizontal ? board.rows() : board.cols();
+    const int len = horizontal ? board.cols() : board.rows();
+    int gain = 0;
+    for (int i = 0; i < lines; i++) {
+        TileCode prev = tile_code::EMPTY;
+        for (int k = 0; k < len; k++) {
+            TileCode code = horizontal ? board.code(i, k) : board.code(k, i);
+            if (code == tile_code::EMPTY) continue;
+            if (!tile_code::is_numbered(code)) { prev = tile_code::EMPTY; continue; }
+            if (code == prev) {
+                gain += 2 * tile_code::decode(code);
+                prev = tile_code::EMPTY;
+            } else {
+                prev = code;
+            }
+        }
+    }
+    return gain;
+}
+
+// Uniform pick among the set bits of `mask`.
+Direction random_of(int mask, std::mt19937& rng) {
+    int n = 0;
+    for (int d = 0; d < kDirections; d++) n += (mask >> d) & 1;
+    std::uniform_int_distribution<int> dist(0, n - 1);
+    int pick = dist(rng);
+    for (int d = 0; d < kDirections; d++)
+        if (((mask >> d) & 1) && pick-- == 0) return static_cast<Direction>(d);
+    return Direction::NONE;
+}
+
+Direction choose(RolloutPolicy policy, const GameEngine& engine, std::mt19937& rng) {
+    const int legal = engine.legal_moves();
+    if (!legal) return Direction::NONE;
+
+    switch (policy) {
+        case RolloutPolicy::GREEDY_MERGE: {
+            const int vertical = legal & ((1 << int(Direction::UP)) | (1 << int(Direction::DOWN)));
+            const int horizontal = legal & ((1 << int(Direction::LEFT)) | (1 << int(Direction::RIGHT)));
+            const int v = vertical ? merge_gain(engine.board(), false) : -1;
+            const int h = horizontal ? merge_gain(engine.board(), true) : -1;
+            if (v > h && v > 0) return random_of(vertical, rng);
+            if (h > v && h > 0) return random_of(horizontal, rng);
+            return random_of(legal, rng);
+        }
+        case RolloutPolicy::CORNER:
+            for (Direction d : {Direction::DOWN, Direction::LEFT, Direction::RIGHT, Direction::UP})
+                if (legal & (1 << int(d))) return d;
+            return Direction::NONE;
+        default:
+            return random_of(legal, rng);
+    }
+}
+
+} // anonymous namespace
+
+RolloutExecutor::RolloutExecutor(int threads)
+    : pool_(threads),
+      scratch_(pool_.threads())
+{
+}
+
+RolloutExecutor::Outcome RolloutExecutor::rollout(const GameEngine& root, Direction first, int k,
+                                                  const RolloutOptions& options, TurnResult& result) const
+{
+    std::seed_seq seq {options.seed, static_cast<unsigned int>(first), static_cast<unsigned int>(k)};
+    unsigned int seed;
+    seq.generate(&seed, &seed + 1);
+
+    GameEngine game(root);
+    game.reseed(seed);
+    std::mt19937 rng(seed + 3);
+
+    if (!play_turn(game, first, options.game, rng, result))
+        return {false, root.score(), 0, max_tile(root.board())};
+
+    int turns = 1;
+    while ((options.max_turns <= 0 || turns < options.max_turns) && game.has_moves()) {
+        Direction d = choose(options.policy, game, rng);
+        if (d == Direction::NONE) break;
+        const auto version_before = game.board().version();
+        if (play_turn(game, d, options.game, rng, result)) turns++;
+        else if (game.board().version() == version_before) break;  // nothing left to try
+    }
+    return {true, game.score(), turns, max_tile(game.board())};
+}
+
+std::array<RolloutStats, 4> RolloutExecutor::run(const GameEngine& root, const RolloutOptions& options) {
+    std::lock_guard<std::mutex> lock(run_mutex_);
+    std::array<RolloutStats, 4> stats {};
+    const int n = std::max(options.rollouts, 0);
+    const int legal = root.legal_moves();
+
+    // Only directions the root allows are played; the rest stay invalid.
+    std::vector<Direction> firsts;
+    for (int d = 0; d < kDirections; d++)
+        if (legal & (1 << d)) firsts.push_back(static_cast<Direction>(d));
+
+    outcomes_.assign(firsts.size() * n, Outcome {});
+    auto job = [&](int worker, int item) {
+        outcomes_[item] = rollout(root, firsts[item / n], item % n, options, scratch_[worker]);
+    };
+    pool_.parallel_for(static_cast<int>(outcomes_.size()), job);
+
+    // Reduced in a fixed order, so the sums are identical on every run.
+    for (size_t f = 0; f < firsts.size(); f++) {
+        RolloutStats& s = stats[static_cast<int>(firsts[f])];
+        s.valid = n > 0 && outcomes_[f * n].valid;
+        if (!s.valid) continue;
+        s.rollouts = n;
+        for (int k = 0; k < n; k++) {
+            const Outcome& o = outcomes_[f * n + k];
+            s.mean_score += o.score;
+            s.mean_turns += o.turns;
+            s.mean_max_tile += o.max_tile;
+            s.max_tile = std::max(s.max_tile, o.max_tile);
+        }
+        s.mean_score /= n;
+        s.mean_turns /= n;
+        s.mean_max_tile /= n;
+    }
+    return stats;
+}
@@ -9,11 +9,11 @@
 #include <cstdlib>
 
 void SlowBehavior::pre_snapshot(const Board& board, int dr, int dc) {
-    positions_.clear();
-    for (int r = 0; r < board.rows(); r++)
-        for (int c = 0; c < board.cols(); c++)
-            if (board.at(r, c).is_numbered() && matches(board.at(r, c).passive))
-                positions_.insert({r, c});
+    positions_.reset(board.rows(), board.cols());
+    board.cells(CellClass::PASSIVE).for_each([&](int r, int c) {
+        if (board.at(r, c).is_numbered() && matches(board.passive(r, c)))
+            positions_.insert(r, c);
+    });
 }
 
 bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
@@ -22,15 +22,13 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
     const int dr = ctx.dr, dc = ctx.dc;
 
     // Process tiles closest to the movement wall first.
-    // Set iterates ascending; reverse for right (dc>0) or down (dr>0).
-    std::vector<std::pair<int,int>> order(positions_.begin(), positions_.end());
-    if (dc > 0 || dr > 0)
-        std::reverse(order.begin(), order.end());
+    // Row-major order; reversed for right (dc>0) or down (dr>0).
+    positions_.collect(order_, dc > 0 || dr > 0);
 
-    for (const auto& [sr, sc] : order) {
-        if (ctx.active_sm_positions.count({sr, sc})) continue;
+    for (const auto& [sr, sc] : order_) {
+        if (ctx.active_sm_positions.test(sr, sc)) continue;
         if (!board.at(sr, sc).is_numbered()) continue;
-        if (!matches(board.at(sr, sc).passive)) continue;
+        if (!matches(board.passive(sr, sc))) continue;
 
         int tile_value = board.at(sr, sc).value;
 
@@ -45,20 +43,19 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
             int new_value = tile_value * 2;
             result.slow_tile_moves.push_back({behind_r, behind_c, sr, sc, tile_value});
             result.slow_tile_merges.push_back({sr, sc, new_value});
-            board.at(sr, sc).passive = combine_passives(board.at(sr, sc).passive,
-                                                        board.at(behind_r, behind_c).passive);
-            board.at(behind_r, behind_c).value = 0;
-            board.at(behind_r, behind_c).passive = PassiveType::NONE;
-            board.at(sr, sc).value = new_value;
+            PassiveType merged_passive = combine_passives(board.passive(sr, sc),
+                                                          board.passive(behind_r, behind_c));
+            board.clear(behind_r, behind_c);
+            board.set(sr, sc, new_value, merged_passive);
             tile_value = new_value;
             changed = true;
         }
 
         // The merge may have absorbed a CONTRARIAN bit; if ownership changed,
         // leave the tile in place — it acts as its new type from next turn.
-        if (!matches(board.at(sr, sc).passive)) continue;
+        if (!matches(board.passive(sr, sc))) continue;
 
-        if (ctx.frozen_tiles.count({sr, sc})) continue;
+        if (ctx.frozen_tiles.test(sr, sc)) continue;
 
         // Scan ahead (movement direction) to find ultimate destination.
         int dest_r = sr, dest_c = sc;
@@ -72,7 +69,7 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
                 dest_c = scan_c;
             } else if (board.at(scan_r, scan_c).value == tile_value &&
                        board.at(scan_r, scan_c).is_numbered() &&
-                       !has_passive(board.at(scan_r, scan_c).passive, PassiveType::A_LITTLE_SLOW)) {
+                       !has_passive(board.passive(scan_r, scan_c), PassiveType::A_LITTLE_SLOW)) {
                 // Merge with a non-slow tile ahead.
                 // Slow-on-slow merges are handled exclusively by the behind-merge above,
                 // processed in closest-to-wall-first order.
@@ -95,12 +92,10 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
         if (next_r == dest_r && next_c == dest_c && dest_is_merge) {
             // Immediate forward merge.
             int new_value = tile_value * 2;
-            PassiveType sr_passive = board.at(sr, sc).passive;
-            board.at(sr, sc).value = 0;
-            board.at(sr, sc).passive = PassiveType::NONE;
-            board.at(dest_r, dest_c).value = new_value;
-            board.at(dest_r, dest_c).passive = combine_passives(sr_passive,
-                                                                board.at(dest_r, dest_c).passive);
+            PassiveType sr_passive = board.passive(sr, sc);
+            board.clear(sr, sc);
+            board.set(dest_r, dest_c, new_value,
+                      combine_passives(sr_passive, board.passive(dest_r, dest_c)));
             result.slow_tile_moves.push_back({sr, sc, dest_r, dest_c, tile_value});
             result.slow_tile_merges.push_back({dest_r, dest_c, new_value});
             changed = true;
@@ -108,9 +103,8 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
         } else {
             // Move 1 cell; create a slow mover if destination is further away.
             Tile saved = board.at(sr, sc);
-            board.at(sr, sc).value = 0;
-            board.at(sr, sc).passive = PassiveType::NONE;
-            board.at(next_r, next_c) = saved;
+            board.clear(sr, sc);
+            board.set(next_r, next_c, saved);
             result.slow_tile_moves.push_back({sr, sc, next_r, next_c, tile_value});
             changed = true;
 
@@ -122,7 +116,7 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
                 sm.value = saved.value;
                 sm.passive = saved.passive;
                 sm.active = true;
-                ctx.slow_movers.push_back(sm);
+                ctx.slow_movers.add(sm);
             }
             ctx.cascade_fill(sr, sc, result.slow_tile_moves);
         }
@@ -131,9 +125,10 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
     // Frozen slow mover merge check.
     // A regular tile may have slid next to a user-frozen slow mover during step 2;
     // merge it in now.
-    for (auto& sm : ctx.slow_movers) {
+    for (int i = 0; i < ctx.slow_movers.size(); i++) {
+        const SlowMoverState& sm = ctx.slow_movers[i];
         if (!sm.active) continue;
-        if (!ctx.frozen_tiles.count({sm.current_row, sm.current_col})) continue;
+        if (!ctx.frozen_tiles.test(sm.current_row, sm.current_col)) continue;
 
         int adj_r = sm.current_row - dr;
         int adj_c = sm.current_col - dc;
@@ -145,14 +140,11 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
         int old_adj_value = board.at(adj_r, adj_c).value;
         int new_value = sm.value * 2;
         PassiveType merged_passive = combine_passives(
-            board.at(sm.current_row, sm.current_col).passive,
-            board.at(adj_r, adj_c).passive);
-        board.at(adj_r, adj_c).value = 0;
-        board.at(adj_r, adj_c).passive = PassiveType::NONE;
-        sm.value = new_value;
-        sm.passive = merged_passive;  // keeps future steps carrying the combined bits
-        board.at(sm.current_row, sm.current_col).value = new_value;
-        board.at(sm.current_row, sm.current_col).passive = merged_passive;
+            board.passive(sm.current_row, sm.current_col),
+            board.passive(adj_r, adj_c));
+        board.clear(adj_r, adj_c);
+        ctx.slow_movers.set_tile(i, new_value, merged_passive);  // future steps carry the combined bits
+        board.set(sm.current_row, sm.current_col, new_value, merged_passive);
 
         // These go into main animation channels since they animate in phase 1.
         result.moves.push_back({adj_r, adj_c, sm.current_row, sm.current_col, old_adj_value});
@@ -162,3 +154,49 @@ bool SlowBehavior::advance(MoveContext& ctx, TurnResult& result) {
 
     return changed;
 }
+
+bool SlowBehavior::can_advance(const AdvanceQuery& q) const {
+    const Board& board = q.board;
+    auto in_bounds = [&](int r, int c) {
+        return r >= 0 && r < board.rows() && c >= 0 && c < board.cols();
+    };
+
+    // On an unchanged board the first tile advance() would touch sees exactly
+    // this state, so it is enough to find one tile that moves or merges.
+    bool moves = false;
+    board.cells(CellClass::PASSIVE).for_each([&](int sr, int sc) {
+        if (moves) return;
+        Tile tile = board.at(sr, sc);
+        if (!tile.is_numbered() || !matches(tile.passive)) return;
+        if (q.active_sm_positions.test(sr, sc)) return;
+
+        // Behind-merge.
+        int behind_r = sr - q.dr, behind_c = sc - q.dc;
+        if (in_bounds(behind_r, behind_c) && board.at(behind_r, behind_c).is_numbered() &&
+            board.at(behind_r, behind_c).value == tile.value) {
+            moves = true;
+            return;
+        }
+        if (q.frozen_tiles.test(sr, sc)) return;
+
+        // Step or merge ahead (the scan stops at once otherwise).
+        int ahead_r = sr + q.dr, ahead_c = sc + q.dc;
+        if (!in_bounds(ahead_r, ahead_c)) return;
+        Tile ahead = board.at(ahead_r, ahead_c);
+        if (ahead.is_empty() ||
+            (ahead.is_numbered() && ahead.value == tile.value &&
+             !has_passive(ahead.passive, PassiveType::A_LITTLE_SLOW)))
+            moves = true;
+    });
+    if (moves) return true;
+
+    // Frozen slow mover merge.
+    for (const auto& sm : q.slow_movers) {
+        if (!sm.active || !q.frozen_tiles.test(sm.current_row, sm.current_col)) continue;
+        int adj_r = sm.current_row - q.dr, adj_c = sm.current_col - q.dc;
+        if (in_bounds(adj_r, adj_c) && board.at(adj_r, adj_c).is_numbered() &&
+            board.at(adj_r, adj_c).value == sm.value)
+            return true;
+    }
+    return false;
+}
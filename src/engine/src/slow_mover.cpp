@@ -5,6 +5,103 @@
 //riverknuuttila2@outlook.com
 
 #include "slow_mover.h"
+#include <algorithm>
 
 // SlowMoverState and SlowMoverUpdate are POD structs defined in the header.
-// Logic for advancing slow movers lives in GameEngine::advance_slow_movers().
+// Logic for advancing slow movers lives in GameEngine::advance_slow_movers();
+// this file keeps their registry.
+
+void SlowMoverRegistry::reset(int rows, int cols) {
+    movers_.clear();
+    rows_ = rows;
+    cols_ = cols;
+    slot_.clear();
+    active_.reset(rows, cols);
+}
+
+void SlowMoverRegistry::resize(int rows, int cols, int dr, int dc) {
+    rows_ = rows;
+    cols_ = cols;
+    for (auto& sm : movers_) {
+        sm.current_row += dr; sm.current_col += dc;
+        sm.dest_row += dr;    sm.dest_col += dc;
+    }
+    reindex();
+}
+
+int SlowMoverRegistry::find(int r, int c) const {
+    if (slot_.empty() || !in_bounds(r, c)) return -1;
+    return slot_[cell(r, c)];
+}
+
+void SlowMoverRegistry::add(const SlowMoverState& sm) {
+    if (sm.active) erase_at(sm.current_row, sm.current_col);
+    movers_.push_back(sm);
+    if (sm.active) index(size() - 1);
+}
+
+void SlowMoverRegistry::move_to(int i, int r, int c) {
+    SlowMoverState& sm = movers_[i];
+    if (sm.active) unindex(i);
+    sm.current_row = r;
+    sm.current_col = c;
+    if (sm.active) index(i);
+}
+
+void SlowMoverRegistry::set_tile(int i, int value, PassiveType passive) {
+    movers_[i].value = value;
+    movers_[i].passive = passive;
+}
+
+void SlowMoverRegistry::finish(int i) {
+    if (!movers_[i].active) return;
+    unindex(i);
+    movers_[i].active = false;
+}
+
+void SlowMoverRegistry::erase_at(int r, int c) {
+    int i = find(r, c);
+    if (i < 0) return;
+    unindex(i);
+    movers_.erase(movers_.begin() + i);
+    // Later movers moved down one slot.
+    for (int j = i; j < size(); j++) relink(j);
+}
+
+void SlowMoverRegistry::remove_finished() {
+    auto it = std::remove_if(movers_.begin(), movers_.end(),
+                             [](const SlowMoverState& sm) { return !sm.active; });
+    if (it == movers_.end()) return;
+    movers_.erase(it, movers_.end());
+    for (int j = 0; j < size(); j++) relink(j);
+}
+
+void SlowMoverRegistry::index(int i) {
+    const SlowMoverState& sm = movers_[i];
+    if (!in_bounds(sm.current_row, sm.current_col)) return;
+    if (slot_.empty()) slot_.assign(static_cast<size_t>(rows_) * cols_, -1);
+    slot_[cell(sm.current_row, sm.current_col)] = i;
+    active_.insert(sm.current_row, sm.current_col);
+}
+
+void SlowMoverRegistry::relink(int i) {
+    const SlowMoverState& sm = movers_[i];
+    if (sm.active && in_bounds(sm.current_row, sm.current_col) && !slot_.empty())
+        slot_[cell(sm.current_row, sm.current_col)] = i;
+}
+
+void SlowMoverRegistry::unindex(int i) {
+    const SlowMoverState& sm = movers_[i];
+    if (!in_bounds(sm.current_row, sm.current_col) || slot_.empty()) return;
+    std::int32_t& s = slot_[cell(sm.current_row, sm.current_col)];
+    if (s != i) return;
+    s = -1;
+    active_.erase(sm.current_row, sm.current_col);
+}
+
+void SlowMoverRegistry::reindex() {
+    slot_.clear();
+    active_.reset(rows_, cols_);
+    for (int i = 0; i < size(); i++)
+        if (movers_[i].active) index(i);
+}
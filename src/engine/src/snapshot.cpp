@@ -0,0 +1,286 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#include "game_engine.h"
+#include <cstdint>
+#include <cstdlib>
+#include <stdexcept>
+
+// EngineSnapshot is a plain record defined in snapshot.h; this file encodes
+// it, and takes, restores and keeps snapshots for GameEngine.
+
+namespace {
+
+// Decoded boards larger than this are rejected as corrupt.
+constexpr std::uint64_t kMaxSide = 1 << 12;
+constexpr std::uint64_t kMaxCells = 1 << 22;
+
+int get_int(varint::Reader& in) {
+    std::int64_t v = in.get_signed();
+    if (v < INT32_MIN || v > INT32_MAX) throw std::invalid_argument("snapshot value out of range");
+    return static_cast<int>(v);
+}
+
+std::uint64_t get_count(varint::Reader& in, std::uint64_t limit) {
+    std::uint64_t n = in.get();
+    if (n > limit) throw std::invalid_argument("snapshot count out of range");
+    return n;
+}
+
+// An RNG is its seed and draw count, then its state: no words when it is
+// at most RngStream::kMaxSkip draws past the seed (reading replays those),
+// otherwise the MersenneTwister::state() words as 4 little-endian bytes
+// each, so reading never replays more than that.
+void put_rng(std::string& out, const RngStream::Mark& mark) {
+    varint::put(out, mark.seed);
+    varint::put(out, mark.drawn);
+    if (mark.drawn <= RngStream::kMaxSkip) {
+        varint::put(out, 0);
+        return;
+    }
+    const std::vector<std::uint32_t> words = RngStream::words(mark);
+    varint::put(out, words.size());
+    for (std::uint32_t w : words)
+        for (int k = 0; k < 4; k++) out.push_back(static_cast<char>(w >> (8 * k)));
+}
+
+RngStream::Mark get_rng(varint::Reader& in) {
+    const std::uint64_t seed = in.get();
+    if (seed > RngStream::max()) throw std::invalid_argument("snapshot RNG seed out of range");
+    const std::uint64_t drawn = in.get();
+    const std::uint64_t n = in.get();
+    if (n == 0) {
+        if (drawn > RngStream::kMaxSkip) throw std::invalid_argument("snapshot RNG state missing");
+        return RngStream::at(static_cast<RngStream::result_type>(seed), drawn);
+    }
+    if (n != MersenneTwister::kStateWords + 1) throw std::invalid_argument("invalid generator state");
+    std::vector<std::uint32_t> words(n);
+    for (std::uint32_t& w : words)
+        for (int k = 0; k < 4; k++) w |= std::uint32_t(in.byte()) << (8 * k);
+    return RngStream::from_words(words, static_cast<RngStream::result_type>(seed), drawn);
+}
+
+} // anonymous namespace
+
+// Layout: rows, cols; (code, passive) bytes per cell, row-major; score,
+// tar_expand, expansion count, respawn timer; frozen cells as gaps between
+// row-major indices; slow movers; snails; each RNG (put_rng).
+void EngineSnapshot::write(std::string& out) const {
+    varint::put(out, rows_);
+    varint::put(out, cols_);
+    for (const auto& row : board_rows_)
+        for (const auto& [code, passive] : *row) {
+            out.push_back(static_cast<char>(code));
+            out.push_back(static_cast<char>(passive));
+        }
+    varint::put_signed(out, score_);
+    varint::put_signed(out, tar_expand_);
+    varint::put_signed(out, expand_count_);
+    varint::put_signed(out, snail_respawn_timer_);
+
+    varint::put(out, frozen_tiles_.size());
+    int last = 0;
+    frozen_tiles_.for_each([&](int r, int c) {
+        const int i = r * cols_ + c;
+        varint::put(out, i - last);
+        last = i;
+    });
+
+    varint::put(out, slow_movers_.size());
+    for (const SlowMoverState& sm : slow_movers_) {
+        for (int v : {sm.current_row, sm.current_col, sm.dest_row, sm.dest_col, sm.dr, sm.dc, sm.value})
+            varint::put_signed(out, v);
+        varint::put(out, static_cast<std::uint8_t>(sm.passive));
+        varint::put(out, sm.active);
+    }
+    varint::put(out, random_movers_.size());
+    for (const RandomMoverState& rm : random_movers_.movers()) {
+        varint::put_signed(out, rm.row);
+        varint::put_signed(out, rm.col);
+    }
+
+    put_rng(out, board_rng_);
+    put_rng(out, roller_rng_);
+    put_rng(out, engine_rng_);
+}
+
+Snapshot EngineSnapshot::read(varint::Reader& in) {
+    auto s = std::make_shared<EngineSnapshot>();
+    const std::uint64_t rows = in.get(), cols = in.get();
+    if (rows == 0 || cols == 0 || rows > kMaxSide || cols > kMaxSide || rows * cols > kMaxCells)
+        throw std::invalid_argument("snapshot board size out of range");
+    s->rows_ = static_cast<int>(rows);
+    s->cols_ = static_cast<int>(cols);
+    const int cells = s->rows_ * s->cols_;
+
+    s->board_rows_.reserve(rows);
+    for (int r = 0; r < s->rows_; r++) {
+        auto row = std::make_shared<Row>(cols);
+        for (auto& [code, passive] : *row) {
+            code = in.byte();
+            passive = in.byte();
+            if (!tile_code::is_valid(code) || !is_valid_passive(passive))
+                throw std::invalid_argument("snapshot tile out of range");
+        }
+        s->board_rows_.push_back(std::move(row));
+    }
+    s->score_ = get_int(in);
+    s->tar_expand_ = get_int(in);
+    s->expand_count_ = get_int(in);
+    s->snail_respawn_timer_ = get_int(in);
+
+    s->frozen_tiles_.reset(s->rows_, s->cols_);
+    std::uint64_t i = 0;
+    for (std::uint64_t n = get_count(in, cells); n > 0; n--) {
+        i += in.get();
+        if (i >= static_cast<std::uint64_t>(cells)) throw std::invalid_argument("snapshot cell out of range");
+        s->frozen_tiles_.insert(static_cast<int>(i) / s->cols_, static_cast<int>(i) % s->cols_);
+    }
+
+    auto on_board = [&](int r, int c) { return r >= 0 && r < s->rows_ && c >= 0 && c < s->cols_; };
+    s->slow_movers_.reset(s->rows_, s->cols_);
+    for (std::uint64_t n = get_count(in, cells); n > 0; n--) {
+        SlowMoverState sm;
+        for (int* v : {&sm.current_row, &sm.current_col, &sm.dest_row, &sm.dest_col, &sm.dr, &sm.dc, &sm.value})
+            *v = get_int(in);
+        const std::uint64_t passive = in.get();
+        if (passive > static_cast<std::uint64_t>(kAllPassives)) throw std::invalid_argument("snapshot passive out of range");
+        sm.passive = static_cast<PassiveType>(passive);
+        sm.active = in.get() != 0;
+        // What advance_slow_movers() relies on: a tile value it can write, and
+        // a destination, a one-cell step and (while active) a position on the
+        // board. The cell itself is not compared with the value: a merge or a
+        // detonation can change or clear it under a live mover in play too.
+        if (sm.value < 2 || (sm.value & (sm.value - 1)) != 0)
+            throw std::invalid_argument("snapshot slow mover value out of range");
+        if (!on_board(sm.dest_row, sm.dest_col) || std::abs(sm.dr) + std::abs(sm.dc) != 1)
+            throw std::invalid_argument("snapshot slow mover path out of range");
+        if (sm.active && !on_board(sm.current_row, sm.current_col))
+            throw std::invalid_argument("snapshot cell out of range");
+        s->slow_movers_.add(sm);
+    }
+    std::vector<RandomMoverState> snails(get_count(in, cells));
+    for (auto& rm : snails) {
+        rm.row = get_int(in);
+        rm.col = get_int(in);
+    }
+    s->random_movers_.reset(s->rows_, s->cols_);
+    s->random_movers_.assign(snails);
+
+    s->board_rng_ = get_rng(in);
+    s->roller_rng_ = get_rng(in);
+    s->engine_rng_ = get_rng(in);
+    return s;
+}
+
+Snapshot GameEngine::snapshot() const {
+    auto s = std::make_shared<EngineSnapshot>();
+    const int rows = board_.rows(), cols = board_.cols();
+    s->rows_ = rows;
+    s->cols_ = cols;
+
+    // Rows of the previous snapshot only line up on a board of the same size.
+    const EngineSnapshot* prev = last_snapshot_ && last_snapshot_->rows_ == rows &&
+                                 last_snapshot_->cols_ == cols ? last_snapshot_.get() : nullptr;
+    auto same_row = [&](int r, const EngineSnapshot::Row& row) {
+        for (int c = 0; c < cols; c++)
+            if (row[c].first != board_.code(r, c) ||
+                row[c].second != static_cast<std::uint8_t>(board_.passive(r, c)))
+                return false;
+        return true;
+    };
+    s->board_rows_.reserve(rows);
+    for (int r = 0; r < rows; r++) {
+        if (prev && same_row(r, *prev->board_rows_[r])) {
+            s->board_rows_.push_back(prev->board_rows_[r]);
+            continue;
+        }
+        auto row = std::make_shared<EngineSnapshot::Row>(cols);
+        for (int c = 0; c < cols; c++)
+            (*row)[c] = {board_.code(r, c), static_cast<std::uint8_t>(board_.passive(r, c))};
+        s->board_rows_.push_back(std::move(row));
+    }
+
+    s->frozen_tiles_ = frozen_tiles_;
+    s->slow_movers_ = slow_movers_;
+    s->random_movers_ = random_movers_;
+    s->score_ = score_;
+    s->tar_expand_ = tar_expand_;
+    s->expand_count_ = expand_count_;
+    s->snail_respawn_timer_ = snail_respawn_timer_;
+    s->board_rng_ = board_.rng_mark();
+    s->roller_rng_ = passive_roller_.rng_mark();
+    s->engine_rng_ = rng_.mark();
+    last_snapshot_ = s;
+    return s;
+}
+
+void GameEngine::restore(const Snapshot& snapshot) {
+    if (!snapshot) throw std::invalid_argument("restore needs a snapshot");
+    const EngineSnapshot& s = *snapshot;
+    const bool resized = s.rows_ != board_.rows() || s.cols_ != board_.cols();
+    if (resized) board_.reset(s.rows_, s.cols_);
+    // Writes of unchanged cells are no-ops, so only differing cells are
+    // journaled and the board's registries and hash follow as usual.
+    for (int r = 0; r < s.rows_; r++) {
+        const EngineSnapshot::Row& row = *s.board_rows_[r];
+        for (int c = 0; c < s.cols_; c++)
+            board_.set_code(r, c, row[c].first, static_cast<PassiveType>(row[c].second));
+    }
+    board_.restore_rng(s.board_rng_);
+
+    frozen_tiles_ = s.frozen_tiles_;
+    slow_movers_ = s.slow_movers_;
+    random_movers_ = s.random_movers_;
+    passive_roller_.restore_rng(s.roller_rng_);
+    rng_.restore(s.engine_rng_);
+    score_ = s.score_;
+    tar_expand_ = s.tar_expand_;
+    expand_count_ = s.expand_count_;
+    snail_respawn_timer_ = s.snail_respawn_timer_;
+    if (resized) reserve_scratch();
+
+    // Frozen tiles and slow movers are not covered by the board version.
+    has_moves_version_ = kNoVersion;
+    legal_moves_version_ = kNoVersion;
+    if (recorder_) recorder_->state(s);
+}
+
+void GameEngine::set_history_limit(int limit) {
+    if (limit < 0) throw std::invalid_argument("history limit must not be negative");
+    history_.assign(limit, nullptr);
+    history_start_ = 0;
+    history_count_ = 0;
+}
+
+Snapshot GameEngine::history(int back) const {
+    if (back < 0 || back >= history_count_) throw std::out_of_range("no such history entry");
+    return history_[(history_start_ + history_count_ - 1 - back) % history_limit()];
+}
+
+bool GameEngine::undo() {
+    if (history_count_ == 0) return false;
+    const int newest = (history_start_ + history_count_ - 1) % history_limit();
+    Snapshot before = std::move(history_[newest]);
+    history_count_--;
+    restore(before);
+    return true;
+}
+
+void GameEngine::start_recording(int checkpoint_interval) {
+    if (checkpoint_interval < 0) throw std::invalid_argument("checkpoint interval must not be negative");
+    recorder_ = std::make_unique<ReplayWriter>(checkpoint_interval, *snapshot());
+}
+
+std::string GameEngine::replay_data() const {
+    return recorder_ ? recorder_->data() : std::string();
+}
+
+std::string GameEngine::stop_recording() {
+    std::string data = replay_data();
+    recorder_.reset();
+    return data;
+}
@@ -0,0 +1,270 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#include "solver.h"
+#include <algorithm>
+#include <cstring>
+#include <limits>
+#include <stdexcept>
+
+namespace {
+
+constexpr int kDirections = 4;
+constexpr std::uint32_t kGenerationMask = 0xFFFFFF;
+
+// Table data: value as a float in the low 32 bits, then 8 bits of depth and
+// 24 bits of solve generation.
+std::uint64_t pack(double value, int depth, std::uint32_t generation) {
+    float f = static_cast<float>(value);
+    std::uint32_t bits;
+    std::memcpy(&bits, &f, sizeof bits);
+    return bits | (static_cast<std::uint64_t>(depth & 0xFF) << 32) |
+           (static_cast<std::uint64_t>(generation & kGenerationMask) << 40);
+}
+
+} // anonymous namespace
+
+Solver::Solver(int threads, int table_bits)
+    : pool_(threads),
+      workers_(pool_.threads())
+{
+    if (table_bits < 1 || table_bits > 30)
+        throw std::invalid_argument("table_bits must be between 1 and 30");
+    table_.reset(new Entry[std::size_t(1) << table_bits]);
+    table_mask_ = (std::uint64_t(1) << table_bits) - 1;
+}
+
+bool Solver::out_of_time() {
+    if (stop_.load(std::memory_order_relaxed)) return true;
+    if (timed_ && std::chrono::steady_clock::now() >= deadline_) {
+        stop_.store(true, std::memory_order_relaxed);
+        return true;
+    }
+    return false;
+}
+
+bool Solver::probe(std::uint64_t key, int depth, double& value) const {
+    const Entry& e = table_[key & table_mask_];
+    std::uint64_t data = e.data.load(std::memory_order_relaxed);
+    std::uint64_t check = e.check.load(std::memory_order_relaxed);
+    if ((check ^ data) != key) return false;
+    if (((data >> 32) & 0xFF) != static_cast<std::uint64_t>(depth)) return false;
+    if ((data >> 40) != generation_) return false;
+    float f;
+    std::uint32_t bits = static_cast<std::uint32_t>(data);
+    std::memcpy(&f, &bits, sizeof f);
+    value = f;
+    return true;
+}
+
+void Solver::store(std::uint64_t key, int depth, double value) {
+    Entry& e = table_[key & table_mask_];
+    std::uint64_t data = pack(value, depth, generation_);
+    e.data.store(data, std::memory_order_relaxed);
+    e.check.store(key ^ data, std::memory_order_relaxed);
+}
+
+bool Solver::play_chance(GameEngine& after, Direction direction, bool list_outcomes,
+                         Ply& ply, Worker& w) const
+{
+    after.process_move_into(direction, ply.result);
+    w.nodes++;
+    const TurnResult& r = ply.result;
+    ply.outcomes.clear();
+    if (!r.board_changed) return false;
+    if (!list_outcomes) return true;
+    const Board& board = after.board();
+
+    // Spawn cells: the cell the engine picked plus every other empty cell it
+    // could have picked, row-major: spawn_excluded is the engine's own
+    // exclusion set. A snail respawned after the spawn keeps its cell.
+    auto& spawns = ply.spawns;
+    spawns.clear();
+    if (r.spawned_tile.first < 0) {
+        spawns.push_back({-1, -1});
+    } else {
+        for (int row = 0; row < board.rows(); row++)
+            for (int col = 0; col < board.cols(); col++)
+                if (std::make_pair(row, col) == r.spawned_tile ||
+                    (board.code(row, col) == tile_code::EMPTY && !r.spawn_excluded.test(row, col)))
+                    spawns.push_back({row, col});
+    }
+
+    // Passive candidates, only when the policy would assign them. Eligible
+    // tiles exclude what the engine's roll excludes; the spawned tile is
+    // excluded wherever it lands, so one list serves every spawn cell.
+    PassiveType choices[2];
+    int n_choices = 0;
+    switch (options_->game.passives) {
+        case PassivePolicy::A_LITTLE_SLOW: choices[n_choices++] = PassiveType::A_LITTLE_SLOW; break;
+        case PassivePolicy::CONTRARIAN:    choices[n_choices++] = PassiveType::CONTRARIAN; break;
+        case PassivePolicy::RANDOM:
+            choices[n_choices++] = PassiveType::A_LITTLE_SLOW;
+            choices[n_choices++] = PassiveType::CONTRARIAN;
+            break;
+        default: break;
+    }
+    auto& tiles = ply.tiles;
+    tiles.clear();
+    double candidate = 0;
+    if (n_choices && !r.merges.empty()) {
+        CellSet& excluded = ply.excluded;
+        excluded.reset(board.rows(), board.cols());
+        for (const auto& m : r.merges) excluded.insert(m.row, m.col);
+        for (const auto& sm : after.get_slow_movers())
+            if (sm.active) excluded.insert(sm.current_row, sm.current_col);
+        for (const auto& rm : after.get_random_movers()) excluded.insert(rm.row, rm.col);
+        if (r.spawned_tile.first >= 0) excluded.insert(r.spawned_tile);
+        PassiveRoller::eligible_tiles(board, excluded, tiles);
+        if (!tiles.empty()) candidate = PassiveRoller::candidate_chance(r.merges);
+    }
+
+    Direction expansions[kDirections];
+    int n_expansions = 0;
+    if (!r.should_expand) expansions[n_expansions++] = Direction::NONE;
+    else if (options_->game.expansion != Direction::NONE) expansions[n_expansions++] = options_->game.expansion;
+    else for (int d = 0; d < kDirections; d++) expansions[n_expansions++] = static_cast<Direction>(d);
+
+    const double p_spawn = 1.0 / spawns.size();
+    const double p_expand = 1.0 / n_expansions;
+    for (const auto& [sr, sc] : spawns) {
+        for (int x = 0; x < n_expansions; x++) {
+            const double p = p_spawn * p_expand;
+            if (candidate < 1.0)
+                ply.outcomes.push_back({p * (1.0 - candidate), sr, sc, -1, -1, PassiveType::NONE, expansions[x]});
+            if (candidate > 0.0) {
+                const double p_tile = p * candidate / (tiles.size() * n_choices);
+                for (const auto& [tr, tc] : tiles)
+                    for (int k = 0; k < n_choices; k++)
+                        ply.outcomes.push_back({p_tile, sr, sc, tr, tc, choices[k], expansions[x]});
+            }
+        }
+    }
+    return true;
+}
+
+void Solver::apply(GameEngine& after, const TurnResult& result, const Outcome& o) const {
+    if (o.spawn_row >= 0 && std::make_pair(o.spawn_row, o.spawn_col) != result.spawned_tile) {
+        after.set_tile(result.spawned_tile.first, result.spawned_tile.second, 0);
+        after.set_tile(o.spawn_row, o.spawn_col, 2);
+    }
+    if (o.passive_row >= 0)
+        after.assign_passive(o.passive_row, o.passive_col, static_cast<int>(o.passive));
+    if (o.expansion != Direction::NONE)
+        after.complete_expansion(o.expansion);
+}
+
+double Solver::max_node(const GameEngine& engine, int depth, double reach, int ply, Worker& w) {
+    if (depth == 0 || reach < options_->min_probability || out_of_time()) return 0;
+
+    const std::uint64_t key = engine.state_hash();
+    double best;
+    if (probe(key, depth, best)) return best;
+
+    // A position with no valid move gains nothing more.
+    best = 0;
+    const int legal = engine.legal_moves();
+    for (int d = 0; d < kDirections; d++) {
+        if (!(legal & (1 << d))) continue;
+        GameEngine after(engine);
+        if (!play_chance(after, static_cast<Direction>(d), depth > 1, w.plies[ply], w)) continue;
+        double value = after.score() - engine.score() + chance_node(after, depth, reach, ply, w);
+        best = std::max(best, value);
+    }
+    // A search cut short by the deadline left partial values behind.
+    if (!stop_.load(std::memory_order_relaxed)) store(key, depth, best);
+    return best;
+}
+
+double Solver::chance_node(const GameEngine& after, int depth, double reach, int ply, Worker& w) {
+    if (depth <= 1) return 0;
+    const Ply& p = w.plies[ply];
+    // Outcomes below the probability cutoff are skipped and the rest
+    // reweighted, so they count as an average outcome.
+    double total = 0, weight = 0;
+    for (const Outcome& o : p.outcomes) {
+        const double q = reach * o.probability;
+        if (q < options_->min_probability) continue;
+        GameEngine child(after);
+        apply(child, p.result, o);
+        total += o.probability * max_node(child, depth - 1, q, ply + 1, w);
+        weight += o.probability;
+    }
+    return weight > 0 ? total / weight : 0;
+}
+
+SolveResult Solver::solve(const GameEngine& root, const SolveOptions& options) {
+    std::lock_guard<std::mutex> lock(solve_mutex_);
+    SolveResult out;
+    out.values.fill(-std::numeric_limits<double>::infinity());
+
+    const int max_depth = std::max(options.depth, 1);
+    options_ = &options;
+    stop_.store(false);
+    timed_ = options.time_budget > 0;
+    deadline_ = std::chrono::steady_clock::now() +
+                std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+                    std::chrono::duration<double>(options.time_budget));
+    generation_ = (generation_ + 1) & kGenerationMask;
+    if (generation_ == 0) generation_ = 1;
+    for (auto& w : workers_) {
+        w.plies.resize(max_depth);
+        w.nodes = 0;
+    }
+
+    // The root moves and their outcomes are the same at every depth.
+    std::vector<RootMove> moves;
+    const int legal = root.legal_moves();
+    for (int d = 0; d < kDirections; d++) {
+        if (!(legal & (1 << d))) continue;
+        RootMove m {static_cast<Direction>(d), std::make_unique<GameEngine>(root), 0, {}};
+        if (!play_chance(*m.after, m.direction, max_depth > 1, m.ply, workers_[0])) continue;
+        m.points = m.after->score() - root.score();
+        moves.push_back(std::move(m));
+    }
+    std::vector<std::pair<int,int>> items;  // (move, outcome)
+    for (size_t m = 0; m < moves.size(); m++)
+        for (size_t k = 0; k < moves[m].ply.outcomes.size(); k++)
+            if (moves[m].ply.outcomes[k].probability >= options.min_probability)
+                items.push_back({static_cast<int>(m), static_cast<int>(k)});
+    std::vector<double> values(items.size());
+
+    for (int depth = timed_ ? 1 : max_depth; depth <= max_depth; depth++) {
+        if (depth > 1) {
+            auto job = [&](int worker, int i) {
+                const RootMove& m = moves[items[i].first];
+                const Outcome& o = m.ply.outcomes[items[i].second];
+                GameEngine child(*m.after);
+                apply(child, m.ply.result, o);
+                values[i] = max_node(child, depth - 1, o.probability, 0, workers_[worker]);
+            };
+            pool_.parallel_for(static_cast<int>(items.size()), job);
+            if (stop_.load()) break;
+        }
+
+        // Reweighted over the searched outcomes, as in chance_node.
+        std::array<double, kDirections> total {}, weight {};
+        for (size_t i = 0; i < items.size(); i++) {
+            const RootMove& m = moves[items[i].first];
+            const double p = m.ply.outcomes[items[i].second].probability;
+            total[int(m.direction)] += p * (depth > 1 ? values[i] : 0);
+            weight[int(m.direction)] += p;
+        }
+        for (const RootMove& m : moves) {
+            const int d = int(m.direction);
+            out.values[d] = m.points + (weight[d] > 0 ? total[d] / weight[d] : 0);
+        }
+        out.depth = depth;
+        if (out_of_time()) break;
+    }
+
+    for (const RootMove& m : moves)
+        if (out.best == Direction::NONE || out.values[int(m.direction)] > out.values[int(out.best)])
+            out.best = m.direction;
+    for (const auto& w : workers_) out.nodes += w.nodes;
+    options_ = nullptr;
+    return out;
+}
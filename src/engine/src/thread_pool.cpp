@@ -0,0 +1,71 @@
+//2048Squared (title pending) copyright (c) 2026 River Knuuttila, common alias: Annie Valentine or aval. All Rights Reserved.
+//Do not redistribute or reuse code without accrediting and explicit permission from author.
+//Contact:
+//+1 (808) 223 4780
+//riverknuuttila2@outlook.com
+
+#include "thread_pool.h"
+#include <algorithm>
+
+ThreadPool::ThreadPool(int threads) {
+    if (threads <= 0) threads = static_cast<int>(std::max(1u, std::thread::hardware_concurrency()));
+    workers_.reserve(threads - 1);
+    for (int w = 1; w < threads; w++)
+        workers_.emplace_back([this, w] { worker_loop(w); });
+}
+
+ThreadPool::~ThreadPool() {
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        stop_ = true;
+    }
+    wake_.notify_all();
+    for (auto& t : workers_) t.join();
+}
+
+void ThreadPool::parallel_for(int items, FunctionRef<void(int, int)> f) {
+    if (items <= 0) return;
+    std::lock_guard<std::mutex> run(run_mutex_);
+    if (workers_.empty()) {
+        for (int i = 0; i < items; i++) f(0, i);
+        return;
+    }
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        job_ = &f;
+        items_ = items;
+        next_.store(0, std::memory_order_relaxed);
+        busy_ = static_cast<int>(workers_.size());
+        epoch_++;
+    }
+    wake_.notify_all();
+    work(0, f);
+
+    std::unique_lock<std::mutex> lock(mutex_);
+    idle_.wait(lock, [this] { return busy_ == 0; });
+    job_ = nullptr;
+}
+
+void ThreadPool::work(int worker, FunctionRef<void(int, int)>& f) {
+    for (int i; (i = next_.fetch_add(1, std::memory_order_relaxed)) < items_; )
+        f(worker, i);
+}
+
+void ThreadPool::worker_loop(int worker) {
+    std::uint64_t seen = 0;
+    for (;;) {
+        FunctionRef<void(int, int)>* job;
+        {
+            std::unique_lock<std::mutex> lock(mutex_);
+            wake_.wait(lock, [&] { return stop_ || epoch_ != seen; });
+            if (stop_) return;
+            seen = epoch_;
+            job = job_;
+        }
+        work(worker, *job);
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            if (--busy_ == 0) idle_.notify_one();
+        }
+    }
+}
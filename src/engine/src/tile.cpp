@@ -5,6 +5,25 @@
 //riverknuuttila2@outlook.com
 
 #include "tile.h"
+#include <stdexcept>
+#include <string>
 
-// All Tile methods are inline in the header.
-// This file exists for future non-inline additions.
+namespace tile_code {
+
+TileCode encode(int value) {
+    switch (value) {
+        case 0:  return EMPTY;
+        case -1: return BOMB;
+        case -2: return SNAIL;
+        case -3: return WALL;
+        default: break;
+    }
+    if (value > 0 && (value & (value - 1)) == 0) {
+        TileCode exponent = 0;
+        while ((1 << exponent) != value) exponent++;
+        if (exponent >= 1) return exponent;
+    }
+    throw std::invalid_argument("invalid tile value " + std::to_string(value));
+}
+
+} // namespace tile_code
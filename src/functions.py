@@ -626,43 +626,70 @@ def toggle_fullscreen(g):
 def sync_grid_from_engine(g):
     g.rows = g.engine.rows()
     g.cols = g.engine.cols()
-    g.playingGrid = np.array(g.engine.get_grid_values(), dtype=int).reshape(g.rows, g.cols)
+    # Read-only view onto engine storage: no copy, and re-fetched here so a
+    # view from before an expansion is never used afterwards.
+    g.playingGrid = g.engine.values_view()
     g.points = g.engine.score()
-    g.passive_map = {(r, c): ptype for r, c, ptype in g.engine.get_passive_map()}
+    # Only cells changed since the last sync (all of them after an expansion
+    # up or left, which shifts every coordinate).
+    for r, c, _, passive in g.engine.take_changes().tolist():
+        if passive:
+            g.passive_map[(r, c)] = passive
+        else:
+            g.passive_map.pop((r, c), None)
+
+# Turns the engine keeps snapshots for (GameEngine.set_history_limit).
+UNDO_LIMIT = 64
+
+# Bit of each direction in GameEngine.legal_moves().
+LEGAL_MOVE_BITS = {name: 1 << int(getattr(engine.Direction, name.upper()))
+                   for name in ("up", "down", "left", "right")}
 
 def process_move(g, direction):
     if g.animating:
         return
 
+    # Dead keypress: the engine already knows this turn would be invalid.
+    if not g.engine.legal_moves() & LEGAL_MOVE_BITS[direction]:
+        return
+
     result = g.engine.process_move(direction)
 
     if not result.board_changed:
         return
 
+    # Shop prices follow expansions, so undo restores them with the engine.
+    # Undo rewinds to the start of the turn: before its abilities, with their
+    # charges back.
+    start, charges = g.turn_start or (None, [a['charges'] for a in g.abilities])
+    g.turn_start = None
+    g.undo_economy.append((g.expansion_count, [a['cost'] for a in g.abilities], charges, start))
+    del g.undo_economy[:-UNDO_LIMIT]
+
     g.switch_used_this_turn = False
     sync_grid_from_engine(g)
 
     # Phase 1: regular tiles only
-    g.moving_tiles = [(m.start_row, m.start_col, m.end_row, m.end_col, m.value, 0)
-                      for m in result.moves]
-    g.merging_tiles = [(m.row, m.col, m.new_value, 1.0) for m in result.merges]
+    # The *_array channels are int32 arrays; tolist() turns them into plain ints
+    # in one call instead of one pybind object per field.
+    g.moving_tiles = [(*m, 0) for m in result.moves_array.tolist()]
+    g.merging_tiles = [(*m, 1.0) for m in result.merges_array.tolist()]
 
     # Phase 2: snail moves (after regular tiles settle)
     g.pending_snail_moves = []
-    for u in result.random_mover_updates:
-        if u.old_row != u.new_row or u.old_col != u.new_col:
-            dest_value = g.playingGrid[u.new_row][u.new_col]
+    for old_r, old_c, new_r, new_c in result.random_mover_updates_array.tolist():
+        if old_r != new_r or old_c != new_c:
+            dest_value = g.playingGrid[new_r][new_c]
             if dest_value != -1:
-                g.pending_snail_moves.append((u.old_row, u.old_col, u.new_row, u.new_col, -2, 0))
+                g.pending_snail_moves.append((old_r, old_c, new_r, new_c, -2, 0))
 
     # Phase 3: active SlowMover advances + A_LITTLE_SLOW step-advances
     g.pending_slow_moves = []
-    for u in result.slow_mover_updates:
-        if u.old_row != u.new_row or u.old_col != u.new_col:
-            g.pending_slow_moves.append((u.old_row, u.old_col, u.new_row, u.new_col, u.value, 0))
-    g.pending_slow_moves += [(m.start_row, m.start_col, m.end_row, m.end_col, m.value, 0)
-                              for m in result.slow_tile_moves]
-    g.pending_slow_merges = [(m.row, m.col, m.new_value, 1.0) for m in result.slow_tile_merges]
+    for old_r, old_c, new_r, new_c, value, _, _ in result.slow_mover_updates_array.tolist():
+        if old_r != new_r or old_c != new_c:
+            g.pending_slow_moves.append((old_r, old_c, new_r, new_c, value, 0))
+    g.pending_slow_moves += [(*m, 0) for m in result.slow_tile_moves_array.tolist()]
+    g.pending_slow_merges = [(*m, 1.0) for m in result.slow_tile_merges_array.tolist()]
 
     # Start animation at the earliest non-empty phase
     if g.moving_tiles or g.merging_tiles:
@@ -700,7 +727,7 @@ def process_move(g, direction):
         update_color_scheme(g)
 
     # Queue passive candidates for menu
-    g.pending_passives = [(c.row, c.col, c.tile_value) for c in result.passive_candidates]
+    g.pending_passives = [tuple(c) for c in result.passive_candidates_array.tolist()]
 
     # Create explosion particles for bomb-destroyed tiles
     for r, c in result.bomb_destroyed:
@@ -717,6 +744,40 @@ def process_move(g, direction):
     print()
     print(f"Score: {g.points} (+{result.points_gained})")
 
+def begin_ability(g):
+    # The first ability of a turn marks where undoing that turn rewinds to.
+    if g.turn_start is None:
+        g.turn_start = (g.engine.snapshot(), [a['charges'] for a in g.abilities])
+
+def undo_move(g):
+    # Placements in progress have already spent their charge; finish or cancel them first.
+    if g.selecting_bomb_position or g.selecting_freeze_position or g.selecting_switch_position:
+        return
+    # Rewinds to before the last valid turn, along with its passive choices and expansion.
+    if not g.engine.undo():
+        return
+
+    if g.undo_economy:
+        g.expansion_count, costs, charges, start = g.undo_economy.pop()
+        # Also take back the bombs, freezes and switches used before the move.
+        if start is not None:
+            g.engine.restore(start)
+        for ability, cost, count in zip(g.abilities, costs, charges):
+            ability['cost'] = cost
+            ability['charges'] = count
+    g.turn_start = None
+    sync_grid_from_engine(g)
+    recalculate_positions(g)
+    update_color_scheme(g)
+
+    g.pending_passives = []
+    g.pending_expand = False
+    g.pending_shop = False
+    g.frozen_tiles.clear()
+    g.switch_used_this_turn = False
+    g.game_over = False
+    print(f"Undo. Score: {g.points}")
+
 def start_grid_expansion(g):
     g.expand_old_sx = g.start_x
     g.expand_old_sy = g.start_y
@@ -1225,6 +1286,7 @@ def handle_button_click(g, mouse_pos):
     # Bomb button (left)
     if lay['left_x'] <= mouse_x <= lay['left_x'] + g.button_width and btn_y <= mouse_y <= btn_y + g.button_height:
         if g.abilities[0]['charges'] > 0 and not any_active:
+            begin_ability(g)
             g.abilities[0]['charges'] -= 1
             g.selecting_bomb_position = True
             print(f"Bomb ability activated! Charges remaining: {g.abilities[0]['charges']}")
@@ -1233,6 +1295,7 @@ def handle_button_click(g, mouse_pos):
     # Freeze button (middle)
     if lay['mid_x'] <= mouse_x <= lay['mid_x'] + g.button_width and btn_y <= mouse_y <= btn_y + g.button_height:
         if g.abilities[1]['charges'] > 0 and not any_active:
+            begin_ability(g)
             g.abilities[1]['charges'] -= 1
             g.selecting_freeze_position = True
             print(f"Freeze ability activated! Charges remaining: {g.abilities[1]['charges']}")
@@ -1241,6 +1304,7 @@ def handle_button_click(g, mouse_pos):
     # Switch button (right)
     if lay['right_x'] <= mouse_x <= lay['right_x'] + g.button_width and btn_y <= mouse_y <= btn_y + g.button_height:
         if g.abilities[2]['charges'] > 0 and not any_active and not g.switch_used_this_turn:
+            begin_ability(g)
             g.abilities[2]['charges'] -= 1
             g.selecting_switch_position = True
             g.switch_source = None
@@ -102,7 +102,8 @@ func.recalculate_positions(g)
 
 # Initialize C++ game engine (spawns 2 tiles internally)
 g.engine = engine.GameEngine(g.rows, g.cols)
-g.playingGrid = np.array(g.engine.get_grid_values(), dtype=int).reshape(g.rows, g.cols)
+g.engine.set_history_limit(func.UNDO_LIMIT)
+g.playingGrid = g.engine.values_view()
 
 # Score tracking
 g.points = g.engine.score()
@@ -123,6 +124,10 @@ g.abilities = [
     {'name': 'Switch', 'cost': 1550, 'charges': 0, 'description': 'Move any tile'},
 ]
 g.expansion_count = 0
+# (expansion_count, ability costs, charges, start snapshot) for each turn the
+# engine can undo; turn_start is set by the first ability used in a turn
+g.undo_economy = []
+g.turn_start = None
 g.selecting_bomb_position = False
 g.selecting_freeze_position = False
 g.selecting_switch_position = False
@@ -271,6 +276,12 @@ while running:
                     func.toggle_fullscreen(g)
             continue
 
+        # Undo also works from the game-over screen.
+        if (event.type == pygame.KEYDOWN and event.key in (pygame.K_z, pygame.K_BACKSPACE)
+                and not g.animating and not g.grid_expanding and not g.switch_animating):
+            func.undo_move(g)
+            continue
+
         if event.type == pygame.KEYDOWN and not g.animating and not g.grid_expanding and not g.switch_animating and not g.game_over:
             match event.key:
                 case pygame.K_UP:
@@ -19,6 +19,7 @@ SLOW_CONTRARIAN = 3
 EMPTY, BOMB, SNAIL, WALL = 0, -1, -2, -3
 
 DIRECTIONS = ["left", "right", "up", "down"]
+DIRECTION_ENUM = {name: getattr(eng.Direction, name.upper()) for name in DIRECTIONS}
 
 
 def make_engine(rows=4, cols=4, seed=42):
@@ -103,20 +104,27 @@ def check_invariants(e, context=""):
             f"{context}: slow mover at {(r, c)} tracks value {sm.value}, board holds {g[r][c]}"
 
 
-def fuzz_run(seed, steps=250, check=True):
+def fuzz_run(seed, steps=250, check=True, direction_arg=str, engine_cls=None, snapshots=None):
     """Random move/ability sequence mirroring real frontend usage.
 
     Returns a log of (grid, score) per step so determinism tests can compare runs.
     With check=True, asserts structural and accounting invariants every step.
+    direction_arg converts each direction name into the argument actually
+    passed to process_move / complete_expansion. engine_cls replaces
+    GameEngine, e.g. with a subclass that checks each turn. snapshots, a
+    list, receives an engine snapshot taken at the start of every step, so a
+    failing step can be restored into a fresh engine and replayed on its own.
     """
     import random
-    e = eng.GameEngine(4, 4, seed)
+    e = (engine_cls or eng.GameEngine)(4, 4, seed)
     rng = random.Random(seed)
     log = []
     if check:
         check_invariants(e, f"seed={seed} start")
 
     for step in range(steps):
+        if snapshots is not None:
+            snapshots.append(e.snapshot())
         ctx = f"seed={seed} step={step}"
         g = grid(e)
         rows, cols = e.rows(), e.cols()
@@ -149,7 +157,7 @@ def fuzz_run(seed, steps=250, check=True):
                         if grid(e)[r][c] == WALL}
 
         d = rng.choice(DIRECTIONS)
-        res = e.process_move(d)
+        res = e.process_move(direction_arg(d))
         ctx = f"seed={seed} step={step} dir={d}"
 
         if not res.board_changed:
@@ -199,7 +207,7 @@ def fuzz_run(seed, steps=250, check=True):
 
         # Mirror the frontend: complete a pending expansion, resolve passive menus.
         if res.should_expand:
-            e.complete_expansion(rng.choice(DIRECTIONS))
+            e.complete_expansion(direction_arg(rng.choice(DIRECTIONS)))
             if check:
                 check_invariants(e, ctx + " post-expand")
         for cand in res.passive_candidates:
@@ -19,3 +19,45 @@ def test_same_seed_same_full_run():
 
 def test_different_seeds_diverge():
     assert H.fuzz_run(1, steps=30, check=False) != H.fuzz_run(2, steps=30, check=False)
+
+
+def test_direction_enum_and_int_runs_match_string_runs():
+    by_name = H.fuzz_run(5, steps=120, check=False)
+    assert H.fuzz_run(5, steps=120, check=False, direction_arg=H.DIRECTION_ENUM.get) == by_name
+    assert H.fuzz_run(5, steps=120, check=False,
+                      direction_arg=lambda d: int(H.DIRECTION_ENUM[d])) == by_name
+
+
+def test_process_move_into_matches_process_move():
+    a = H.eng.GameEngine(4, 4, 11)
+    b = H.eng.GameEngine(4, 4, 11)
+    reused = H.eng.TurnResult()
+    for step in range(150):
+        d = H.DIRECTIONS[step % 4]
+        res = a.process_move(d)
+        b.process_move_into(d, reused)
+        assert [(m.start_row, m.start_col, m.end_row, m.end_col, m.value) for m in res.moves] == \
+               [(m.start_row, m.start_col, m.end_row, m.end_col, m.value) for m in reused.moves]
+        assert res.spawned_tile == reused.spawned_tile
+        assert res.board_changed == reused.board_changed
+        assert a.get_grid_values() == b.get_grid_values()
+        if not a.has_moves():
+            break
+
+
+def test_engines_on_worker_threads_match_sequential_runs():
+    # Engine calls release the GIL; separate engines must not interfere.
+    from concurrent.futures import ThreadPoolExecutor
+
+    def play(seed):
+        e = H.eng.GameEngine(6, 6, seed)
+        for step in range(400):
+            e.process_move(H.DIRECTION_ENUM[H.DIRECTIONS[(seed + step * 7) % 4]])
+            if not e.has_moves():
+                break
+        return e.get_grid_values(), e.score()
+
+    seeds = list(range(16))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        threaded = list(pool.map(play, seeds))
+    assert threaded == [play(s) for s in seeds]
@@ -0,0 +1,833 @@
+"""Python-facing engine API beyond the turn pipeline: zero-copy board views,
+TurnResult array export, the change journal, legal moves, previews, clones,
+state hashes, batched engines, rollouts, the solver, parallel movement, snapshots,
+the undo history and replays."""
+import random
+
+import pytest
+
+import helpers as H
+
+np = pytest.importorskip("numpy")
+
+
+def test_views_match_copied_accessors():
+    e = H.make_engine(4, 4, 3)
+    H.set_grid(e, [[2, 4, 0, -1],
+                   [0, 8, 2, 0],
+                   [-2, 0, 0, 16],
+                   [2, 0, -3, 0]], {(0, 0): H.SLOW, (1, 2): H.CONTRARIAN})
+    values, passives = e.values_view(), e.passives_view()
+    assert values.shape == passives.shape == (4, 4)
+    assert values.tolist() == H.grid(e)
+    assert {(int(r), int(c)): int(passives[r, c]) for r, c in zip(*np.nonzero(passives))} == H.passive_map(e)
+
+
+def test_views_are_read_only():
+    e = H.make_engine()
+    for view in (e.values_view(), e.passives_view()):
+        assert not view.flags.writeable
+        with pytest.raises(ValueError):
+            view[0, 0] = 1
+
+
+def test_views_follow_moves_without_refetching():
+    e = H.eng.GameEngine(4, 4, 9)
+    values, passives = e.values_view(), e.passives_view()
+    for step in range(40):
+        e.process_move(H.DIRECTIONS[step % 4])
+        if step == 10:
+            r, c = map(int, np.argwhere(values > 0)[0])
+            e.assign_passive(r, c, H.SLOW)
+        assert values.tolist() == H.grid(e), f"step={step}"
+        assert {(int(r), int(c)) for r, c in zip(*np.nonzero(passives))} == set(H.passive_map(e))
+
+
+def test_old_views_are_stale_but_safe_after_expansion():
+    e = H.eng.GameEngine(4, 4, 2)
+    before = e.values_view()
+    e.complete_expansion("right")   # no copy: the old view still covers its cells
+    e.process_move("left")
+    assert before.shape == (4, 4)
+    assert before.tolist() == [row[:4] for row in H.grid(e)]
+    after = e.values_view()
+    assert after.shape == (4, 5)
+    assert after.tolist() == H.grid(e)
+    for _ in range(6):              # past the margin: the board regrows elsewhere
+        e.complete_expansion("up")
+    assert before.shape == (4, 4) and len(before.tolist()) == 4
+    assert e.values_view().tolist() == H.grid(e)
+
+
+def test_expansion_grows_registries_and_hash_in_place():
+    # Each expansion grows or shifts the board's cell registries and hash
+    # instead of rebuilding them. A fresh board of the same size with the
+    # same cells written into it must agree on the hash and on every spawn.
+    e = _mid_game()
+    for d in ["down", "left", "right", "up", "left", "left", "down", "up", "right", "right"]:
+        e.complete_expansion(d)
+        fresh = H.eng.GameEngine(e.rows(), e.cols(), 0)
+        fresh.restore(e.snapshot())
+        assert fresh.state_hash() == e.state_hash(), d
+        assert _play(fresh, 8) == _play(e, 8), d
+
+
+def _busy_result(seed=4):
+    """A seeded run's first turn with slow-mover updates, so most channels are populated."""
+    e = H.eng.GameEngine(4, 4, seed)
+    for step in range(200):
+        if step % 7 == 0:
+            for r, c in zip(*np.nonzero(e.values_view() > 0)):
+                e.assign_passive(int(r), int(c), H.SLOW_CONTRARIAN)
+                break
+        res = e.process_move(H.DIRECTIONS[step % 4])
+        if res.slow_mover_updates and res.merges:
+            return e, res
+    pytest.fail("no turn with slow mover updates and merges")
+
+
+def test_turn_result_arrays_match_fields():
+    _, res = _busy_result()
+    assert res.moves_array.dtype == np.int32
+    assert res.moves_array.tolist() == [[m.start_row, m.start_col, m.end_row, m.end_col, m.value] for m in res.moves]
+    assert res.merges_array.tolist() == [[m.row, m.col, m.new_value] for m in res.merges]
+    assert res.slow_tile_moves_array.tolist() == \
+        [[m.start_row, m.start_col, m.end_row, m.end_col, m.value] for m in res.slow_tile_moves]
+    assert res.slow_tile_merges_array.tolist() == [[m.row, m.col, m.new_value] for m in res.slow_tile_merges]
+    assert res.passive_candidates_array.tolist() == \
+        [[c.row, c.col, c.tile_value] for c in res.passive_candidates]
+    assert res.slow_mover_updates_array.tolist() == \
+        [[u.old_row, u.old_col, u.new_row, u.new_col, u.value, u.finished, u.is_merge]
+         for u in res.slow_mover_updates]
+    assert res.random_mover_updates_array.tolist() == \
+        [[u.old_row, u.old_col, u.new_row, u.new_col] for u in res.random_mover_updates]
+    assert {tuple(p) for p in res.bomb_destroyed_array.tolist()} == res.bomb_destroyed
+    assert {tuple(p) for p in res.snail_bomb_kills_array.tolist()} == res.snail_bomb_kills
+    assert res.merges_array.shape == (len(res.merges), 3)
+    assert not res.moves_array.flags.writeable
+
+
+def test_turn_result_fields_convert_once_per_fill():
+    e, res = _busy_result()
+    assert res.moves is res.moves
+    assert res.moves_array is res.moves_array
+    assert res.bomb_destroyed is res.bomb_destroyed
+
+    reused = H.eng.TurnResult()
+    e.process_move_into("left", reused)
+    first, first_array = reused.moves, reused.moves_array
+    e.process_move_into("right", reused)
+    assert reused.moves is not first and reused.moves_array is not first_array
+    assert reused.moves_array.tolist() == \
+        [[m.start_row, m.start_col, m.end_row, m.end_col, m.value] for m in reused.moves]
+
+
+def test_take_changes_patches_a_mirror_back_to_the_board():
+    e = H.eng.GameEngine(4, 4, 21)
+    grid, passives = {}, {}
+
+    def apply():
+        changes = e.take_changes().tolist()
+        for r, c, value, passive in changes:
+            grid[(r, c)] = value
+            if passive:
+                passives[(r, c)] = passive
+            else:
+                passives.pop((r, c), None)
+        assert [[grid[(r, c)] for c in range(e.cols())] for r in range(e.rows())] == H.grid(e)
+        assert passives == H.passive_map(e)
+        return len(changes)
+
+    apply()   # a new engine reports every cell
+    expansions = {30: "up", 50: "right", 70: "left", 90: "down"}
+    for step in range(120):
+        if step % 9 == 0:
+            for r, c in zip(*np.nonzero(e.values_view() > 0)):
+                e.assign_passive(int(r), int(c), H.CONTRARIAN)
+                break
+        if step in expansions:
+            e.complete_expansion(expansions[step])
+            if expansions[step] in ("up", "left"):
+                assert apply() == e.rows() * e.cols()   # keys that shifted are all overwritten
+            else:
+                # Nothing shifts: the new cells, plus the wall and snail the
+                # expansion may place, are all that is reported.
+                assert apply() <= max(e.rows(), e.cols()) + 2
+        e.process_move(H.DIRECTIONS[step % 4])
+        apply()
+    assert len(e.take_changes()) == 0
+
+
+class _LegalMovesProbe(H.eng.GameEngine):
+    """Checks every turn against the legal_moves() mask taken just before it."""
+
+    checked = 0
+
+    def process_move(self, d):
+        mask = self.legal_moves()
+        assert mask == self.legal_moves()
+        bombs = H.BOMB in self.get_grid_values()
+        res = super().process_move(d)
+        legal = bool(mask & (1 << int(H.DIRECTION_ENUM[d])))
+        if not legal:
+            assert not res.board_changed, f"{d} reported dead but the turn was valid"
+        elif not bombs and not H.active_slow_movers(self):
+            assert res.board_changed, f"{d} reported legal but the turn was invalid"
+            _LegalMovesProbe.checked += 1
+        return res
+
+
+def test_legal_moves_matches_turn_validity():
+    for seed in range(12):
+        H.fuzz_run(seed, steps=150, check=False, engine_cls=_LegalMovesProbe)
+    assert _LegalMovesProbe.checked > 500
+
+
+def test_legal_moves_follows_freezes():
+    e = H.make_engine()
+    H.set_grid(e, [[0, 2, 0, 0],
+                   [0, 0, 0, 0],
+                   [0, 0, 0, 0],
+                   [0, 0, 0, 0]])
+    bit = {d: 1 << int(v) for d, v in H.DIRECTION_ENUM.items()}
+    assert e.legal_moves() == bit["left"] | bit["right"] | bit["down"]
+    e.place_freeze(0, 1)
+    assert e.legal_moves() == 0
+    e.clear_freeze(0, 1)
+    assert e.legal_moves() == bit["left"] | bit["right"] | bit["down"]
+
+
+def _turn(res):
+    return (res.board_changed, res.moves_array.tolist(), res.merges_array.tolist(),
+            res.slow_tile_moves_array.tolist(), res.slow_mover_updates_array.tolist(),
+            res.random_mover_updates_array.tolist(), sorted(res.bomb_destroyed),
+            res.spawned_tile, res.spawned_snail, res.points_gained, res.should_expand,
+            res.passive_candidates_array.tolist())
+
+
+def test_preview_moves_matches_real_turns_and_changes_nothing():
+    for seed in range(6):
+        e = H.eng.GameEngine(4, 4, seed)
+        view = e.values_view()
+        for step in range(60):
+            if step % 11 == 5:
+                for r, c in zip(*np.nonzero(e.values_view() > 0)):
+                    e.assign_passive(int(r), int(c), H.SLOW if step % 2 else H.CONTRARIAN)
+                    break
+            before = (H.grid(e), H.passive_map(e), e.score(), e.legal_moves(),
+                      [(s.current_row, s.current_col, s.value) for s in e.get_slow_movers()])
+            e.take_changes()
+            previews = e.preview_moves()
+            assert (H.grid(e), H.passive_map(e), e.score(), e.legal_moves(),
+                    [(s.current_row, s.current_col, s.value) for s in e.get_slow_movers()]) == before
+            assert len(e.take_changes()) == 0
+            assert view.tolist() == H.grid(e)   # views still follow the live board
+
+            # Each preview is exactly the turn the engine then plays (RNGs untouched).
+            d = H.DIRECTIONS[(step * 7 + seed) % 4]
+            assert _turn(previews[int(H.DIRECTION_ENUM[d])]) == _turn(e.process_move(d)), \
+                f"seed={seed} step={step} dir={d}"
+
+
+def _play(e, moves=60):
+    return [(tuple(e.process_move(H.DIRECTIONS[i % 4]).spawned_tile), e.score(), tuple(e.get_grid_values()))
+            for i in range(moves)]
+
+
+def _mid_game(seed=8):
+    """An engine with passives, slow movers and a frozen tile in play."""
+    e = H.eng.GameEngine(4, 4, seed)
+    for step in range(40):
+        if step % 6 == 0:
+            for r, c in zip(*np.nonzero(e.values_view() > 0)):
+                e.assign_passive(int(r), int(c), H.SLOW)
+                break
+        e.process_move(H.DIRECTIONS[step % 4])
+    r, c = map(int, np.argwhere(e.values_view() > 0)[0])
+    e.place_freeze(r, c)
+    return e
+
+
+def test_clone_is_independent_and_continues_identically():
+    import copy
+    e = _mid_game()
+    state = lambda x: (H.grid(x), H.passive_map(x), x.score(), x.legal_moves(),
+                       [(s.current_row, s.current_col, s.dest_row, s.dest_col, s.value)
+                        for s in x.get_slow_movers()])
+    clones = [e.clone(), copy.copy(e), copy.deepcopy(e)]
+    for c in clones:
+        assert state(c) == state(e)
+    expected = _play(e)
+    for c in clones:
+        assert _play(c) == expected   # same RNG state, same future
+    assert H.grid(clones[0]) != H.grid(_mid_game())   # the original was not shared
+
+
+def test_clone_with_seed_reseeds_every_rng():
+    e = _mid_game()
+    a, b = e.clone(seed=100), e.clone(seed=100)
+    assert H.grid(a) == H.grid(e)
+    assert _play(a) == _play(b)
+    futures = {tuple(_play(e.clone(seed=s), 30)) for s in range(5)}
+    assert len(futures) > 1
+
+
+def _state(e):
+    return (H.grid(e), H.passive_map(e), e.score(), e.tar_expand(), e.state_hash(),
+            [(s.current_row, s.current_col, s.dest_row, s.dest_col, s.value, s.active)
+             for s in e.get_slow_movers()],
+            [(m.row, m.col) for m in e.get_random_movers()])
+
+
+def test_snapshot_restores_state_and_every_rng():
+    e = _mid_game()
+    e.set_tile(3, 3, H.SNAIL)   # snail steps draw from the engine RNG
+    snap = e.snapshot()
+    before = _state(e)
+    expected = _play(e)
+    assert _state(e) != before
+    e.restore(snap)
+    assert _state(e) == before
+    assert _play(e) == expected   # same RNG positions, same future
+
+    other = H.eng.GameEngine(6, 5, 1)   # any engine, any board size
+    other.restore(snap)
+    assert (snap.rows(), snap.cols(), snap.score()) == (4, 4, before[2])
+    assert _state(other) == before
+    assert _play(other) == expected
+
+
+def test_snapshots_far_apart_restore_exactly():
+    # More spawns than one shared copy of a generator's state covers.
+    e = H.make_engine(8, 8, 5)
+    saved = []
+    for step in range(1300):
+        if step % 325 == 0:
+            saved.append((e.snapshot(), _play(e.clone(), 20)))
+        e.process_move(H.DIRECTIONS[step % 4])
+        if (e.values_view() == 0).sum() < 8:
+            H.set_grid(e, [[0] * 8] * 8)
+    for snap, expected in reversed(saved):
+        e.restore(snap)
+        assert _play(e, 20) == expected
+
+
+def test_restore_across_an_expansion_patches_the_mirror():
+    e = _mid_game(5)
+    snap = e.snapshot()
+    before = _state(e)
+    e.complete_expansion("up")
+    e.process_move("down")
+    view = e.values_view()
+    e.take_changes()
+    e.restore(snap)
+    assert _state(e) == before
+    changes = e.take_changes()
+    assert len(changes) == 16 and e.values_view().tolist() == before[0]
+    assert view.shape == (5, 4)   # the old view kept the expanded board
+
+
+def test_history_ring_undoes_the_latest_valid_turns():
+    e = H.make_engine(4, 4, 3)
+    H.set_grid(e, [[2, 0, 0, 0]])
+    assert e.history_limit() == 0
+    e.set_history_limit(3)
+    assert not e.process_move("left").board_changed
+    assert e.history_size() == 0 and not e.undo()
+
+    states = []
+    step = 0
+    while len(states) < 5:
+        before = _state(e)
+        if e.process_move(H.DIRECTIONS[step % 4]).board_changed:
+            states.append(before)
+        step += 1
+    assert e.history_size() == 3 and e.history_limit() == 3
+    assert e.history(0).score() == states[-1][2]
+    assert e.clone().history_size() == 0
+    for expected in reversed(states[2:]):
+        assert e.undo()
+        assert _state(e) == expected
+    assert e.history_size() == 0 and not e.undo()
+    with pytest.raises(IndexError):
+        e.history(0)
+
+    e.process_move("down")
+    e.set_history_limit(0)
+    assert e.history_size() == 0
+    with pytest.raises(ValueError):
+        e.set_history_limit(-1)
+
+
+def test_fuzz_snapshots_restore_each_step():
+    snaps = []
+    log = H.fuzz_run(11, steps=60, check=False, snapshots=snaps)
+    assert len(snaps) == len(log)
+    e = H.eng.GameEngine(4, 4, 0)
+    for k in (1, 25, len(log) - 1):
+        e.restore(snaps[k])
+        assert (tuple(e.get_grid_values()), e.score()) == log[k - 1]
+
+
+def _recorded_fuzz_game(seed, steps, interval):
+    """A fuzz game recorded from its first move; returns the engine and its log."""
+    engines = []
+
+    def recording_engine(rows, cols, seed):
+        e = H.eng.GameEngine(rows, cols, seed)
+        e.start_recording(interval)
+        engines.append(e)
+        return e
+    log = H.fuzz_run(seed, steps=steps, check=False, engine_cls=recording_engine)
+    return engines[0], log
+
+
+def test_replay_plays_back_a_fuzz_game():
+    # Abilities, passive choices and expansions are all recorded inputs.
+    e, log = _recorded_fuzz_game(13, 150, interval=10)
+    replay = H.eng.Replay(e.stop_recording())
+    assert not e.recording() and e.replay_data() == b""
+    assert replay.turns() == len(log)
+    assert replay.checkpoint_interval() == 10 and replay.checkpoints() == 1 + (len(log) - 1) // 10
+
+    end = replay.engine_at(replay.turns())
+    assert _state(end) == _state(e)
+    assert _play(end) == _play(e)   # the RNGs were restored too
+
+    # Seeking from a checkpoint lands where playing every input does.
+    full = H.eng.Replay(_recorded_fuzz_game(13, 150, interval=0)[0].replay_data())
+    assert full.checkpoints() == 1
+    for turn in (0, 9, 10, 11, 57, len(log) - 1):
+        assert _state(replay.engine_at(turn)) == _state(full.engine_at(turn)), f"turn={turn}"
+
+
+def test_replay_seeks_to_recorded_turns_and_records_undo():
+    e = _mid_game()
+    e.set_history_limit(4)
+    e.start_recording(checkpoint_interval=3)
+    states = [_state(e)]
+    for step in range(20):
+        e.process_move(H.DIRECTIONS[step % 4])
+        if step == 12:
+            assert e.undo()   # restores are recorded as states, not replayed
+        states.append(_state(e))
+    replay = H.eng.Replay(e.replay_data())
+    assert replay.turns() == 20
+
+    target = H.eng.GameEngine(7, 3, 0)   # seek() restores into any engine
+    for turn in (20, 0, 13, 7, 6):
+        replay.seek(target, turn)
+        assert _state(target) == states[turn], f"turn={turn}"
+    assert _play(target.clone()) == _play(replay.engine_at(6))
+
+    # Between checkpoints a move costs one byte.
+    e.start_recording(checkpoint_interval=0)
+    size = len(e.replay_data())
+    e.process_move("left")
+    assert len(e.replay_data()) == size + 1
+    assert e.clone().replay_data() == b""
+
+
+def _varint(data, i):
+    """The LEB128 varint at data[i] and the offset after it."""
+    value = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, i
+
+
+def _opening_state(data):
+    """Offset of the snapshot in the state event every replay opens with."""
+    i = 4                                   # "2SQR"
+    for _ in range(2):                      # version, checkpoint interval
+        _, i = _varint(data, i)
+    assert data[i] == 14                    # state tag, then its byte length
+    return _varint(data, i + 1)[1]
+
+
+def _snapshot_layout(data, i):
+    """Walk the EngineSnapshot::write() data at data[i]. Returns the offsets
+    of each slow mover's nine fields, and (seed, drawn, state words) per RNG."""
+    rows, i = _varint(data, i)
+    cols, i = _varint(data, i)
+    i += 2 * rows * cols
+    for _ in range(4):                      # score, tar_expand, expansions, respawn timer
+        _, i = _varint(data, i)
+    frozen, i = _varint(data, i)
+    for _ in range(frozen):
+        _, i = _varint(data, i)
+    movers = []
+    count, i = _varint(data, i)
+    for _ in range(count):
+        fields = []
+        for _ in range(9):
+            fields.append(i)
+            _, i = _varint(data, i)
+        movers.append(fields)
+    count, i = _varint(data, i)
+    for _ in range(2 * count):              # snail rows and columns
+        _, i = _varint(data, i)
+    rngs = []
+    for _ in range(3):
+        seed, i = _varint(data, i)
+        drawn, i = _varint(data, i)
+        count, i = _varint(data, i)
+        rngs.append((seed, drawn, [int.from_bytes(data[i + 4 * k:i + 4 * k + 4], "little") for k in range(count)]))
+        i += 4 * count
+    assert i == len(data) or data[i] < 15
+    return movers, rngs
+
+
+def test_replay_rejects_malformed_data():
+    e = _mid_game()
+    e.start_recording()
+    e.process_move("left")
+    data = e.replay_data()
+    for bad in (b"", b"2SQR", b"nope" + data[4:], data[:20], data + bytes([99]), data + bytes([5, 2])):
+        with pytest.raises(ValueError):
+            H.eng.Replay(bad).engine_at(0)
+    replay = H.eng.Replay(data)
+    for turn in (-1, 2):
+        with pytest.raises(IndexError):
+            replay.engine_at(turn)
+    with pytest.raises(ValueError):
+        e.start_recording(-1)
+
+    # So are the format version and the snapshot fields: an undefined tile
+    # code or passive bit, and a slow mover's value (3) or step (dr = 2).
+    state = _opening_state(data)
+    mover = _snapshot_layout(data, state)[0][0]
+    for offset, byte in ((4, 1), (state + 2, 31), (state + 3, 8), (mover[6], 6), (mover[4], 4)):
+        bad = bytearray(data)
+        bad[offset] = byte
+        with pytest.raises(ValueError):
+            H.eng.Replay(bytes(bad)).engine_at(0)
+
+
+def test_rejected_inputs_are_not_recorded():
+    e = _mid_game()
+    e.start_recording()
+    before = _state(e)
+    size = len(e.replay_data())
+    for bad in (lambda: e.set_tile(0, 0, 3), lambda: e.set_tile(0, 0, 2, 8), lambda: e.assign_passive(0, 0, 4)):
+        with pytest.raises(ValueError):
+            bad()
+    assert len(e.replay_data()) == size and _state(e) == before
+    e.set_tile(0, 0, 4, 1)
+    assert _state(H.eng.Replay(e.replay_data()).engine_at(0)) == _state(e)
+
+
+def _recorded_long_game(turns, interval):
+    """An 8x8 game of `turns` legal moves, recorded from the start."""
+    e = H.eng.GameEngine(8, 8, 3)
+    e.start_recording(interval)
+    for turn in range(turns):
+        legal = [d for d in H.DIRECTIONS if e.legal_moves() >> int(H.DIRECTION_ENUM[d]) & 1]
+        e.process_move(legal[turn % len(legal)])
+    return e
+
+
+def test_checkpoints_store_long_games_rng_state():
+    # Far from its seed an RNG is stored as its state, so seeking does not
+    # replay every draw since the start of the game, and lands exactly.
+    e = _recorded_long_game(1200, interval=200)
+    replay = H.eng.Replay(e.replay_data())
+    full = H.eng.Replay(_recorded_long_game(1200, interval=0).replay_data())
+    assert len(replay.data()) > len(full.data()) + 2500   # one state's worth at least
+    for turn in (1199, 1000, 801, 200):
+        assert _state(replay.engine_at(turn)) == _state(full.engine_at(turn)), f"turn={turn}"
+    assert _play(replay.engine_at(1200)) == _play(e)
+
+
+def _mt19937_state(seed, drawn):
+    """Python's random module, also MT19937, seeded the way std::mt19937 is
+    and advanced `drawn` draws: its 624 state words plus position."""
+    words = [seed]
+    for i in range(1, 624):
+        words.append((1812433253 * (words[-1] ^ (words[-1] >> 30)) + i) & 0xFFFFFFFF)
+    rng = random.Random()
+    rng.setstate((3, tuple(words) + (624,), None))
+    for _ in range(drawn):
+        rng.getrandbits(32)
+    return list(rng.getstate()[1])
+
+
+def test_checkpoint_rng_states_have_a_fixed_layout():
+    # Stored states are MT19937's own words in the order Python's random
+    # uses, not a C++ library's stream format, so replays load anywhere.
+    e = _recorded_long_game(1200, interval=0)
+    e.start_recording(0)
+    data = e.replay_data()
+    stored = [rng for rng in _snapshot_layout(data, _opening_state(data))[1] if rng[2]]
+    assert stored
+    for seed, drawn, words in stored:
+        assert drawn > 1024 and words == _mt19937_state(seed, drawn)
+
+
+def test_state_hash_tracks_state_not_history():
+    a, b = H.make_engine(4, 4, 1), H.make_engine(4, 4, 2)
+    rows = [[2, 4, 0, 0], [0, 8, -1, 0], [0, 0, 2, 0], [16, 0, 0, -3]]
+    H.set_grid(a, rows, {(0, 1): H.SLOW})
+    # Same contents reached through different writes.
+    H.set_grid(b, [[4, 4, 4, 4]] * 4)
+    H.set_grid(b, rows, {(0, 1): H.SLOW})
+    assert a.state_hash() == b.state_hash()
+
+    h = a.state_hash()
+    a.set_tile(2, 2, 4)
+    assert a.state_hash() != h
+    a.set_tile(2, 2, 2)
+    assert a.state_hash() == h
+    a.place_freeze(0, 0)
+    assert a.state_hash() != h
+    a.clear_freeze(0, 0)
+    assert a.state_hash() == h
+    a.assign_passive(3, 0, H.CONTRARIAN)
+    assert a.state_hash() != h
+
+
+def test_state_hash_survives_turns_clones_and_previews():
+    e = _mid_game()
+    for step in range(40):
+        h = e.state_hash()
+        e.preview_moves()
+        assert e.state_hash() == h
+        assert e.clone().state_hash() == h
+        if step == 20:
+            e.complete_expansion("left")
+        e.process_move(H.DIRECTIONS[step % 4])
+
+        # The incrementally kept tile hash matches the same board written from
+        # scratch (where the rest of the state is equal too; the first turn
+        # was valid, so _mid_game's freeze is gone).
+        if step < 20 and not e.get_slow_movers():
+            fresh = H.eng.GameEngine(4, 4, 0)
+            H.set_grid(fresh, H.grid(e), H.passive_map(e))
+            assert fresh.state_hash() == e.state_hash(), f"step={step}"
+
+
+def test_canonical_hash_folds_board_symmetries():
+    rows = [[2, 4, 0, 0], [0, 8, -1, 0], [0, 0, 2, 0], [16, 0, 0, -3]]
+    passives = {(0, 1): H.SLOW}
+
+    def engine(grid, pmap, frozen):
+        e = H.make_engine(len(grid), len(grid[0]))
+        H.set_grid(e, grid, pmap)
+        e.place_freeze(*frozen)
+        return e
+
+    base = engine(rows, passives, (2, 2))
+    mirrored = engine([row[::-1] for row in rows], {(0, 2): H.SLOW}, (2, 1))
+    transposed = engine([list(col) for col in zip(*rows)], {(1, 0): H.SLOW}, (2, 2))
+    for other in (mirrored, transposed):
+        assert other.state_hash() != base.state_hash()
+        assert other.canonical_hash() == base.canonical_hash()
+    moved = engine(rows, passives, (0, 0))
+    assert moved.canonical_hash() != base.canonical_hash()
+
+    # A 4x5 board only folds the four shape-preserving symmetries.
+    wide = [row + [0] for row in rows]
+    tall = [list(col) for col in zip(*wide)]
+    assert engine(wide, passives, (2, 2)).canonical_hash() != \
+        engine(tall, {(1, 0): H.SLOW}, (2, 2)).canonical_hash()
+    assert engine(wide, passives, (2, 2)).canonical_hash() == \
+        engine([row[::-1] for row in wide[::-1]], {(3, 3): H.SLOW}, (1, 2)).canonical_hash()
+
+
+def test_engine_batch_matches_separate_engines():
+    rng = np.random.default_rng(5)
+    moves = rng.integers(0, 4, size=(3, 40))
+    batch = H.eng.EngineBatch(3, 4, 4, seed=11)
+    out = batch.step(moves[:, :25], boards=True)
+    out2 = batch.step(moves[:, 25:], boards=True)
+    assert out["valid"].shape == (3, 25) and out2["score"].shape == (3,)
+
+    for i in range(3):
+        e = H.eng.GameEngine(4, 4, 11 + 4 * i)
+        valid = [e.process_move(int(d)).board_changed for d in moves[i]]
+        assert valid == list(np.concatenate([out["valid"][i], out2["valid"][i]]).astype(bool))
+        assert out2["score"][i] == e.score()
+        assert out2["boards"][i].tolist() == H.grid(e)
+        assert H.grid(batch.engine(i)) == H.grid(e)
+
+
+def test_engine_batch_resolves_expansions_and_passives():
+    batch = H.eng.EngineBatch(2, 4, 4, seed=2, expansion=H.eng.Direction.DOWN,
+                              passives=H.eng.PassivePolicy.CONTRARIAN)
+    H.set_grid(batch.engine(0), [[1024, 1024, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+    out = batch.step(np.array([2, 4]), boards=True)
+    assert out["valid"].tolist() == [1, 0]
+    assert out["changed"].tolist() == [1, 0]
+    assert (batch.engine(0).rows(), batch.engine(1).rows()) == (5, 4)
+    assert out["boards"].shape == (2, 5, 4)
+    assert out["boards"][0, 0, 0] == 2048
+    assert (out["boards"][1, 4] == H.eng.EngineBatch.PADDING).all()
+
+    # Every candidate gets the policy's passive.
+    rng = np.random.default_rng(1)
+    passives = set()
+    while not batch.done().all():
+        out = batch.step(rng.integers(0, 4, size=(2, 10)))
+        passives |= {int(p) for i in range(2) for p in batch.engine(i).passives_view().flat}
+    assert not out["valid"][:, -1].any()
+    assert passives == {H.EMPTY, H.CONTRARIAN}
+
+
+def test_engine_batch_rejects_bad_directions():
+    batch = H.eng.EngineBatch(2, 4, 4, seed=1)
+    with pytest.raises(ValueError):
+        batch.step(np.array([0, 5]))
+    with pytest.raises(ValueError):
+        batch.step(np.array([0, 1, 2]))
+
+
+def test_rollouts_are_deterministic_across_thread_counts():
+    root = _mid_game()
+    for policy in (H.eng.RolloutPolicy.RANDOM, H.eng.RolloutPolicy.GREEDY_MERGE,
+                   H.eng.RolloutPolicy.CORNER):
+        runs = [H.eng.RolloutExecutor(threads).run(root, 12, policy, seed=3, max_turns=80)
+                for threads in (1, 3)]
+        stats = [[(s.valid, s.rollouts, s.mean_score, s.mean_turns, s.mean_max_tile, s.max_tile)
+                  for s in run] for run in runs]
+        assert stats[0] == stats[1], policy
+    other = H.eng.RolloutExecutor(2).run(root, 12, seed=4, max_turns=80)
+    assert [s.mean_score for s in other] != [s.mean_score for s in runs[0]]
+
+
+def test_rollouts_only_play_legal_first_moves():
+    e = H.make_engine(4, 4)
+    H.set_grid(e, [[2, 4, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+    stats = H.eng.RolloutExecutor(2).run(e, 5, seed=1, max_turns=40)
+    legal = e.legal_moves()
+    for d, s in enumerate(stats):
+        assert s.valid == bool(legal >> d & 1)
+        if s.valid:
+            assert s.rollouts == 5 and 1 <= s.mean_turns <= 40
+            assert 4 <= s.mean_max_tile <= s.max_tile
+        else:
+            assert s.rollouts == 0
+    assert not stats[int(H.eng.Direction.LEFT)].valid
+    assert H.grid(e)[0][:2] == [2, 4]
+
+
+def test_solver_depth_one_is_the_immediate_points():
+    e = _mid_game()
+    H.set_grid(e, [[2, 2, -3, 4], [4, 0, -1, 4], [8, 8, 0, 2], [0, 16, 16, 0]], {(0, 3): H.SLOW})
+    key = e.state_hash()
+    res = H.eng.Solver(2).solve(e, depth=1)
+    previews = e.preview_moves()
+    for d, p in enumerate(previews):
+        assert res.values[d] == (p.points_gained if p.board_changed else float("-inf"))
+    assert int(res.best) == max(range(4), key=lambda d: (res.values[d], -d))
+    assert res.depth == 1 and e.state_hash() == key
+
+
+def _spawn_cells(after, res):
+    """Every cell the engine's spawn could have picked on the turn that produced `res`."""
+    return [(r, c) for r, row in enumerate(H.grid(after)) for c, v in enumerate(row)
+            if (v == H.EMPTY and (r, c) not in res.spawn_excluded) or (r, c) == res.spawned_tile]
+
+
+def _expected_value(e, d):
+    """Points for move d plus the best next move, averaged over every spawn cell."""
+    def best_points(engine):
+        return max([p.points_gained for p in engine.preview_moves() if p.board_changed], default=0)
+
+    after = e.clone()
+    res = after.process_move(d)
+    if not res.board_changed:
+        return float("-inf")
+    cells = _spawn_cells(after, res)
+    total = 0
+    for r, c in cells:
+        child = after.clone()
+        child.set_tile(*res.spawned_tile, 0)
+        child.set_tile(r, c, 2)
+        total += best_points(child)
+    return res.points_gained + total / len(cells)
+
+
+def test_solver_averages_every_spawn_cell():
+    e = _mid_game()
+    res = H.eng.Solver(1).solve(e, depth=2, min_probability=0)
+    assert res.values == pytest.approx([_expected_value(e, d) for d in range(4)])
+
+
+def test_solver_spawns_where_the_engine_can_after_a_detonation():
+    e = H.make_engine(4, 4, 2)
+    H.set_grid(e, [[4, 0, 0, 0], [2, 0, 0, 0], [8, 0, 0, 0], [16, 0, 0, 0]])
+    e.place_freeze(0, 0)
+    e.place_bomb(0, 3)
+    after = e.clone()
+    res = after.process_move("left")
+    # The bomb slides next to the frozen 4 and the post-movement pass clears
+    # both cells; only bombs cleared by movement keep the spawn out.
+    assert {(0, 0), (0, 1)} <= res.bomb_destroyed
+    assert not res.spawn_excluded & {(0, 0), (0, 1)}
+    assert {(0, 0), (0, 1)} <= set(_spawn_cells(after, res))
+    spawned = {e.clone(seed=s).process_move("left").spawned_tile for s in range(200)}
+    assert spawned & {(0, 0), (0, 1)}
+
+    # A 2 spawned on a cleared cell can merge up with the 2 below it, so the
+    # cleared cells change what "left" is worth.
+    solved = H.eng.Solver(1).solve(e, depth=2, min_probability=0)
+    assert solved.values == pytest.approx([_expected_value(e, d) for d in range(4)])
+    assert solved.values[int(H.eng.Direction.LEFT)] == pytest.approx(16 / 13)
+
+
+def test_solver_is_thread_count_independent_and_anytime():
+    e = _mid_game()
+    results = [H.eng.Solver(threads).solve(e, depth=3, min_probability=0) for threads in (1, 3)]
+    assert results[0].values == results[1].values and results[0].best == results[1].best
+
+    timed = H.eng.Solver(2).solve(e, depth=40, time_budget=0.02)
+    assert 1 <= timed.depth < 40
+    assert timed.values[int(timed.best)] == max(timed.values)
+
+
+def _crowded(rows, cols, seed):
+    """A seeded engine with numbered tiles, bombs, walls, snails and passives scattered over it."""
+    import random
+    rnd = random.Random(seed)
+    e = H.make_engine(rows, cols, seed)
+    for r in range(rows):
+        for c in range(cols):
+            roll = rnd.random()
+            if roll < 0.04:
+                e.set_tile(r, c, rnd.choice([H.BOMB, H.WALL, H.SNAIL]))
+            elif roll < 0.6:
+                e.set_tile(r, c, 2 ** rnd.randint(1, 4), H.SLOW if roll < 0.08 else 0)
+    return e
+
+
+def test_parallel_movement_matches_single_threaded():
+    for seed, (rows, cols) in enumerate([(24, 24), (21, 30), (4, 110)]):
+        serial, parallel = _crowded(rows, cols, seed), _crowded(rows, cols, seed)
+        parallel.set_move_threads(3, min_cells=0)
+        assert parallel.move_threads() == 3 and serial.move_threads() == 1
+        for step in range(40):
+            d = H.DIRECTIONS[(step * 3 + seed) % 4]
+            assert _turn(parallel.process_move(d)) == _turn(serial.process_move(d)), \
+                f"seed={seed} step={step} dir={d}"
+            assert H.grid(parallel) == H.grid(serial)
+            assert H.passive_map(parallel) == H.passive_map(serial)
+            assert parallel.state_hash() == serial.state_hash()
+        assert parallel.clone().move_threads() == 1
+
+
+def test_move_threads_settings():
+    e = H.make_engine()
+    H.set_grid(e, [[2, 2, 0, 0]])
+    e.set_move_threads(2)        # 4x4 is below the default size: moves stay serial
+    assert e.process_move("left").board_changed
+    assert e.move_threads() == 2
+    e.set_move_threads(1)
+    assert e.move_threads() == 1
+    with pytest.raises(ValueError):
+        e.set_move_threads(-1)
+    with pytest.raises(ValueError):
+        e.set_move_threads(2, min_cells=-5)
@@ -0,0 +1,69 @@
+"""Frontend undo (functions.undo_move): the board, the shop economy and the
+ability charges spent in the undone turn all rewind together."""
+from types import SimpleNamespace
+
+import pytest
+
+import helpers as H
+
+pytest.importorskip("pygame")
+pytest.importorskip("moderngl")
+import functions as func  # noqa: E402
+
+
+def _game(grid):
+    """The slice of main.py's game state that process_move and undo_move touch."""
+    e = H.make_engine(4, 4, 5)
+    H.set_grid(e, grid)
+    e.set_history_limit(func.UNDO_LIMIT)
+    g = SimpleNamespace(
+        engine=e, rows=4, cols=4, points=e.score(), playingGrid=e.values_view(), passive_map={},
+        RENDER_WIDTH=800, RENDER_HEIGHT=600, square_size=100, button_width=150,
+        ui_config={'menu_spacing': 20}, start_x=0, start_y=0,
+        abilities=[{'name': 'Bomb', 'cost': 500, 'charges': 2},
+                   {'name': 'Freeze', 'cost': 750, 'charges': 1},
+                   {'name': 'Switch', 'cost': 1550, 'charges': 0}],
+        expansion_count=0, undo_economy=[], turn_start=None, frozen_tiles=set(),
+        selecting_bomb_position=False, selecting_freeze_position=False, selecting_switch_position=False,
+        switch_used_this_turn=False, animating=False, pending_passives=[], pending_expand=False,
+        pending_shop=False, game_over=False, particle_system=SimpleNamespace(add_explosion=lambda *a, **k: None))
+    func.sync_grid_from_engine(g)
+    return g
+
+
+def _spend(g, index):
+    """Activate ability `index` the way the button handler does."""
+    func.begin_ability(g)
+    g.abilities[index]['charges'] -= 1
+
+
+def test_undo_refunds_charges_spent_in_the_turn():
+    g = _game([[2, 0, 0, 0], [0, 0, 0, 0], [0, 0, 4, 0], [0, 0, 0, 8]])
+    before = (H.grid(g.engine), g.engine.score())
+
+    _spend(g, 0)
+    g.selecting_bomb_position = True
+    func.place_bomb_at_tile(g, 1, 1)
+    _spend(g, 1)
+    g.selecting_freeze_position = True
+    func.place_freeze_on_tile(g, 2, 2)
+    g.animating = False
+    func.process_move(g, "left")
+    assert [a['charges'] for a in g.abilities] == [1, 0, 0]
+    assert g.turn_start is None and len(g.undo_economy) == 1
+
+    func.undo_move(g)
+    assert (H.grid(g.engine), g.engine.score()) == before   # the bomb is gone too
+    assert [a['charges'] for a in g.abilities] == [2, 1, 0]
+    assert not g.frozen_tiles and not g.undo_economy
+
+
+def test_undo_without_abilities_keeps_charges():
+    g = _game([[2, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 8]])
+    func.process_move(g, "right")
+    g.animating = False
+    before = H.grid(g.engine)
+    func.process_move(g, "left")
+    func.undo_move(g)
+    assert H.grid(g.engine) == before
+    assert [a['charges'] for a in g.abilities] == [2, 1, 0]
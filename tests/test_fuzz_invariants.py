@@ -2,7 +2,8 @@
 
 This is the net for combinatorial feature interactions: it explores pairings
 nobody thought to test. A failure message carries the seed and step — rerun
-with that seed for a deterministic reproduction.
+with that seed for a deterministic reproduction, or pass snapshots=[] to
+fuzz_run and restore the failing step's snapshot to examine it alone.
 """
 import pytest
 import helpers as H
@@ -145,6 +145,29 @@ def test_snail_killed_by_adjacent_bomb():
     H.check_invariants(e)
 
 
+def test_random_movers_follow_snail_writes():
+    e = H.make_engine(5, 5, 4)
+    H.set_grid(e, [[0, 0, 0, 0, H.SNAIL], [0] * 5, [0, 0, H.SNAIL, 0, 0],
+                   [H.SNAIL, 0, 0, 0, 0], [8, 0, 0, 0, 0]])
+    movers = lambda: [(m.row, m.col) for m in e.get_random_movers()]
+    assert movers() == [(0, 4), (2, 2), (3, 0)]
+    for step in range(12):
+        before = movers()
+        res = e.process_move(H.DIRECTIONS[step % 4])
+        if not res.board_changed:
+            continue
+        # Snails step in row-major order of where each turn found them
+        # (a boxed-in snail stays put and reports no update).
+        old = [(u.old_row, u.old_col) for u in res.random_mover_updates]
+        assert old == [p for p in before if p in old], f"step={step}"
+        stuck = [p for p in before if p not in old]
+        assert movers() == sorted(stuck + [(u.new_row, u.new_col) for u in res.random_mover_updates])
+    first, *rest = movers()
+    e.set_tile(*first, 0)
+    assert movers() == rest
+    H.check_invariants(e)
+
+
 # ─── Slow tiles ───
 
 def test_slow_tile_steps_one_cell_and_tracks_destination():
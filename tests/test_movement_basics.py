@@ -1,4 +1,5 @@
 """Baseline regular-movement behavior (no passives, no abilities)."""
+import pytest
 import helpers as H
 
 Z = [0, 0, 0, 0]
@@ -54,3 +55,94 @@ def test_valid_move_spawns_exactly_one_tile():
     occupied_after = sum(1 for v in e.get_grid_values() if v != 0)
     assert occupied_after == occupied_before + 1
     H.check_invariants(e)
+
+
+def test_large_values_merge_like_small_ones():
+    # 2^14 pairs resolve through the packed move table; 2^15 pairs exceed its
+    # nibble range and take the general segment path. Both must agree.
+    for v in (16384, 32768):
+        e = H.make_engine()
+        H.set_grid(e, [[0, v, 0, v], Z, Z, Z])
+        res = e.process_move("left")
+        assert H.grid_minus_spawn(e, res)[0] == [2 * v, 0, 0, 0]
+        assert [(m.row, m.col, m.new_value) for m in res.merges] == [(0, 0, 2 * v)]
+        H.check_invariants(e)
+
+
+def test_set_tile_rejects_values_that_are_not_tiles():
+    e = H.make_engine()
+    for bad in (1, 3, 6, -4):
+        with pytest.raises(ValueError):
+            e.set_tile(0, 0, bad)
+
+
+def test_spawn_lands_on_the_only_empty_cell_after_expansion():
+    # The empty-cell index must follow expansions that shift coordinates.
+    e = H.make_engine()
+    e.complete_expansion("up")
+    e.complete_expansion("left")
+    vals = [2 ** (i % 9 + 2) for i in range(e.rows() * e.cols())]
+    for r in range(e.rows()):
+        for c in range(e.cols()):
+            e.set_tile(r, c, vals[r * e.cols() + c])
+    e.set_tile(0, 0, 2)
+    e.set_tile(0, 1, 2)
+    res = e.process_move("left")  # the merge frees exactly the last cell of row 0
+    assert res.spawned_tile == (0, e.cols() - 1)
+    H.check_invariants(e)
+
+
+def test_snail_next_to_bomb_is_found_after_expansion():
+    # Bomb and snail registries must follow expansions that shift coordinates.
+    e = H.make_engine()
+    e.set_tile(1, 1, -1)
+    e.set_tile(1, 2, -2)
+    e.complete_expansion("up")
+    e.complete_expansion("left")
+    res = e.process_move("down")
+    assert (2, 2) in res.bomb_destroyed or (2, 3) in res.bomb_destroyed
+    assert -1 not in H.grid(e)[2]
+    H.check_invariants(e)
+
+
+def test_wall_segments_follow_wall_writes():
+    # Walls split lines; the cached wall layout must follow every write.
+    e = H.make_engine()
+    H.set_grid(e, [[0, 2, -3, 2], Z, Z, Z])
+    res = e.process_move("left")
+    assert H.grid_minus_spawn(e, res)[0] == [2, 0, -3, 2]
+    H.set_grid(e, [[0, 2, 0, 2], Z, Z, Z])
+    res = e.process_move("left")
+    assert H.grid_minus_spawn(e, res)[0] == [4, 0, 0, 0]
+    H.check_invariants(e)
+
+
+def test_segments_on_lines_longer_than_a_word():
+    e = H.make_engine(rows=2, cols=70)
+    for c, v in ((1, 2), (65, 2), (66, -3), (69, 2)):
+        e.set_tile(0, c, v)
+    res = e.process_move("left")
+    row = H.grid_minus_spawn(e, res)[0]
+    assert [(c, v) for c, v in enumerate(row) if v] == [(0, 4), (66, -3), (67, 2)]
+
+
+def test_has_moves_follows_tile_writes_on_a_full_board():
+    e = H.make_engine(rows=2, cols=2)
+    H.set_grid(e, [[2, 4], [8, 16]])
+    assert not e.has_moves()
+    e.set_tile(1, 1, 4)
+    assert e.has_moves()
+    e.set_tile(1, 1, 32)
+    assert not e.has_moves()
+
+
+def test_direction_none_and_bad_ints():
+    e = H.make_engine()
+    H.set_grid(e, [[2, 2, 0, 0], Z, Z, Z])
+    res = e.process_move(H.eng.Direction.NONE)
+    assert not res.board_changed
+    assert res.expand_direction == H.eng.Direction.NONE
+    with pytest.raises(ValueError):
+        e.process_move(7)
+    with pytest.raises(ValueError):
+        e.complete_expansion(-1)